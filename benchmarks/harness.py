@@ -0,0 +1,122 @@
+import json
+import os
+import platform
+import time
+
+
+class BenchResult:
+    """Outcome of one benchmark: throughput plus per-call latency percentiles."""
+
+    __slots__ = ("name", "calls", "items", "seconds", "p50_us", "p99_us")
+
+    def __init__(self, name: str, calls: int, items: int, seconds: float, p50_us: float, p99_us: float):
+        self.name = name
+        self.calls = calls
+        self.items = items        # work units processed (rows, messages...); >= calls for batched benches
+        self.seconds = seconds
+        self.p50_us = p50_us
+        self.p99_us = p99_us
+
+    @property
+    def throughput(self) -> float:
+        """Items per second."""
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "seconds": round(self.seconds, 6),
+            "throughput": round(self.throughput, 1),
+            "p50_us": round(self.p50_us, 3),
+            "p99_us": round(self.p99_us, 3),
+        }
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def bench(name: str, fn, inputs, items_per_call: int = 1, warmup: int = 0) -> BenchResult:
+    """
+    Call fn(x) for every x in `inputs`, timing each call.
+
+    Args:
+        items_per_call: Work units per call (e.g. rows per batch) for throughput.
+        warmup: Leading calls run but not measured (caches, JIT-ish warm paths).
+    """
+    inputs = list(inputs)
+    for x in inputs[:warmup]:
+        fn(x)
+    inputs = inputs[warmup:]
+
+    timings = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for x in inputs:
+        t0 = clock()
+        fn(x)
+        timings.append(clock() - t0)
+    total_s = (clock() - started) / 1e9
+
+    timings.sort()
+    return BenchResult(
+        name,
+        calls=len(timings),
+        items=len(timings) * items_per_call,
+        seconds=total_s,
+        p50_us=percentile(timings, 50) / 1e3,
+        p99_us=percentile(timings, 99) / 1e3,
+    )
+
+
+# --- Baselines ---
+
+def save_baseline(results: list[BenchResult], path: str) -> None:
+    """Write results as JSON (with host info, since numbers are machine-specific)."""
+    payload = {
+        "created_at": time.time(),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "results": {r.name: r.to_dict() for r in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def load_baseline(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def report(results: list[BenchResult], baseline: dict | None = None, tolerance: float = 0.10) -> list[str]:
+    """
+    Print a results table; with a baseline, add throughput/p99 change columns.
+    Returns the names of benchmarks whose throughput dropped or p99 grew by
+    more than `tolerance` (0.10 = 10%).
+    """
+    header = f"{'benchmark':38} {'items/s':>13} {'p50 µs':>10} {'p99 µs':>10}"
+    if baseline is not None:
+        header += f" {'Δ items/s':>10} {'Δ p99':>8}"
+    print(header)
+    print("-" * len(header))
+
+    regressions = []
+    for r in results:
+        line = f"{r.name:38} {r.throughput:>13,.0f} {r.p50_us:>10.2f} {r.p99_us:>10.2f}"
+        base = baseline.get(r.name) if baseline is not None else None
+        if base is not None:
+            d_tput = r.throughput / base["throughput"] - 1 if base["throughput"] else 0.0
+            d_p99 = r.p99_us / base["p99_us"] - 1 if base["p99_us"] else 0.0
+            flag = ""
+            if d_tput < -tolerance or d_p99 > tolerance:
+                regressions.append(r.name)
+                flag = "  ← regression"
+            line += f" {d_tput:>+10.1%} {d_p99:>+8.1%}{flag}"
+        elif baseline is not None:
+            line += f" {'new':>10}"
+        print(line)
+    return regressions
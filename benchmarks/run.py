@@ -0,0 +1,288 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "processor"))
+sys.path.insert(0, os.path.join(ROOT, "producers"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from harness import bench, load_baseline, report, save_baseline
+from synthetic import SyntheticStream, as_records, encode_payload
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+TRACKED_TICKERS = ("bitcoin", "dogecoin")
+
+
+class SkipBench(Exception):
+    """Benchmark can't run here (missing optional dependency / credentials)."""
+
+
+def _stream(args, **overrides) -> SyntheticStream:
+    options = dict(seed=args.seed, tickers=TRACKED_TICKERS, price_rate=1.0, social_rate=20.0,
+                   duplicate_ratio=args.duplicates)
+    options.update(overrides)
+    return SyntheticStream(**options)
+
+
+# --- Benchmarks ---
+# Each takes the parsed CLI args and returns a list of BenchResult.
+
+def bench_windows(args):
+    from math_utils import SlidingWindow
+    from pane_window import PaneStore
+    from window_store import WindowStore
+
+    ticks = _stream(args).prices(args.n)
+    window = SlidingWindow(window_seconds=300)
+    store = WindowStore(window_seconds=300)
+    panes = PaneStore()
+    for ticker in TRACKED_TICKERS:
+        store.register(ticker)
+        panes.register(ticker)
+
+    return [
+        bench("SlidingWindow.add", lambda t: window.add(t["price_usd"], t["timestamp"]), ticks),
+        bench("SlidingWindow.average+std", lambda _: (window.average(), window.std()), range(args.n)),
+        bench("WindowStore.add", lambda t: store.add(t["ticker"], t["price_usd"], t["timestamp"]), ticks),
+        bench("PaneStore.add", lambda t: panes.add(t["ticker"], t["price_usd"], t["timestamp"]), ticks),
+        bench("PaneStore.multi (1m/5m/15m/1h)", lambda _: panes.multi(TRACKED_TICKERS[0]), range(args.n // 10)),
+    ]
+
+
+def bench_detect_tickers(args):
+    # social_producer.detect_tickers is this matcher, restricted to the tracked
+    # tickers (importing social_producer itself needs Telegram credentials)
+    from ticker_matcher import TickerMatcher
+
+    matcher = TickerMatcher.load(tickers=set(TRACKED_TICKERS))
+    full = TickerMatcher.load()
+    texts = [m["text"] for m in _stream(args).messages(args.n)]
+    return [
+        bench("detect_tickers", matcher.find, texts),
+        bench("detect_tickers (full table)", full.find, texts),
+    ]
+
+
+def _import_processor(load_model: bool = False):
+    """
+    stream_processor (Kafka is only imported by run()). load_model=True for
+    benches that score texts: loads FinBERT (transformers, model download).
+    """
+    try:
+        import stream_processor
+        if load_model:
+            stream_processor.sentiment.load()
+    except Exception as e:   # ImportError, model download...
+        raise SkipBench(f"stream_processor not usable: {e!r}")
+    return stream_processor
+
+
+def bench_handlers(args):
+    sp = _import_processor()
+    sp.init_windows(list(TRACKED_TICKERS))
+    from db import BulkWriter, connect_local, init_schema
+
+    with tempfile.TemporaryDirectory() as tmp:
+        con = connect_local(os.path.join(tmp, "bench.duckdb"))
+        init_schema(con)
+        writer = BulkWriter(con, before_flush=sp.rollups.drain_into)
+
+        records = as_records(_stream(args).events(duration_s=args.n / 22), fmt=args.format)
+        prices = [r for r in records if r.topic != sp.SOCIAL_TOPIC]
+        social = [r for r in records if r.topic == sp.SOCIAL_TOPIC]
+
+        results = [bench("handle_price_record", lambda r: sp.handle_price_record(r, writer), prices)]
+        try:
+            _import_processor(load_model=True)   # social records need FinBERT
+        except SkipBench as e:
+            print(f"[SKIP] handle_social_record: {e}")
+        else:
+            results.append(bench("handle_social_record", lambda r: (sp.handle_social_record(r, writer),
+                                                                    sp.apply_scored_batches(writer)), social))
+            sp.flush_social_batch(writer)
+        writer.close()
+        con.close()
+    return results
+
+
+def bench_codec(args):
+    from message_codec import decode_price, decode_social
+
+    events = _stream(args).events(duration_s=args.n / 21)
+    results = []
+    for fmt in ("json", "binary"):
+        prices = [encode_payload(topic, payload, fmt) for topic, payload in events if topic != "live-social"]
+        social = [encode_payload(topic, payload, fmt) for topic, payload in events if topic == "live-social"]
+        results += [
+            bench(f"decode_price ({fmt})", decode_price, prices),
+            bench(f"decode_social ({fmt})", decode_social, social),
+        ]
+        size = sum(map(len, prices + social)) / max(len(prices) + len(social), 1)
+        print(f"[INFO] {fmt}: {size:.0f} bytes/message on average")
+    return results
+
+
+def bench_compute_and_alert(args):
+    sp = _import_processor()
+    sp.init_windows(list(TRACKED_TICKERS))
+    stream = _stream(args)
+    for tick in stream.prices(2_000):
+        sp.price_windows.add(tick["ticker"], tick["price_usd"], tick["timestamp"])
+    # Flat vibe throughout, so no alert lines are printed while timing
+    for msg in stream.messages(2_000):
+        for ticker in msg["tickers"]:
+            sp.vibe_windows.add(ticker, 0.1, msg["timestamp"])
+
+    tickers = [TRACKED_TICKERS[i % len(TRACKED_TICKERS)] for i in range(args.n)]
+    results = [bench("compute_and_alert", sp.compute_and_alert, tickers)]
+
+    # One loop iteration over many changed tickers: per-ticker calls vs one vectorized pass
+    many = [f"coin{i}" for i in range(1_000)]
+    sp.init_windows(many)
+    for i, ticker in enumerate(many):
+        for j in range(10):
+            sp.price_windows.add(ticker, 1.0 + i + j * 0.01, 1_700_000_000.0 + j)
+            sp.vibe_windows.add(ticker, 0.1, 1_700_000_000.0 + j)
+    reps = range(max(1, args.n // len(many)))
+    results += [
+        bench("compute_and_alert x1000 tickers", lambda _: [sp.compute_and_alert(t) for t in many], reps,
+              items_per_call=len(many)),
+        bench("compute_and_alert_batch (1000 tickers)", lambda _: sp.compute_and_alert_batch(many), reps,
+              items_per_call=len(many)),
+    ]
+    sp.init_windows(list(TRACKED_TICKERS))
+    return results
+
+
+def bench_db_writes(args):
+    from db import BulkWriter, connect_local, init_schema, insert_columns, TABLE_COLUMNS
+
+    stream = _stream(args)
+    ticks = stream.prices(args.n)
+    messages = stream.messages(args.n)
+    batch = 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        con = connect_local(os.path.join(tmp, "bench.duckdb"))
+        init_schema(con)
+
+        price_batches = [
+            [[t["ticker"] for t in chunk], [t["price_usd"] for t in chunk], [t["timestamp"] for t in chunk]]
+            for chunk in (ticks[i:i + batch] for i in range(0, len(ticks), batch))
+        ]
+        social_batches = [
+            [
+                [m["tickers"][0] for m in chunk], [0.5] * len(chunk), [m["text"] for m in chunk],
+                [m["author"] for m in chunk], [m["source"] for m in chunk], [m["timestamp"] for m in chunk],
+            ]
+            for chunk in (messages[i:i + batch] for i in range(0, len(messages), batch))
+        ]
+
+        writer = BulkWriter(con, batch_rows=batch, flush_interval_s=3600)
+        results = [
+            bench("insert_columns prices (500/batch)",
+                  lambda data: insert_columns(con, "price_snapshots", TABLE_COLUMNS["price_snapshots"], data),
+                  price_batches, items_per_call=batch),
+            bench("insert_columns social (500/batch)",
+                  lambda data: insert_columns(con, "social_signals", TABLE_COLUMNS["social_signals"], data),
+                  social_batches, items_per_call=batch),
+            bench("BulkWriter.add_price (incl. flushes)",
+                  lambda t: writer.add_price(t["ticker"], t["price_usd"], t["timestamp"]), ticks),
+        ]
+        writer.close()
+        con.close()
+    return results
+
+
+def bench_api_state(args):
+    from db import BulkWriter, connect_local, init_schema
+    from rollups import backfill_rollups
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "api.duckdb")
+        con = connect_local(path)
+        init_schema(con)
+        writer = BulkWriter(con, batch_rows=5_000)
+        stream = _stream(args, start_ts=time.time() - 3600)
+        for tick in stream.prices(20_000):
+            writer.add_price(tick["ticker"], tick["price_usd"], tick["timestamp"])
+        for msg in stream.messages(50_000):
+            writer.add_social(msg["tickers"][0], 0.3, msg["text"], msg["author"], msg["source"], msg["timestamp"])
+        writer.close()
+        backfill_rollups(con)
+        con.close()
+
+        os.environ["GHOSTMARKET_API_DB"] = path
+        sys.path.insert(0, os.path.join(ROOT, "frontend"))
+        try:
+            import api_server
+        except ImportError as e:
+            raise SkipBench(f"api_server not importable: {e!r}")
+
+        client = api_server.app.test_client()
+        urls = [f"/api/state?ticker={TRACKED_TICKERS[i % 2]}" for i in range(min(args.n, 2_000))]
+
+        def get(url):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+
+        api_server._state_cache.ttl_s = 0   # every request hits the DB
+        uncached = bench("/api/state (uncached)", get, urls, warmup=10)
+        api_server._state_cache.ttl_s = 60
+        cached = bench("/api/state (cached)", get, urls, warmup=10)
+        api_server.close_con()
+    return [uncached, cached]
+
+
+BENCHMARKS = {
+    "windows": bench_windows,
+    "detect_tickers": bench_detect_tickers,
+    "codec": bench_codec,
+    "handlers": bench_handlers,
+    "compute_and_alert": bench_compute_and_alert,
+    "db_writes": bench_db_writes,
+    "api_state": bench_api_state,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GhostMarket benchmarks (synthetic, seeded).")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("-n", type=int, default=20_000, help="operations per benchmark (default: 20000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="duplicate message ratio (default: 0.2)")
+    parser.add_argument("--format", choices=("binary", "json"), default="binary",
+                        help="message encoding fed to the handlers (default: binary)")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"save results as the baseline (default path: {DEFAULT_BASELINE})")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="regression threshold (default: 0.10 = 10%%)")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        try:
+            results.extend(BENCHMARKS[name](args))
+        except SkipBench as e:
+            print(f"[SKIP] {name}: {e}")
+
+    print()
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    regressions = report(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+        print(f"\n[INFO] Baseline saved to {args.save_baseline}")
+    if regressions:
+        print(f"\n[WARN] {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,184 @@
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import NamedTuple
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from message_codec import PriceTick, SocialPost, encode_price, encode_social
+
+# Start prices for the random walk; other tickers start at 1.0
+START_PRICES = {"bitcoin": 62500.0, "dogecoin": 0.15}
+
+# How a ticker gets written in chat, per canonical ticker
+MENTIONS = {
+    "bitcoin": ["bitcoin", "btc", "$btc", "#btc", "btc/usdt", "bitcon", "Bitcoin"],
+    "dogecoin": ["dogecoin", "doge", "$doge", "#doge", "doge/usdt", "dogcoin", "DOGE"],
+}
+
+_BULLISH = ["to the moon 🚀", "breaking out", "send it", "loading up", "new ATH incoming", "whales buying"]
+_BEARISH = ["dumping hard", "rug incoming", "sell before it's too late", "looks weak", "capitulation"]
+_FILLER = ["ser", "wen", "gm", "lfg", "ngl", "this is it", "just saw", "charts say", "honestly", "fr"]
+
+
+class SyntheticRecord(NamedTuple):
+    """Same shape as import_me_to_use_kafka_stuff.KafkaRecord, without needing Kafka."""
+    topic: str
+    partition: int
+    offset: int
+    timestamp: float | None
+    value: bytes
+
+    @property
+    def text(self) -> str:
+        return self.value.decode("utf-8")
+
+
+class SyntheticStream:
+    """
+    Seeded generator of price ticks and Telegram-like messages, in the same
+    JSON shapes the producers send. Same seed -> same stream.
+
+    Event times follow a Poisson process at the given rates (events per
+    simulated second); `duplicate_ratio` of messages repeat an earlier text
+    verbatim, like copy-pasted shill posts.
+
+    Usage:
+        stream = SyntheticStream(seed=1, social_rate=50, duplicate_ratio=0.3)
+        for topic, payload in stream.events(duration_s=600): ...
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        tickers: tuple[str, ...] = ("bitcoin", "dogecoin"),
+        price_rate: float = 1.0,
+        social_rate: float = 10.0,
+        duplicate_ratio: float = 0.2,
+        start_ts: float | None = None,
+    ):
+        """
+        Args:
+            price_rate: Price ticks per second, per ticker.
+            social_rate: Messages per second, all tickers together.
+            duplicate_ratio: Fraction of messages that repeat an earlier text.
+            start_ts: Timestamp of the first event (default: now).
+        """
+        self.rng = random.Random(seed)
+        self.tickers = tickers
+        self.price_rate = price_rate
+        self.social_rate = social_rate
+        self.duplicate_ratio = duplicate_ratio
+        self.start_ts = time.time() if start_ts is None else start_ts
+        self._prices = {t: START_PRICES.get(t, 1.0) for t in tickers}
+        self._texts: list[tuple[str, list[str]]] = []
+
+    # --- Single items ---
+
+    def price_tick(self, ticker: str, timestamp: float) -> dict:
+        """Next price of `ticker` (geometric random walk, ~0.1% per tick)."""
+        price = self._prices[ticker] * math.exp(self.rng.gauss(0, 0.001))
+        self._prices[ticker] = price
+        return {"ticker": ticker, "price_usd": round(price, 8), "timestamp": timestamp}
+
+    def message(self, timestamp: float) -> dict:
+        """One Telegram-like social message mentioning one or two tickers."""
+        if self._texts and self.rng.random() < self.duplicate_ratio:
+            text, tickers = self.rng.choice(self._texts)
+        else:
+            text, tickers = self._new_text()
+            self._texts.append((text, tickers))
+        return {
+            "source": "telegram",
+            "timestamp": timestamp,
+            "text": text,
+            "tickers": tickers,
+            "author": str(self.rng.randint(1, 5000)),
+        }
+
+    def _new_text(self) -> tuple[str, list[str]]:
+        rng = self.rng
+        tickers = rng.sample(self.tickers, k=2 if len(self.tickers) > 1 and rng.random() < 0.1 else 1)
+        mood = _BULLISH if rng.random() < 0.6 else _BEARISH
+        words = [rng.choice(_FILLER)]
+        for ticker in tickers:
+            words.append(rng.choice(MENTIONS.get(ticker, [ticker])))
+        words.append(rng.choice(mood))
+        words += rng.choices(_FILLER, k=rng.randint(0, 12))
+        return " ".join(words), tickers
+
+    # --- Streams ---
+
+    def prices(self, n: int) -> list[dict]:
+        """`n` price ticks round-robin over the tickers, 1/price_rate apart."""
+        step = 1.0 / self.price_rate
+        return [
+            self.price_tick(self.tickers[i % len(self.tickers)], self.start_ts + (i // len(self.tickers)) * step)
+            for i in range(n)
+        ]
+
+    def messages(self, n: int) -> list[dict]:
+        """`n` social messages with Poisson arrival times."""
+        ts = self.start_ts
+        out = []
+        for _ in range(n):
+            ts += self.rng.expovariate(self.social_rate)
+            out.append(self.message(ts))
+        return out
+
+    def events(self, duration_s: float, price_topics: bool = True) -> list[tuple[str, dict]]:
+        """
+        Every price tick and message over `duration_s` simulated seconds, as
+        (topic, payload) in time order. Price topics are named after tickers,
+        messages go to "live-social".
+        """
+        arrivals = []
+        for ticker in self.tickers:
+            ts = self.start_ts
+            while price_topics:
+                ts += self.rng.expovariate(self.price_rate)
+                if ts - self.start_ts > duration_s:
+                    break
+                arrivals.append((ts, ticker))
+        ts = self.start_ts
+        while True:
+            ts += self.rng.expovariate(self.social_rate)
+            if ts - self.start_ts > duration_s:
+                break
+            arrivals.append((ts, "live-social"))
+        arrivals.sort()
+
+        return [
+            (topic, self.message(ts) if topic == "live-social" else self.price_tick(topic, ts))
+            for ts, topic in arrivals
+        ]
+
+
+def encode_payload(topic: str, payload: dict, fmt: str = "binary") -> bytes:
+    """One generated payload as the producers would send it (message_codec, binary or json)."""
+    if topic == "live-social":
+        post = SocialPost(payload["text"], payload["tickers"], payload["timestamp"], payload["author"], payload["source"])
+        return encode_social(post, fmt)
+    return encode_price(PriceTick(payload["ticker"], payload["price_usd"], payload["timestamp"]), fmt)
+
+
+def as_records(events: list[tuple[str, dict]], fmt: str = "binary") -> list[SyntheticRecord]:
+    """(topic, payload) pairs -> Kafka-like records with encoded values and per-topic offsets."""
+    offsets: dict[str, int] = {}
+    records = []
+    for topic, payload in events:
+        offset = offsets[topic] = offsets.get(topic, -1) + 1
+        records.append(SyntheticRecord(topic, 0, offset, payload["timestamp"], encode_payload(topic, payload, fmt)))
+    return records
+
+
+# --- Run standalone to eyeball a sample ---
+if __name__ == "__main__":
+    stream = SyntheticStream(seed=7, social_rate=5, duplicate_ratio=0.3)
+    events = stream.events(duration_s=10)
+    for topic, payload in events[:8]:
+        print(f"{topic:12} {json.dumps(payload)[:110]}")
+    texts = [p["text"] for t, p in events if t == "live-social"]
+    print(f"{len(events)} events, {len(texts)} messages, {1 - len(set(texts)) / max(len(texts), 1):.0%} duplicates")
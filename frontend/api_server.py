@@ -1,27 +1,160 @@
+import atexit
+import json
 import os
+import queue
+import sys
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import duckdb
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "processor"))
+from rollups import bucket_start, estimate_distinct
+
 load_dotenv()
 
 TOKEN = os.getenv("MOTHERDUCK_TOKEN")
-if not TOKEN:
-    raise RuntimeError("Missing MOTHERDUCK_TOKEN in .env")
+# Serve from a local DuckDB file instead of MotherDuck (offline dev, benchmarks)
+LOCAL_DB = os.getenv("GHOSTMARKET_API_DB", "")
+if not TOKEN and not LOCAL_DB:
+    raise RuntimeError("Missing MOTHERDUCK_TOKEN in .env (or set GHOSTMARKET_API_DB to a local DuckDB file)")
 
 DB_NAME = os.getenv("GHOSTMARKET_DB", "ghostmarket")
+CACHE_TTL_S = float(os.getenv("API_CACHE_TTL", "1.0"))   # /api/state response cache
+STREAM_POLL_S = float(os.getenv("API_STREAM_POLL", "1.0"))  # live feed DB poll interval
+STREAM_HEARTBEAT_S = 15.0
 
 app = Flask(__name__)
 CORS(app)
 
-def get_con():
+# --- Shared connection ---
+# One DB connection for the whole process; every request works on its
+# own cursor (DuckDB cursors are independent and safe to use across threads).
+_con: duckdb.DuckDBPyConnection | None = None
+_con_lock = threading.Lock()
+# Open cursors per connection (by id): a connection replaced after an error
+# is only closed once the requests still using it are done
+_con_users: dict[int, int] = {}
+
+
+def _connect() -> duckdb.DuckDBPyConnection:
+    if LOCAL_DB:
+        return duckdb.connect(LOCAL_DB, read_only=True)
     con = duckdb.connect(f"md:?motherduck_token={TOKEN}")
     con.execute(f"USE {DB_NAME}")
     return con
 
+
+def get_con() -> duckdb.DuckDBPyConnection:
+    global _con
+    if _con is None:
+        with _con_lock:
+            if _con is None:
+                _con = _connect()
+    return _con
+
+
+@atexit.register
+def close_con() -> None:
+    global _con
+    with _con_lock:
+        if _con is not None:
+            _con_users.pop(id(_con), None)
+            _con.close()
+            _con = None
+
+
+@contextmanager
+def db_cursor():
+    """Per-request cursor on the shared connection, always closed afterwards."""
+    global _con
+    with _con_lock:
+        if _con is None:
+            _con = _connect()
+        con = _con
+        _con_users[id(con)] = _con_users.get(id(con), 0) + 1
+    try:
+        cur = con.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+    except duckdb.ConnectionException:
+        # Connection is broken (e.g. MotherDuck dropped it): reconnect next
+        # time, without closing it under requests that are still running
+        with _con_lock:
+            if _con is con:
+                _con = None
+        raise
+    finally:
+        with _con_lock:
+            users = _con_users.get(id(con), 1) - 1
+            if users or con is _con:
+                _con_users[id(con)] = users
+            else:   # replaced, and this was its last request
+                _con_users.pop(id(con), None)
+                con.close()
+
+
+# --- Response cache ---
+class ResponseCache:
+    """
+    Tiny TTL cache with single-flight: while one request computes a key,
+    concurrent requests for the same key wait for that result instead of
+    querying the DB themselves.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int = 1024):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: dict[tuple, tuple[float, object]] = {}   # key -> (expires_at, value)
+        self._inflight: dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry
+        return None
+
+    def get_or_compute(self, key: tuple, compute):
+        while True:
+            with self._lock:
+                entry = self._fresh(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[1]
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Someone else is computing this key: wait, then re-check
+            # (if they failed, the loop makes this request the new leader)
+            event.wait()
+
+        try:
+            value = compute()
+            with self._lock:
+                if len(self._entries) >= self.max_entries:
+                    now = time.monotonic()
+                    self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+                self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+
+_state_cache = ResponseCache(ttl_s=CACHE_TTL_S)
+
 def sentiment_label(v: float) -> str:
     if v >= 0.35: return "Bullish"
     if v >= 0.10: return "Slight +"
@@ -34,27 +167,68 @@ def fmt_time(ts: float) -> str:
     except Exception:
         return ""
 
+def vibe_item(text: str, score: float | None, ts: float, source: str | None) -> dict:
+    score = float(score) if score is not None else 0.0
+    return {
+        "message": text,
+        "sentimentValue": score,
+        "sentimentLabel": sentiment_label(score),
+        "timeLabel": fmt_time(ts),
+        "source": source or "unknown",
+    }
+
+def signal_item(delta_price, delta_vibe, hype_momentum, alert) -> dict:
+    hype_momentum = float(hype_momentum) if hype_momentum is not None else 0.0
+    return {
+        "alert": alert,
+        "deltaPrice": round(float(delta_price or 0.0), 4),
+        "deltaVibe": round(float(delta_vibe or 0.0), 4),
+        "hypeMomentum": round(hype_momentum, 1),
+        "signalUp": hype_momentum > 1.0,
+    }
+
 @app.get("/api/state")
 def api_state():
     ticker = request.args.get("ticker", "dogecoin").lower()
     limit_price = int(request.args.get("price_limit", "60"))
     limit_vibe = int(request.args.get("vibe_limit", "50"))
+
+    # N dashboard tabs polling the same ticker share one DB round per TTL
+    state = _state_cache.get_or_compute(
+        (ticker, limit_price, limit_vibe),
+        lambda: build_state(ticker, limit_price, limit_vibe),
+    )
+    return jsonify(state)
+
+
+def build_state(ticker: str, limit_price: int, limit_vibe: int) -> dict:
+    """Query the DB and assemble the dashboard state for one ticker."""
+    with db_cursor() as con:
+        return _query_state(con, ticker, limit_price, limit_vibe)
+
+
+def _query_state(con, ticker: str, limit_price: int, limit_vibe: int) -> dict:
     window_s = 9999999 # int(request.args.get("window_s", "300"))
 
-    con = get_con()
     now = time.time()
     cutoff = now - window_s
 
+    # --- snapshot marks: rows up to these rowids are in this state, /api/stream sends the rest ---
+    price_mark, vibe_mark = con.execute(
+        "SELECT (SELECT MAX(rowid) FROM price_snapshots), (SELECT MAX(rowid) FROM social_signals)"
+    ).fetchone()
+    marks = {"price": -1 if price_mark is None else price_mark, "vibe": -1 if vibe_mark is None else vibe_mark}
+
     # --- price series ---
     price_rows = con.execute(
         """
         SELECT timestamp, price_usd
         FROM price_snapshots
-        WHERE ticker = ?
+        WHERE ticker = ? AND rowid <= ?
         ORDER BY timestamp DESC
         LIMIT ?
         """,
-        [ticker, limit_price],
+        [ticker, marks["price"], limit_price],
     ).fetchall()
 
     price_rows = list(reversed(price_rows))
@@ -66,43 +240,32 @@ def api_state():
         """
         SELECT text, vibe_score, timestamp, source
         FROM social_signals
-        WHERE ticker = ?
+        WHERE ticker = ? AND rowid <= ?
         ORDER BY timestamp DESC
         LIMIT ?
         """,
-        [ticker, limit_vibe],
+        [ticker, marks["vibe"], limit_vibe],
     ).fetchall()
 
-    vibe_feed = []
-    for text, score, ts, source in vibe_rows:
-        score = float(score) if score is not None else 0.0
-        vibe_feed.append(
-            {
-                "message": text,
-                "sentimentValue": score,
-                "sentimentLabel": sentiment_label(score),
-                "timeLabel": fmt_time(ts),
-                "source": source or "unknown",
-            }
-        )
+    vibe_feed = [vibe_item(text, score, ts, source) for text, score, ts, source in vibe_rows]
 
-    # --- stats over last window ---
+    # --- stats over last window (from per-minute rollups, not raw rows) ---
     stats_row = con.execute(
         """
         SELECT
-            AVG(vibe_score) AS avg_sent,
-            COUNT(*) AS n_events,
-            COUNT(DISTINCT source) AS n_sources
-        FROM social_signals
+            SUM(vibe_sum) AS sum_sent,
+            SUM(n) AS n_events,
+            bit_or(source_sketch) AS sources_sketch
+        FROM social_rollup_1m
         WHERE ticker = ?
-          AND timestamp >= ?
+          AND minute >= ?
         """,
-        [ticker, cutoff],
+        [ticker, bucket_start(cutoff)],
     ).fetchone()
 
-    avg_sent = float(stats_row[0]) if stats_row and stats_row[0] is not None else 0.0
     n_events = int(stats_row[1]) if stats_row and stats_row[1] is not None else 0
-    n_sources = int(stats_row[2]) if stats_row and stats_row[2] is not None else 0
+    avg_sent = float(stats_row[0]) / n_events if n_events and stats_row[0] is not None else 0.0
+    n_sources = estimate_distinct(stats_row[2]) if stats_row else 0
 
     # --- latest decoupling signal ---
     sig = con.execute(
@@ -131,6 +294,25 @@ def api_state():
 
     signal_up = (hype_momentum > 1.0)  # matches check_alert intent
 
+    # --- latest 1m/5m/15m/1h aggregates per stream (written by the processor's panes) ---
+    window_rows = con.execute(
+        """
+        SELECT stream, resolution, watermark, n, mean, std, min, max
+        FROM window_aggregates
+        WHERE ticker = ?
+        QUALIFY row_number() OVER (PARTITION BY stream, resolution ORDER BY recorded_at DESC) = 1
+        """,
+        [ticker],
+    ).fetchall()
+
+    windows = {"price": {}, "vibe": {}}
+    for stream, resolution, watermark, n, mean, std, lo, hi in window_rows:
+        windows.setdefault(stream, {})[resolution] = {
+            "asOf": fmt_time(watermark),
+            "count": int(n),
+            **{k: None if v is None else float(v) for k, v in (("mean", mean), ("std", std), ("min", lo), ("max", hi))},
+        }
+
     state = {
         "ticker": {
             "key": ticker,
@@ -141,6 +323,7 @@ def api_state():
             "avgSentiment": round(avg_sent, 2),
             "signalUp": bool(signal_up),
             "sources": n_sources,
+            "sourcesEstimated": True,   # from the rollup sketch, see rollups.py
             "eventsCount": n_events,
             "eventsLabel": "imminent" if alert else "demo",
         },
@@ -157,9 +340,244 @@ def api_state():
             "hypeMomentum": round(hype_momentum, 1),
             "n": n_events,
         },
+        "windows": windows,   # {"price": {"1m": {...}, ...}, "vibe": {...}}
+        "marks": marks,   # pass to /api/stream as price_mark / vibe_mark
     }
 
-    return jsonify(state)
+    return state
+
+# --- Live updates (Server-Sent Events) ---
+class LiveFeed:
+    """
+    One background thread polls the DB for rows newer than what it has already
+    pushed, only for tickers that currently have subscribers, and fans each new
+    event out to every subscriber's queue. DB load is one poll per ticker per
+    STREAM_POLL_S no matter how many dashboards are connected.
+
+    "Newer" means inserted later (rowid; the tables are append-only, see
+    StagingSync), not a later event timestamp: rows are written late and out
+    of event-time order, so a timestamp cursor would skip some of them.
+
+    A subscriber can start from the rowid marks of its /api/state snapshot:
+    rows between those and the feed's marks are sent to it alone on the
+    next poll, and rows it already has are never sent to it again.
+
+    Events: ("price", {"t", "p"}), ("vibe", vibe_item), ("signal", {...}).
+    """
+
+    CATCH_UP_ROWS = 500   # per table; a client only shows the latest few dozen anyway
+
+    def __init__(self, poll_s: float = STREAM_POLL_S, queue_size: int = 1000):
+        self.poll_s = poll_s
+        self.queue_size = queue_size
+        # Per ticker: queue -> snapshot marks it starts after ({"price", "vibe"} rowids, None = now)
+        self._subscribers: dict[str, dict[queue.Queue, dict | None]] = {}
+        # Per ticker: queues that haven't been caught up by a poll yet
+        self._joining: dict[str, set[queue.Queue]] = {}
+        # Per ticker: last pushed price rowid, vibe rowid and signal recorded_at
+        self._marks: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, ticker: str, since: dict | None = None) -> queue.Queue:
+        """
+        Args:
+            ticker: Ticker to follow.
+            since: {"price": rowid, "vibe": rowid} marks of the client's
+                snapshot (see /api/state), or None to start from now.
+        """
+        q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(ticker, {})[q] = since
+            self._joining.setdefault(ticker, set()).add(q)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, ticker: str, q: queue.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(ticker)
+            if subscribers is None:
+                return
+            subscribers.pop(q, None)
+            self._joining.get(ticker, set()).discard(q)
+            if not subscribers:
+                # Nobody left: stop polling and forget marks (next subscriber starts fresh)
+                del self._subscribers[ticker]
+                self._joining.pop(ticker, None)
+                self._marks.pop(ticker, None)
+
+    @staticmethod
+    def _put(q: queue.Queue, event: str, data: dict) -> None:
+        try:
+            q.put_nowait((event, data))
+        except queue.Full:
+            # Slow client: drop its oldest event rather than block everyone
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            q.put_nowait((event, data))
+
+    def _publish(self, subscribers: dict, event: str, data: dict, kind: str | None = None, rowid: int = 0) -> None:
+        """Send to every subscriber, except those whose snapshot already has row `rowid` of `kind`."""
+        for q, since in subscribers.items():
+            if kind is None or since is None or rowid > since[kind]:
+                self._put(q, event, data)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                tickers = list(self._subscribers)
+            for ticker in tickers:
+                try:
+                    with db_cursor() as cur:
+                        self._poll_ticker(cur, ticker)
+                except duckdb.Error as e:
+                    print(f"[ERROR] live feed poll failed for {ticker}: {e}")
+            time.sleep(self.poll_s)
+
+    def _poll_ticker(self, cur, ticker: str) -> None:
+        with self._lock:
+            current = self._marks.get(ticker)
+            subscribers = dict(self._subscribers.get(ticker, {}))
+            joining = self._joining.pop(ticker, set()) & subscribers.keys()
+        if not subscribers:
+            return
+
+        if current is None:
+            # New feed: start at the oldest snapshot among its subscribers, or at "now"
+            price_mark, vibe_mark = cur.execute(
+                "SELECT (SELECT MAX(rowid) FROM price_snapshots), (SELECT MAX(rowid) FROM social_signals)"
+            ).fetchone()
+            now_marks = {"price": -1 if price_mark is None else price_mark, "vibe": -1 if vibe_mark is None else vibe_mark}
+            subscribers = {q: now_marks if since is None else since for q, since in subscribers.items()}
+            marks = {
+                "price": min(since["price"] for since in subscribers.values()),
+                "vibe": min(since["vibe"] for since in subscribers.values()),
+                "signal": None,
+            }
+        else:
+            marks = dict(current)
+            for q in joining:
+                self._catch_up(cur, ticker, q, subscribers[q], marks)
+
+        for rowid, ts, price in cur.execute(
+            """
+            SELECT rowid, timestamp, price_usd
+            FROM price_snapshots
+            WHERE ticker = ? AND rowid > ?
+            ORDER BY rowid
+            LIMIT 500
+            """,
+            [ticker, marks["price"]],
+        ).fetchall():
+            self._publish(subscribers, "price", {"t": fmt_time(ts), "p": float(price)}, "price", rowid)
+            marks["price"] = rowid
+
+        for rowid, text, score, ts, source in cur.execute(
+            """
+            SELECT rowid, text, vibe_score, timestamp, source
+            FROM social_signals
+            WHERE ticker = ? AND rowid > ?
+            ORDER BY rowid
+            LIMIT 500
+            """,
+            [ticker, marks["vibe"]],
+        ).fetchall():
+            self._publish(subscribers, "vibe", vibe_item(text, score, ts, source), "vibe", rowid)
+            marks["vibe"] = rowid
+
+        sig = cur.execute(
+            """
+            SELECT recorded_at, delta_price, delta_vibe, hype_momentum, alert
+            FROM decoupling_signals
+            WHERE ticker = ?
+            ORDER BY recorded_at DESC
+            LIMIT 1
+            """,
+            [ticker],
+        ).fetchone()
+        if sig and sig[0] != marks["signal"]:
+            self._publish(subscribers, "signal", signal_item(*sig[1:]))
+            marks["signal"] = sig[0]
+        elif sig:
+            for q in joining:   # a joining client may have an older signal than the feed
+                self._put(q, "signal", signal_item(*sig[1:]))
+
+        self._store_marks(ticker, current, marks)
+
+    def _catch_up(self, cur, ticker: str, q: queue.Queue, since: dict | None, marks: dict) -> None:
+        """Send `q` the rows between its snapshot marks and the feed's (the latest CATCH_UP_ROWS of each)."""
+        if since is None:
+            return
+        if since["price"] < marks["price"]:
+            rows = cur.execute(
+                """
+                SELECT timestamp, price_usd
+                FROM price_snapshots
+                WHERE ticker = ? AND rowid > ? AND rowid <= ?
+                ORDER BY rowid DESC
+                LIMIT ?
+                """,
+                [ticker, since["price"], marks["price"], self.CATCH_UP_ROWS],
+            ).fetchall()
+            for ts, price in reversed(rows):
+                self._put(q, "price", {"t": fmt_time(ts), "p": float(price)})
+        if since["vibe"] < marks["vibe"]:
+            rows = cur.execute(
+                """
+                SELECT text, vibe_score, timestamp, source
+                FROM social_signals
+                WHERE ticker = ? AND rowid > ? AND rowid <= ?
+                ORDER BY rowid DESC
+                LIMIT ?
+                """,
+                [ticker, since["vibe"], marks["vibe"], self.CATCH_UP_ROWS],
+            ).fetchall()
+            for text, score, ts, source in reversed(rows):
+                self._put(q, "vibe", vibe_item(text, score, ts, source))
+
+    def _store_marks(self, ticker: str, expected: dict | None, marks: dict) -> None:
+        """Save `ticker`'s marks, unless it was unsubscribed (or re-subscribed) meanwhile."""
+        with self._lock:
+            if ticker in self._subscribers and self._marks.get(ticker) is expected:
+                self._marks[ticker] = marks
+
+
+_live_feed = LiveFeed()
+
+
+@app.get("/api/stream")
+def api_stream():
+    """Server-Sent Events: new price ticks, vibe messages and signal changes for one ticker."""
+    ticker = request.args.get("ticker", "dogecoin").lower()
+    # Marks of the client's /api/state snapshot: the stream starts right after it
+    price_mark = request.args.get("price_mark", type=int)
+    vibe_mark = request.args.get("vibe_mark", type=int)
+    since = None if price_mark is None or vibe_mark is None else {"price": price_mark, "vibe": vibe_mark}
+    q = _live_feed.subscribe(ticker, since)
+
+    def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event, data = q.get(timeout=STREAM_HEARTBEAT_S)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            _live_feed.unsubscribe(ticker, q)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=8000, debug=True)
+    app.run(host="127.0.0.1", port=8000, debug=True, threaded=True)
@@ -23,7 +23,7 @@ export default function VibeFeedCard({ data }) {
 
 			<div className="mt-5 grid grid-cols-1 gap-3 sm:grid-cols-3">
 				<StatCard title="Avg Sentiment" value={s.avgSentiment} sub="Rolling window" />
-				<StatCard title="Sources" value={s.sources} sub="Platforms scanned" />
+				<StatCard title="Sources" value={s.sourcesEstimated ? `~${s.sources}` : s.sources} sub="Platforms scanned" />
 				<StatCard title="Events" value={s.eventsCount} sub={`Signal: ${s.eventsLabel}`} />
 			</div>
 
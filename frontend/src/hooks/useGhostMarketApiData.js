@@ -7,46 +7,100 @@ const TICKERS = [
 ]
 
 const API_BASE = "http://127.0.0.1:8000"
+const MAX_PRICE_POINTS = 60
+const MAX_VIBE_ITEMS = 50
 
 export default function useGhostMarketApiData() {
 	const [tickerKey, setTickerKey] = useState("dogecoin")
 	const [state, setState] = useState(null)
 	const [bump, setBump] = useState(0)
 
-	async function fetchState() {
-		const res = await fetch(`${API_BASE}/api/state?ticker=${encodeURIComponent(tickerKey)}`)
+	async function fetchState(key) {
+		const res = await fetch(`${API_BASE}/api/state?ticker=${encodeURIComponent(key)}`)
 		if (!res.ok) throw new Error(`API error: ${res.status}`)
 		const data = await res.json()
 
 		// keep your UI’s ticker dropdown object stable
-		const t = TICKERS.find((x) => x.key === tickerKey) ?? TICKERS[0]
-		data.ticker = t
-
-		setState(data)
+		data.ticker = TICKERS.find((x) => x.key === key) ?? TICKERS[0]
+		return data
 	}
 
 	useEffect(() => {
-		fetchState().catch((e) => {
-			console.error(e)
-		})
-		// eslint-disable-next-line react-hooks/exhaustive-deps
+		let cancelled = false // a slow response for the previous ticker must not land
+		fetchState(tickerKey)
+			.then((data) => {
+				if (!cancelled) setState(data)
+			})
+			.catch((e) => {
+				console.error(e)
+			})
+		return () => {
+			cancelled = true
+		}
 	}, [tickerKey, bump])
 
+	// live updates: the stream starts right after the snapshot's rows (its rowid marks)
+	const marks = state?.ticker.key === tickerKey ? state.marks : null
+	const priceMark = marks?.price
+	const vibeMark = marks?.vibe
+
+	useEffect(() => {
+		if (priceMark == null || vibeMark == null) return // wait for this ticker's snapshot
+
+		const params = new URLSearchParams({ ticker: tickerKey, price_mark: priceMark, vibe_mark: vibeMark })
+		const source = new EventSource(`${API_BASE}/api/stream?${params}`)
+
+		// only ever merge into this ticker's state
+		const update = (fn) => setState((prev) => (prev && prev.ticker.key === tickerKey ? fn(prev) : prev))
+
+		source.addEventListener("price", (e) => {
+			const point = JSON.parse(e.data)
+			update((prev) => ({
+				...prev,
+				price: { ...prev.price, last: point.p, series: [...prev.price.series, point].slice(-MAX_PRICE_POINTS) },
+			}))
+		})
+
+		source.addEventListener("vibe", (e) => {
+			const item = JSON.parse(e.data)
+			update((prev) => ({ ...prev, vibeFeed: [item, ...prev.vibeFeed].slice(0, MAX_VIBE_ITEMS) }))
+		})
+
+		source.addEventListener("signal", (e) => {
+			const { signalUp, ...signal } = JSON.parse(e.data)
+			update((prev) => ({
+				...prev,
+				signal: { ...prev.signal, ...signal },
+				stats: { ...prev.stats, signalUp, eventsLabel: signal.alert ? "imminent" : "demo" },
+			}))
+		})
+
+		source.onerror = (e) => {
+			// EventSource reconnects on its own (server sends retry: 3000)
+			console.error(e)
+		}
+
+		return () => source.close()
+	}, [tickerKey, priceMark, vibeMark])
+
 	function refresh() {
 		setBump((x) => x + 1)
 	}
 
 	function setTicker(nextKey) {
+		if (nextKey !== tickerKey) setState(null) // don't show (or merge into) the previous ticker
 		setTickerKey(nextKey)
 	}
 
 	// provide a fallback shape so components don’t crash before first fetch
 	const safeState = state ?? {
-		ticker: TICKERS[0],
-		stats: { avgSentiment: 0, signalUp: false, sources: 0, eventsCount: 0, eventsLabel: "demo" },
+		ticker: TICKERS.find((x) => x.key === tickerKey) ?? TICKERS[0],
+		stats: { avgSentiment: 0, signalUp: false, sources: 0, sourcesEstimated: false, eventsCount: 0, eventsLabel: "demo" },
 		price: { last: 0, changePct: 0, series: [] },
 		vibeFeed: [],
 		signal: { alert: null, deltaPrice: 0, deltaVibe: 0, hypeMomentum: 0, n: 0 },
+		windows: { price: {}, vibe: {} },
+		marks: null,
 	}
 
 	return { state: safeState, refresh, setTicker, tickers: TICKERS }
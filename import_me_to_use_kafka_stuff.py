@@ -5,6 +5,15 @@ Goal:
 - Friend can import this file and call:
     send_string_to_kafka_topic("bitcoin", "hello")
     receive_one_content_from_kafka_topic("bitcoin")
+- Hot producer paths should use the non-blocking send and flush once at shutdown:
+    future = send_string_to_kafka_topic_async("bitcoin", "hello")
+    ...
+    flush_producer()
+- Binary payloads (message_codec) go through send_bytes_to_kafka_topic_async.
+- Long-running consumers (the stream processor) should use PersistentConsumer:
+    with PersistentConsumer(["bitcoin", "live-social"]) as consumer:
+        for record in consumer.consume(max_messages=1000, timeout_s=1.0):
+            ...
 
 Notes:
 - Topic partition count is configured on the Kafka cluster (not enforced here).
@@ -13,9 +22,12 @@ Notes:
 """
 
 import os
+import time
+from concurrent.futures import Future
 from pathlib import Path
+from typing import Iterator, NamedTuple
 from dotenv import load_dotenv
-from confluent_kafka import Producer, Consumer, KafkaException
+from confluent_kafka import Producer, Consumer, KafkaError, KafkaException, TopicPartition
 
 # Load .env from current working directory (typical usage)
 load_dotenv()
@@ -46,8 +58,41 @@ _BASE_CONFIG = {
     "ssl.key.location": str(_KEY),
 }
 
+# Producer batching knobs (librdkafka). Defaults favour throughput over the
+# old flush-per-message behaviour; override via .env if needed.
+PRODUCER_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", "5"))
+PRODUCER_BATCH_SIZE = int(os.getenv("KAFKA_BATCH_SIZE", "65536"))       # bytes per partition batch
+PRODUCER_COMPRESSION = os.getenv("KAFKA_COMPRESSION", "lz4")            # none | gzip | snappy | lz4 | zstd
+
+
+def _producer_config(linger_ms: int, batch_size: int, compression: str) -> dict:
+    config = dict(_BASE_CONFIG)
+    config.update(
+        {
+            "linger.ms": linger_ms,
+            "batch.size": batch_size,
+            "compression.type": compression,
+        }
+    )
+    return config
+
+
 # Producer can be reused; keep it module-level for simplicity.
-_PRODUCER = Producer(_BASE_CONFIG)
+_PRODUCER = Producer(_producer_config(PRODUCER_LINGER_MS, PRODUCER_BATCH_SIZE, PRODUCER_COMPRESSION))
+
+
+def configure_producer(
+    linger_ms: int = PRODUCER_LINGER_MS,
+    batch_size: int = PRODUCER_BATCH_SIZE,
+    compression: str = PRODUCER_COMPRESSION,
+) -> None:
+    """
+    Rebuild the shared producer with different batching settings.
+    Anything still queued on the old producer is flushed first.
+    """
+    global _PRODUCER
+    _PRODUCER.flush(10.0)
+    _PRODUCER = Producer(_producer_config(linger_ms, batch_size, compression))
 
 
 def _validate_topic(topic_name: str) -> None:
@@ -57,34 +102,104 @@ def _validate_topic(topic_name: str) -> None:
         )
 
 
-def send_string_to_kafka_topic(topic_name: str, content: str, flush_timeout_s: float = 5.0) -> None:
+def send_bytes_to_kafka_topic_async(
+    topic_name: str,
+    content: bytes,
+    on_delivery=None,
+    key: str | None = None,
+) -> Future:
     """
-    Sends one UTF-8 string message to `topic_name`.
+    Queues one raw bytes message (e.g. a message_codec payload) for `topic_name`
+    and returns immediately, unless the local producer queue is full: then it
+    waits, serving delivery callbacks, until there is room. From asyncio code,
+    call it on a thread (run_in_executor), never on the event loop.
 
-    flush_timeout_s:
-      how long to wait for delivery (default 5s). If delivery doesn't complete in time,
-      we raise an error so the caller knows it didn't go through reliably.
+    Returns a concurrent.futures.Future that resolves to (topic, partition, offset)
+    once the broker acknowledges the message, or fails with KafkaException.
+    Delivery callbacks run whenever the producer is polled/flushed, i.e. on later
+    sends or on flush_producer().
+
+    on_delivery:
+      optional extra callback(err, msg), same signature as confluent_kafka's.
+    key:
+      optional message key; messages with the same key land on the same
+      partition, so e.g. keying by ticker keeps each ticker's messages in order.
     """
     _validate_topic(topic_name)
 
-    delivery_err = {"err": None}
+    future: Future = Future()
 
     def delivery_report(err, msg):
         # Callback is invoked from producer.poll()/flush()
+        if on_delivery is not None:
+            on_delivery(err, msg)
         if err is not None:
-            delivery_err["err"] = err
+            print(f"[ERROR] Delivery to {topic_name} failed: {err}")
+            future.set_exception(KafkaException(err))
         else:
+            future.set_result((msg.topic(), msg.partition(), msg.offset()))
+
+    while True:
+        try:
+            _PRODUCER.produce(
+                topic_name,
+                value=content,
+                key=key.encode("utf-8") if key is not None else None,
+                callback=delivery_report,
+            )
+            break
+        except BufferError:
+            # Local queue is full: serve delivery callbacks to make room, then retry
+            _PRODUCER.poll(0.1)
+
+    # Serve callbacks of earlier sends without blocking
+    _PRODUCER.poll(0)
+    return future
+
+
+def send_string_to_kafka_topic_async(
+    topic_name: str,
+    content: str,
+    on_delivery=None,
+    key: str | None = None,
+) -> Future:
+    """Queues one UTF-8 string message; see send_bytes_to_kafka_topic_async."""
+    return send_bytes_to_kafka_topic_async(topic_name, content.encode("utf-8"), on_delivery, key)
+
+
+def flush_producer(timeout_s: float = 10.0) -> int:
+    """
+    Wait up to `timeout_s` for every queued message to be delivered.
+    Call this at shutdown (or at the end of a burst) when using the async send.
+    Returns the number of messages still undelivered (0 means all delivered).
+    """
+    remaining = _PRODUCER.flush(timeout_s)
+    if remaining != 0:
+        print(f"[WARN] {remaining} Kafka message(s) still undelivered after {timeout_s}s")
+    return remaining
+
+
+def send_string_to_kafka_topic(topic_name: str, content: str, flush_timeout_s: float = 5.0) -> None:
+    """
+    Sends one UTF-8 string message to `topic_name` and blocks until it is delivered.
+
+    flush_timeout_s:
+      how long to wait for delivery (default 5s). If delivery doesn't complete in time,
+      we raise an error so the caller knows it didn't go through reliably.
+    """
+
+    def delivery_report(err, msg):
+        if err is None:
             # Keep prints minimal; comment out if you want it silent.
             print(f"Delivered to {msg.topic()} [{msg.partition()}] @ offset {msg.offset()}")
 
-    _PRODUCER.produce(topic_name, value=content.encode("utf-8"), callback=delivery_report)
+    future = send_string_to_kafka_topic_async(topic_name, content, on_delivery=delivery_report)
 
     # Serve callbacks + ensure delivery
     remaining = _PRODUCER.flush(flush_timeout_s)
-    if remaining != 0:
+    if remaining != 0 or not future.done():
         raise TimeoutError(f"Kafka delivery not confirmed after {flush_timeout_s}s (remaining={remaining}).")
-    if delivery_err["err"] is not None:
-        raise KafkaException(delivery_err["err"])
+    future.result()  # re-raises the KafkaException from the delivery callback, if any
 
 
 def receive_one_content_from_kafka_topic(
@@ -133,3 +248,192 @@ def receive_one_content_from_kafka_topic(
         return result
     finally:
         c.close()
+
+
+# --- Persistent consumer ---
+
+class KafkaRecord(NamedTuple):
+    """One consumed message. `value` is the raw payload bytes."""
+    topic: str
+    partition: int
+    offset: int
+    timestamp: float | None   # broker/producer timestamp in seconds, if available
+    value: bytes
+
+    @property
+    def text(self) -> str:
+        """Payload decoded as UTF-8 (same decoding as receive_one_content_from_kafka_topic)."""
+        return self.value.decode("utf-8", errors="replace")
+
+
+class PersistentConsumer:
+    """
+    Long-lived consumer subscribed ONCE to a set of topics.
+
+    Unlike receive_one_content_from_kafka_topic (new Consumer + SSL handshake +
+    group join per call), this keeps one group membership for its whole lifetime,
+    drains messages in batches and commits offsets in batches.
+
+    Offsets are stored only after the caller has finished with a record (i.e. when
+    the consume() generator is resumed), so a crash never commits unprocessed
+    messages (at-least-once delivery).
+    """
+
+    def __init__(
+        self,
+        topic_names: list[str],
+        group_id: str = "ghostmarket-processor",
+        commit_every: int | None = 1000,
+        commit_interval_s: float = 5.0,
+        auto_commit: bool = True,
+        extra_config: dict | None = None,
+        start_offsets: dict[tuple[str, int], int] | None = None,
+    ):
+        """
+        Args:
+            topic_names: Topics to subscribe to (all must be in EXPECTED_TOPIC_NAMES).
+            group_id: Consumer group shared by every processor instance.
+            commit_every: Commit after this many processed messages (None = time only)...
+            commit_interval_s: ...or after this many seconds, whichever comes first.
+            auto_commit: Check those thresholds at the end of every consume() batch.
+                Set False if records are buffered after being yielded; the caller
+                then calls maybe_commit()/commit() once they are really handled.
+            extra_config: Optional librdkafka overrides (e.g. fetch sizes).
+            start_offsets: Optional {(topic, partition): offset} to start from
+                instead of the committed offset, applied the first time each
+                partition is assigned (e.g. the offsets of a state checkpoint).
+        """
+        for topic_name in topic_names:
+            _validate_topic(topic_name)
+
+        self.topic_names = list(topic_names)
+        self.commit_every = commit_every
+        self.commit_interval_s = commit_interval_s
+        self.auto_commit = auto_commit
+
+        consumer_config = dict(_BASE_CONFIG)
+        consumer_config.update(
+            {
+                "group.id": group_id,
+                "enable.auto.commit": False,
+                "enable.auto.offset.store": False,
+                "auto.offset.reset": "earliest",
+            }
+        )
+        if extra_config:
+            consumer_config.update(extra_config)
+
+        self._start_offsets = dict(start_offsets or {})
+        self._consumer = Consumer(consumer_config)
+        self._consumer.subscribe(self.topic_names, on_assign=self._on_assign)
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        self._closed = False
+
+    def _on_assign(self, consumer, partitions) -> None:
+        # Later rebalances resume from committed offsets as usual
+        for tp in partitions:
+            offset = self._start_offsets.pop((tp.topic, tp.partition), None)
+            if offset is not None:
+                tp.offset = offset
+        consumer.assign(partitions)
+
+    def consume(self, max_messages: int = 1000, timeout_s: float = 1.0) -> Iterator[KafkaRecord]:
+        """
+        Fetch up to `max_messages` in one call and yield them one by one.
+
+        Waits at most `timeout_s` seconds for the first message and returns as
+        soon as one arrives, together with whatever else is already buffered
+        (never waits to fill the batch). Returns an empty batch if nothing
+        arrives. With auto_commit, offsets are committed in batches once the
+        commit_every / commit_interval_s threshold is reached.
+        """
+        first = self._consumer.poll(timeout_s)
+        if first is None:
+            return
+        messages = [first]
+        if max_messages > 1:
+            # consume() with num_messages waits for a full batch until timeout;
+            # timeout=0 only drains what has already been fetched
+            messages += self._consumer.consume(num_messages=max_messages - 1, timeout=0)
+
+        for msg in messages:
+            err = msg.error()
+            if err is not None:
+                if err.code() == KafkaError._PARTITION_EOF:
+                    continue
+                raise KafkaException(err)
+
+            value_bytes = msg.value()
+            if value_bytes is not None:
+                _, ts_ms = msg.timestamp()
+                yield KafkaRecord(
+                    topic=msg.topic(),
+                    partition=msg.partition(),
+                    offset=msg.offset(),
+                    timestamp=ts_ms / 1000.0 if ts_ms and ts_ms > 0 else None,
+                    value=value_bytes,
+                )
+
+            # Caller is done with this record -> safe to store its offset
+            self._consumer.store_offsets(message=msg)
+            self._uncommitted += 1
+
+        if self.auto_commit:
+            self.maybe_commit()
+
+    def commit_due(self) -> bool:
+        """True if the commit_every / commit_interval_s threshold is reached."""
+        if self._uncommitted == 0:
+            return False
+        return (
+            (self.commit_every is not None and self._uncommitted >= self.commit_every)
+            or time.monotonic() - self._last_commit >= self.commit_interval_s
+        )
+
+    def maybe_commit(self) -> None:
+        """Commit asynchronously if commit_due()."""
+        if self.commit_due():
+            self.commit(asynchronous=True)
+
+    def commit(self, asynchronous: bool = False, offsets: dict[tuple[str, int], int] | None = None) -> None:
+        """
+        Commit every stored offset now, or only `offsets`
+        ({(topic, partition): next offset to consume}) when the caller knows
+        which records are really handled.
+        """
+        if self._uncommitted == 0:
+            return
+        try:
+            if offsets is not None:
+                partitions = [TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()]
+                if partitions:
+                    self._consumer.commit(offsets=partitions, asynchronous=asynchronous)
+            else:
+                self._consumer.commit(asynchronous=asynchronous)
+        except KafkaException as e:
+            # _NO_OFFSET just means nothing new was stored since the last commit
+            if e.args[0].code() != KafkaError._NO_OFFSET:
+                raise
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def close(self, commit: bool = True) -> None:
+        """
+        Commit what has been processed and leave the consumer group cleanly.
+        Pass commit=False if the caller already committed what it could.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if commit:
+                self.commit(asynchronous=False)
+        finally:
+            self._consumer.close()
+
+    def __enter__(self) -> "PersistentConsumer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
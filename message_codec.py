@@ -0,0 +1,171 @@
+"""
+Versioned wire format for GhostMarket Kafka messages, shared by the
+producers and the stream processor.
+
+Every binary payload starts with one header byte, (version << 4) | kind:
+- price tick v1:  header + struct "<ddB" (price_usd, timestamp, len(ticker)) + ticker (UTF-8)
+- social post v1: header + msgpack [text, tickers, timestamp, author, source]
+Legacy JSON payloads (first byte "{" or whitespace) still decode, so old and
+new producers can share a topic while they are upgraded.
+
+Usage:
+    payload = encode_price(PriceTick("bitcoin", 62500.0, ts))
+    tick = decode_price(record.value)   # one parse, however it was encoded
+"""
+
+import json
+import os
+import struct
+from dataclasses import dataclass
+
+try:
+    import msgpack
+except ImportError:   # social posts fall back to JSON without it
+    msgpack = None
+
+VERSION = 1
+KIND_PRICE = 1
+KIND_SOCIAL = 2
+PRICE_V1 = (VERSION << 4) | KIND_PRICE
+SOCIAL_V1 = (VERSION << 4) | KIND_SOCIAL
+
+# binary (default) | json. Processors decode both, so upgrade them first.
+MESSAGE_FORMAT = os.getenv("GHOSTMARKET_MESSAGE_FORMAT", "binary")
+
+_PRICE_STRUCT = struct.Struct("<ddB")
+_TICKER_AT = 1 + _PRICE_STRUCT.size
+_JSON_START = frozenset(b"{ \t\r\n")
+
+
+class CodecError(ValueError):
+    """Payload can't be decoded (corrupt, unknown version, or missing fields)."""
+
+
+@dataclass(slots=True)
+class PriceTick:
+    ticker: str
+    price_usd: float
+    timestamp: float
+
+
+@dataclass(slots=True)
+class SocialPost:
+    text: str
+    tickers: list[str]
+    timestamp: float
+    author: str | None = None
+    source: str | None = None
+
+
+# --- Encoding ---
+
+def encode_price(tick: PriceTick, fmt: str = MESSAGE_FORMAT) -> bytes:
+    if fmt == "json":
+        return json.dumps({
+            "ticker": tick.ticker,
+            "price_usd": tick.price_usd,
+            "timestamp": tick.timestamp,
+        }).encode("utf-8")
+    ticker = tick.ticker.encode("utf-8")
+    if len(ticker) > 255:
+        raise CodecError(f"Ticker too long for the binary format: {tick.ticker[:40]!r}...")
+    return bytes((PRICE_V1,)) + _PRICE_STRUCT.pack(tick.price_usd, tick.timestamp, len(ticker)) + ticker
+
+
+def encode_social(post: SocialPost, fmt: str = MESSAGE_FORMAT) -> bytes:
+    if fmt == "json" or msgpack is None:
+        return json.dumps({
+            "source": post.source,
+            "timestamp": post.timestamp,
+            "text": post.text,
+            "tickers": post.tickers,
+            "author": post.author,
+        }).encode("utf-8")
+    body = msgpack.packb([post.text, post.tickers, post.timestamp, post.author, post.source])
+    return bytes((SOCIAL_V1,)) + body
+
+
+# --- Decoding ---
+
+def decode_price(value: bytes) -> PriceTick:
+    """Decode a price payload (binary v1 or legacy JSON). Raises CodecError."""
+    if not value:
+        raise CodecError("Empty price payload")
+    header = value[0]
+    try:
+        if header == PRICE_V1:
+            price, ts, n = _PRICE_STRUCT.unpack_from(value, 1)
+            ticker = value[_TICKER_AT:_TICKER_AT + n]
+            if len(ticker) != n:
+                raise CodecError("Truncated price payload")
+            return PriceTick(ticker.decode("utf-8"), price, ts)
+        if header in _JSON_START:
+            msg = json.loads(value)
+            if not isinstance(msg["ticker"], str):
+                raise CodecError(f"Bad price payload: ticker is {type(msg['ticker']).__name__}, not str")
+            return PriceTick(msg["ticker"], float(msg["price_usd"]), float(msg["timestamp"]))
+    except CodecError:
+        raise
+    except (KeyError, TypeError, ValueError, struct.error) as e:
+        raise CodecError(f"Bad price payload: {e!r}") from e
+    raise CodecError(f"Unknown price payload header 0x{header:02x}")
+
+
+def decode_social(value: bytes) -> SocialPost:
+    """Decode a social payload (binary v1 or legacy JSON). Raises CodecError."""
+    if not value:
+        raise CodecError("Empty social payload")
+    header = value[0]
+    try:
+        if header == SOCIAL_V1:
+            if msgpack is None:
+                raise CodecError("Binary social payload needs msgpack (pip install msgpack)")
+            text, tickers, ts, author, source = msgpack.unpackb(value[1:])
+            return _social_post(text, tickers, ts, author, source)
+        if header in _JSON_START:
+            msg = json.loads(value)
+            return _social_post(
+                msg["text"], msg.get("tickers", []), msg["timestamp"], msg.get("author"), msg.get("source"),
+            )
+    except CodecError:
+        raise
+    except (KeyError, TypeError, ValueError) as e:   # msgpack's unpack errors are ValueErrors
+        raise CodecError(f"Bad social payload: {e!r}") from e
+    raise CodecError(f"Unknown social payload header 0x{header:02x}")
+
+
+def _social_post(text, tickers, ts, author, source) -> SocialPost:
+    """SocialPost from decoded fields, type-checked so a bad message is skipped, not crashed on."""
+    if not isinstance(text, str):
+        raise CodecError(f"Bad social payload: text is {type(text).__name__}, not str")
+    if not isinstance(tickers, list):
+        raise CodecError(f"Bad social payload: tickers is {type(tickers).__name__}, not list")
+    for ticker in tickers:
+        if not isinstance(ticker, str):
+            raise CodecError(f"Bad social payload: ticker is {type(ticker).__name__}, not str")
+    if author is not None and not isinstance(author, str):
+        raise CodecError(f"Bad social payload: author is {type(author).__name__}, not str")
+    if source is not None and not isinstance(source, str):
+        raise CodecError(f"Bad social payload: source is {type(source).__name__}, not str")
+    return SocialPost(text, tickers, float(ts), author, source)
+
+
+# --- Run standalone to compare sizes and decode cost ---
+if __name__ == "__main__":
+    import time
+
+    tick = PriceTick("bitcoin", 62512.37, 1740134400.123)
+    post = SocialPost("ser $btc to the moon 🚀 lfg wen", ["bitcoin"], 1740134400.5, "123456", "telegram")
+    n = 200_000
+    for fmt in ("json", "binary"):
+        for name, obj, encode, decode in (
+            ("price", tick, encode_price, decode_price),
+            ("social", post, encode_social, decode_social),
+        ):
+            payload = encode(obj, fmt)
+            assert decode(payload) == obj, (fmt, name)
+            t0 = time.perf_counter()
+            for _ in range(n):
+                decode(payload)
+            decode_us = (time.perf_counter() - t0) / n * 1e6
+            print(f"{fmt:6} {name:6} {len(payload):4d} bytes | decode {decode_us:.2f} µs")
@@ -0,0 +1,171 @@
+import json
+import os
+import time
+
+import duckdb
+import numpy as np
+
+from pane_window import PaneStore
+from window_store import WindowStore
+
+CHECKPOINT_VERSION = 1
+
+
+def snapshot(
+    stores: dict[str, WindowStore],
+    offsets: dict[tuple[str, int], int],
+) -> dict[str, np.ndarray]:
+    """
+    Copy every window (points + running-sum accumulators) together with the
+    Kafka offsets they reflect into the arrays write_snapshot() saves. Cheap
+    (array copies), so it runs on the processor thread while the windows
+    match `offsets`; the file I/O can then happen anywhere.
+
+    `offsets` maps (topic, partition) -> next offset to consume: the windows
+    contain exactly the records before those offsets.
+    """
+    arrays = {}
+    tickers = {}
+    for name, store in stores.items():
+        tickers[name] = store.tickers()
+        for ticker in store:
+            ts, values, acc = store.state(ticker)
+            arrays[f"{name}/{ticker}/ts"] = ts
+            arrays[f"{name}/{ticker}/values"] = values
+            arrays[f"{name}/{ticker}/acc"] = acc
+
+    meta = {
+        "version": CHECKPOINT_VERSION,
+        "created_at": time.time(),
+        "window_seconds": {name: store.window_seconds for name, store in stores.items()},
+        "tickers": tickers,
+        "offsets": [[topic, partition, offset] for (topic, partition), offset in offsets.items()],
+    }
+    arrays["meta"] = np.array(json.dumps(meta))
+    return arrays
+
+
+def write_snapshot(path: str, arrays: dict[str, np.ndarray]) -> int:
+    """
+    Write a snapshot() as one uncompressed .npz file. Written to a temp file,
+    fsynced and renamed, so a crash mid-write leaves the previous checkpoint
+    intact. Returns the file size in bytes.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def save_checkpoint(
+    path: str,
+    stores: dict[str, WindowStore],
+    offsets: dict[tuple[str, int], int],
+) -> int:
+    """snapshot() + write_snapshot() in one call. Returns the file size in bytes."""
+    return write_snapshot(path, snapshot(stores, offsets))
+
+
+def load_checkpoint(path: str, stores: dict[str, WindowStore]) -> dict[tuple[str, int], int] | None:
+    """
+    Restore windows from a save_checkpoint() file into `stores` (only tickers
+    already registered there). Returns the checkpoint's offsets, or None if
+    there is no usable checkpoint (missing, corrupt, other version or window
+    length); the stores are left untouched in that case.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != CHECKPOINT_VERSION:
+                print(f"[WARN] Ignoring checkpoint {path}: version {meta.get('version')} != {CHECKPOINT_VERSION}")
+                return None
+            for name, store in stores.items():
+                if meta["window_seconds"].get(name) != store.window_seconds:
+                    print(f"[WARN] Ignoring checkpoint {path}: {name} window length changed")
+                    return None
+
+            states = []
+            for name, store in stores.items():
+                for ticker in meta["tickers"].get(name, []):
+                    if ticker in store:
+                        key = f"{name}/{ticker}"
+                        states.append((store, ticker, data[f"{key}/ts"], data[f"{key}/values"], data[f"{key}/acc"]))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARN] Ignoring unreadable checkpoint {path}: {e!r}")
+        return None
+
+    for store, ticker, ts, values, acc in states:
+        store.load_state(ticker, ts, values, acc)
+    return {(topic, partition): offset for topic, partition, offset in meta["offsets"]}
+
+
+def rebuild_from_db(
+    con: duckdb.DuckDBPyConnection,
+    price_windows: WindowStore | PaneStore,
+    vibe_windows: WindowStore | PaneStore,
+    now: float | None = None,
+    seconds: float | None = None,
+) -> int:
+    """
+    Fallback warm start: refill the windows from the last window_seconds
+    (or `seconds`) of price_snapshots / social_signals rows. Approximate
+    (messages consumed again after the last offset commit are added twice).
+    Returns rows loaded.
+    """
+    now = time.time() if now is None else now
+    loaded = 0
+    for store, table, column in (
+        (price_windows, "price_snapshots", "price_usd"),
+        (vibe_windows, "social_signals", "vibe_score"),
+    ):
+        tickers = store.tickers()
+        if not tickers:
+            continue
+        rows = con.execute(
+            f"""
+            SELECT ticker, {column}, timestamp FROM {table}
+            WHERE timestamp >= ? AND ticker IN ({', '.join('?' for _ in tickers)}) AND {column} IS NOT NULL
+            ORDER BY timestamp
+            """,
+            [now - (store.window_seconds if seconds is None else seconds), *tickers],
+        ).fetchall()
+        for ticker, value, ts in rows:
+            store.add(ticker, value, ts)
+        loaded += len(rows)
+    return loaded
+
+
+# --- Run standalone to time a checkpoint round trip ---
+if __name__ == "__main__":
+    import tempfile
+
+    prices, vibes = WindowStore(300), WindowStore(300)
+    now = time.time()
+    for i in range(50):
+        ticker = f"coin{i}"
+        prices.register(ticker)
+        vibes.register(ticker)
+        for j in range(3_000):
+            prices.add(ticker, 100.0 + j % 7, now - 300 + j * 0.1)
+            vibes.add(ticker, (j % 200) / 100 - 1, now - 300 + j * 0.1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoint.npz")
+        t0 = time.perf_counter()
+        size = save_checkpoint(path, {"price": prices, "vibe": vibes}, {("bitcoin", 0): 1234})
+        t1 = time.perf_counter()
+
+        restored_p, restored_v = WindowStore(300), WindowStore(300)
+        for ticker in prices:
+            restored_p.register(ticker)
+            restored_v.register(ticker)
+        offsets = load_checkpoint(path, {"price": restored_p, "vibe": restored_v})
+        t2 = time.perf_counter()
+
+    print(f"Save: {(t1 - t0) * 1e3:.1f} ms ({size / 1e6:.1f} MB) | load: {(t2 - t1) * 1e3:.1f} ms | offsets={offsets}")
+    print(f"Match: {restored_p.average('coin7') == prices.average('coin7') and restored_v.std('coin3') == vibes.std('coin3')}")
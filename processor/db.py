@@ -1,23 +1,68 @@
 import os
+import threading
+import time
 import duckdb
+import numpy as np
 from dotenv import load_dotenv
 
+try:
+    import pyarrow as pa   # optional: enables single Arrow append per flush
+except ImportError:
+    pa = None
+
 load_dotenv()
 
 TOKEN = os.getenv("MOTHERDUCK_TOKEN")
-if not TOKEN:
-    raise RuntimeError("Missing MOTHERDUCK_TOKEN in .env")
 
 DB_NAME = "ghostmarket"
 
+# Where the processor writes:
+#   motherduck → straight to MotherDuck (default)
+#   local      → only to the local DuckDB file (fully offline)
+#   staged     → local file first, StagingSync bulk-copies new rows to MotherDuck
+DB_MODE = os.getenv("GHOSTMARKET_DB_MODE", "motherduck")
+LOCAL_DB_PATH = os.getenv("GHOSTMARKET_LOCAL_DB", "ghostmarket_local.duckdb")
+# Staged mode sync target: empty = MotherDuck, or a path to another DuckDB file
+SYNC_TARGET = os.getenv("GHOSTMARKET_SYNC_TARGET", "")
+
+
 # --- Connection ---
-def get_connection() -> duckdb.DuckDBPyConnection:
+def connect_motherduck() -> duckdb.DuckDBPyConnection:
     """Create and return a MotherDuck connection."""
+    if not TOKEN:
+        raise RuntimeError("Missing MOTHERDUCK_TOKEN in .env")
     con = duckdb.connect(f"md:?motherduck_token={TOKEN}")
     con.execute(f"USE {DB_NAME}")
     return con
 
 
+def connect_local(path: str = LOCAL_DB_PATH) -> duckdb.DuckDBPyConnection:
+    """Create and return a connection to a local DuckDB file (no network)."""
+    return duckdb.connect(path)
+
+
+def get_connection(local_path: str | None = None) -> duckdb.DuckDBPyConnection:
+    """
+    Connection the processor writes to, according to GHOSTMARKET_DB_MODE.
+    `local_path` overrides LOCAL_DB_PATH in local/staged mode.
+    """
+    if DB_MODE == "motherduck":
+        return connect_motherduck()
+    if DB_MODE in ("local", "staged"):
+        return connect_local(local_path or LOCAL_DB_PATH)
+    raise ValueError(f"Unknown GHOSTMARKET_DB_MODE {DB_MODE!r} (expected motherduck, local or staged)")
+
+
+def get_sync_target_connection(path: str | None = None) -> duckdb.DuckDBPyConnection:
+    """
+    Where StagingSync copies staged rows: MotherDuck, or SYNC_TARGET if set.
+    `path` overrides SYNC_TARGET (one file per shard: a DuckDB file has a single writer).
+    """
+    if path or SYNC_TARGET:
+        return connect_local(path or SYNC_TARGET)
+    return connect_motherduck()
+
+
 # --- Schema Setup ---
 def init_schema(con: duckdb.DuckDBPyConnection) -> None:
     """
@@ -49,8 +94,68 @@ def init_schema(con: duckdb.DuckDBPyConnection) -> None:
     """)
 
     # Computed decoupling signals (output of stream_processor.py)
+    create_signals_table(con)
+
+    # Per-minute pre-aggregates, appended by the processor alongside raw rows.
+    # Append-only partial rows: readers SUM/MIN/MAX/bit_or over a time range.
     con.execute("""
-        CREATE TABLE IF NOT EXISTS decoupling_signals (
+        CREATE TABLE IF NOT EXISTS social_rollup_1m (
+            ticker          TEXT,
+            minute          BIGINT,     -- unix seconds of the minute start
+            n               BIGINT,
+            vibe_sum        DOUBLE,
+            vibe_min        DOUBLE,
+            vibe_max        DOUBLE,
+            source_sketch   BIGINT,     -- distinct-source bitmask, see rollups.py
+            recorded_at     TIMESTAMP DEFAULT now()
+        )
+    """)
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS price_rollup_1m (
+            ticker          TEXT,
+            minute          BIGINT,     -- unix seconds of the minute start
+            n               BIGINT,
+            price_sum       DOUBLE,
+            price_min       DOUBLE,
+            price_max       DOUBLE,
+            recorded_at     TIMESTAMP DEFAULT now()
+        )
+    """)
+
+    # 1m / 5m / 15m / 1h price and vibe aggregates from the processor's
+    # event-time panes (pane_window.py), appended every pane (10s) per active
+    # ticker; readers take the newest row per (ticker, stream, resolution)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS window_aggregates (
+            ticker          TEXT,
+            stream          TEXT,       -- "price" or "vibe"
+            resolution      TEXT,       -- "1m", "5m", "15m", "1h"
+            watermark       DOUBLE,     -- event time up to which the panes are final
+            n               BIGINT,
+            mean            DOUBLE,
+            std             DOUBLE,
+            min             DOUBLE,
+            max             DOUBLE,
+            recorded_at     TIMESTAMP DEFAULT now()
+        )
+    """)
+
+    print("[DB] Schema ready.")
+
+
+def create_signals_table(
+    con: duckdb.DuckDBPyConnection,
+    table: str = "decoupling_signals",
+    replace: bool = False,
+) -> None:
+    """
+    Create a table with the decoupling_signals schema.
+    `replace=True` drops an existing one first (fresh replay output).
+    """
+    create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+    con.execute(f"""
+        {create} {table} (
             ticker          TEXT,
             timestamp       DOUBLE,
             price_current   DOUBLE,
@@ -65,7 +170,20 @@ def init_schema(con: duckdb.DuckDBPyConnection) -> None:
         )
     """)
 
-    print("[DB] Schema ready.")
+
+# Insertable columns per table, in the order rows are passed to BulkWriter.add()
+TABLE_COLUMNS = {
+    "price_snapshots": ("ticker", "price_usd", "timestamp"),
+    "social_signals": ("ticker", "vibe_score", "text", "author", "source", "timestamp"),
+    "decoupling_signals": (
+        "ticker", "timestamp", "price_current", "price_avg",
+        "vibe_current", "vibe_avg", "delta_price",
+        "delta_vibe", "hype_momentum", "alert",
+    ),
+    "social_rollup_1m": ("ticker", "minute", "n", "vibe_sum", "vibe_min", "vibe_max", "source_sketch"),
+    "price_rollup_1m": ("ticker", "minute", "n", "price_sum", "price_min", "price_max"),
+    "window_aggregates": ("ticker", "stream", "resolution", "watermark", "n", "mean", "std", "min", "max"),
+}
 
 
 # --- Write Helpers ---
@@ -115,6 +233,406 @@ def insert_signal(con: duckdb.DuckDBPyConnection, signal: dict) -> None:
     )
 
 
+_MAX_ROWS_PER_STATEMENT = 1000   # multi-row VALUES fallback chunk size
+
+
+def _numpy_column(values: list) -> tuple[np.ndarray, np.ndarray | None] | None:
+    """
+    Typed NumPy array for one column plus, for text columns with NULLs, a
+    boolean mask that is True where the value is NULL (the array holds "" there;
+    otherwise None). None if the column holds types we don't map; the caller
+    then falls back to VALUES.
+
+    Typed arrays matter: DuckDB scans float64 / int64 / str arrays natively,
+    while Python objects (object arrays, prepared-statement parameters) are
+    converted one value at a time.
+    """
+    has_null = False
+    kind = None
+    for value in values:
+        if value is None:
+            has_null = True
+        elif isinstance(value, str):
+            kind = "text"
+        elif isinstance(value, float) and kind != "text":
+            kind = "float"
+        elif isinstance(value, int) and not isinstance(value, bool) and kind is None:
+            kind = "int"
+        elif not isinstance(value, (str, float, int)) or isinstance(value, bool):
+            return None
+
+    if kind == "text":
+        if has_null:
+            return np.array(["" if v is None else v for v in values]), np.array([v is None for v in values])
+        return np.array(values), None
+    if kind == "int" and not has_null:
+        return np.array(values, dtype=np.int64), None
+    # floats, ints with NULLs, all-NULL columns: float64, NaN for NULL (DuckDB's NumPy scan reads NaN as NULL)
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64), None
+
+
+def insert_columns(
+    con: duckdb.DuckDBPyConnection,
+    table: str,
+    columns: tuple[str, ...],
+    data: list[list],
+) -> None:
+    """
+    Append many rows in one statement. `data` is columnar: one list per column.
+    Uses a single Arrow append when pyarrow is installed, otherwise a scan of
+    typed NumPy arrays (multi-row INSERT ... VALUES for unmapped types).
+    """
+    n_rows = len(data[0]) if data else 0
+    if n_rows == 0:
+        return
+
+    column_list = ", ".join(columns)
+    view = f"_bulk_{table}"
+
+    if pa is not None:
+        con.register(view, pa.table(dict(zip(columns, data))))
+        try:
+            con.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {view}")
+        finally:
+            con.unregister(view)
+        return
+
+    arrays = [_numpy_column(col) for col in data]
+    if all(array is not None for array in arrays):
+        select = ", ".join(
+            column if nulls is None else f"CASE WHEN {column}__null THEN NULL ELSE {column} END"
+            for column, (_, nulls) in zip(columns, arrays)
+        )
+        scan = {column: array for column, (array, _) in zip(columns, arrays)}
+        scan.update((f"{column}__null", nulls) for column, (_, nulls) in zip(columns, arrays) if nulls is not None)
+        con.register(view, scan)
+        try:
+            con.execute(f"INSERT INTO {table} ({column_list}) SELECT {select} FROM {view}")
+        finally:
+            con.unregister(view)
+        return
+
+    row_placeholder = "(" + ", ".join("?" for _ in columns) + ")"
+    for start in range(0, n_rows, _MAX_ROWS_PER_STATEMENT):
+        rows = list(zip(*(col[start:start + _MAX_ROWS_PER_STATEMENT] for col in data)))
+        con.execute(
+            f"INSERT INTO {table} ({column_list}) VALUES " + ", ".join(row_placeholder for _ in rows),
+            [value for row in rows for value in row],
+        )
+
+
+class BulkWriter:
+    """
+    Buffers rows per table in columnar form and writes each table with one
+    bulk append instead of one INSERT (one MotherDuck round trip) per row.
+
+    Flushes when `batch_rows` rows are pending or the oldest pending row is
+    `flush_interval_s` old. A failed flush keeps its rows and is retried later;
+    once `max_pending_rows` are buffered, add() blocks retrying the flush
+    (backpressure) instead of growing without bound.
+
+    Usage:
+        writer = BulkWriter(con)
+        writer.add_price("bitcoin", 62500.0, ts)
+        writer.maybe_flush()   # call regularly from the main loop
+        writer.close()         # flushes everything on shutdown
+    """
+
+    def __init__(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        batch_rows: int = 500,
+        flush_interval_s: float = 1.0,
+        max_pending_rows: int = 50_000,
+        before_flush=None,
+        after_flush=None,
+    ):
+        """
+        Args:
+            before_flush: Optional callable(writer) run at the start of every
+                flush, e.g. RollupBuilder.drain_into to add rollup rows to it.
+            after_flush: Optional callable(rows, seconds) run after every
+                successful flush, e.g. to record flush latency metrics.
+        """
+        self.con = con
+        self.batch_rows = batch_rows
+        self.flush_interval_s = flush_interval_s
+        self.max_pending_rows = max_pending_rows
+        self.before_flush = before_flush
+        self.after_flush = after_flush
+        self._in_flush = False
+
+        self._buffers: dict[str, list[list]] = {
+            table: [[] for _ in columns] for table, columns in TABLE_COLUMNS.items()
+        }
+        self._pending = 0
+        self._oldest_pending_at: float | None = None
+
+        # Stats
+        self.rows_written = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    # --- Buffering ---
+
+    def add(self, table: str, row: tuple | list) -> None:
+        """Queue one row (values in TABLE_COLUMNS[table] order)."""
+        if self._pending >= self.max_pending_rows and not self._in_flush:
+            self._flush_until_room()
+
+        for column, value in zip(self._buffers[table], row):
+            column.append(value)
+        self._pending += 1
+        if self._oldest_pending_at is None:
+            self._oldest_pending_at = time.monotonic()
+
+        if self._pending >= self.batch_rows and not self._in_flush:
+            self.maybe_flush()
+
+    def add_price(self, ticker: str, price_usd: float, timestamp: float) -> None:
+        self.add("price_snapshots", (ticker, price_usd, timestamp))
+
+    def add_social(
+        self,
+        ticker: str,
+        vibe_score: float,
+        text: str,
+        author: str,
+        source: str,
+        timestamp: float,
+    ) -> None:
+        self.add("social_signals", (ticker, vibe_score, text, author, source, timestamp))
+
+    def add_signal(self, signal: dict) -> None:
+        self.add("decoupling_signals", [signal[column] for column in TABLE_COLUMNS["decoupling_signals"]])
+
+    # --- Flushing ---
+
+    def is_due(self) -> bool:
+        if self._pending == 0:
+            return False
+        if self._pending >= self.batch_rows:
+            return True
+        return time.monotonic() - self._oldest_pending_at >= self.flush_interval_s
+
+    def maybe_flush(self, force: bool = False) -> bool:
+        """
+        Flush if a size/time threshold is reached (or always, with force).
+        Errors are logged, not raised, so a DB hiccup doesn't kill the caller's
+        loop. Returns True if nothing is left buffered afterwards.
+        """
+        if not force and not self.is_due():
+            return self._pending == 0
+        try:
+            self.flush()
+        except duckdb.Error as e:
+            print(f"[ERROR] Bulk flush failed, {self._pending} rows kept for retry: {e}")
+        return self._pending == 0
+
+    def flush(self) -> int:
+        """Write every buffered row now. Returns rows written; raises on DB errors."""
+        if self.before_flush is not None:
+            self._in_flush = True   # rows added by the hook ride along with this flush
+            try:
+                self.before_flush(self)
+            finally:
+                self._in_flush = False
+        if self._pending == 0:
+            return 0
+
+        started = time.perf_counter()
+        written = 0
+        try:
+            for table, data in self._buffers.items():
+                if not data[0]:
+                    continue
+                insert_columns(self.con, table, TABLE_COLUMNS[table], data)
+                written += len(data[0])
+                # Only clear a table once it is safely written
+                self._buffers[table] = [[] for _ in data]
+                self._pending -= len(data[0])
+        except duckdb.Error:
+            self.failed_flushes += 1
+            raise
+        finally:
+            if self._pending == 0:
+                self._oldest_pending_at = None
+
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self.flush_count += 1
+        self.rows_written += written
+        if self.after_flush is not None:
+            self.after_flush(written, self.last_flush_ms / 1000)
+        return written
+
+    def _flush_until_room(self) -> None:
+        """Backpressure: block the producer of rows until a flush succeeds."""
+        delay = 0.5
+        while self._pending >= self.max_pending_rows:
+            try:
+                self.flush()
+            except duckdb.Error as e:
+                print(f"[WARN] Writer buffer full ({self._pending} rows), retrying flush in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def close(self) -> None:
+        """Flush everything that is still buffered (call on shutdown)."""
+        self.flush()
+
+    # --- Introspection ---
+
+    def queue_depth(self) -> dict[str, int]:
+        """Buffered rows per table."""
+        return {table: len(data[0]) for table, data in self._buffers.items()}
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "queue_depth": self.queue_depth(),
+            "rows_written": self.rows_written,
+            "flushes": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+# --- Local staging → MotherDuck sync ---
+
+# Server-side default columns that are copied too, so synced rows keep their
+# original ingest time instead of the time of the sync.
+_INGEST_TIME_COLUMN = {
+    "price_snapshots": "ingested_at",
+    "social_signals": "ingested_at",
+    "decoupling_signals": "recorded_at",
+    "social_rollup_1m": "recorded_at",
+    "price_rollup_1m": "recorded_at",
+    "window_aggregates": "recorded_at",
+}
+
+
+class StagingSync:
+    """
+    Background bulk copy of new rows from the local staging DuckDB file to the
+    target (MotherDuck, or another DuckDB file when testing offline).
+
+    Progress is a per-table high-water mark on the staging table's rowid, kept
+    in the local `_sync_state` table. Staging tables are append-only, so rowids
+    only grow. A crash between a copy and its high-water update re-sends that
+    batch once (at-least-once, like the Kafka side).
+
+    Usage:
+        sync = StagingSync(local_con, get_sync_target_connection())
+        sync.start()
+        ...
+        sync.stop()   # final sync, then joins the thread
+    """
+
+    def __init__(
+        self,
+        local_con: duckdb.DuckDBPyConnection,
+        target_con: duckdb.DuckDBPyConnection,
+        interval_s: float = 5.0,
+        batch_rows: int = 50_000,
+    ):
+        # Own cursor: the writer keeps using local_con from the main thread
+        self.local = local_con.cursor()
+        self.target = target_con
+        self.interval_s = interval_s
+        self.batch_rows = batch_rows
+
+        self.rows_synced = 0
+        self.last_sync_ms = 0.0
+        self.failed_syncs = 0
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        init_schema(self.target)
+        self.local.execute("""
+            CREATE TABLE IF NOT EXISTS _sync_state (
+                table_name  TEXT PRIMARY KEY,
+                high_water  BIGINT
+            )
+        """)
+
+        # In-memory copy so stats() never touches the cursor owned by the thread
+        self._high_water = dict(self.local.execute("SELECT table_name, high_water FROM _sync_state").fetchall())
+
+    def high_water(self, table: str) -> int:
+        """Last staged rowid already copied for `table` (-1 if none)."""
+        return self._high_water.get(table, -1)
+
+    def _set_high_water(self, table: str, rowid: int) -> None:
+        self.local.execute(
+            "INSERT OR REPLACE INTO _sync_state (table_name, high_water) VALUES (?, ?)",
+            [table, rowid],
+        )
+        self._high_water[table] = rowid
+
+    def sync_table(self, table: str) -> int:
+        """Copy every row of `table` above its high-water mark. Returns rows copied."""
+        columns = TABLE_COLUMNS[table] + (_INGEST_TIME_COLUMN[table],)
+        column_list = ", ".join(columns)
+        copied = 0
+
+        while True:
+            rows = self.local.execute(
+                f"SELECT rowid, {column_list} FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                [self.high_water(table), self.batch_rows],
+            ).fetchall()
+            if not rows:
+                return copied
+
+            data = [list(col) for col in zip(*rows)]
+            insert_columns(self.target, table, columns, data[1:])
+            self._set_high_water(table, data[0][-1])
+            copied += len(rows)
+
+            if len(rows) < self.batch_rows:
+                return copied
+
+    def sync_once(self) -> int:
+        """Copy new rows of every table. Returns total rows copied."""
+        started = time.perf_counter()
+        copied = sum(self.sync_table(table) for table in TABLE_COLUMNS)
+        self.last_sync_ms = (time.perf_counter() - started) * 1000
+        self.rows_synced += copied
+        return copied
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.sync_once()
+            except duckdb.Error as e:
+                # Target unreachable: rows stay staged locally, retry next tick
+                self.failed_syncs += 1
+                print(f"[WARN] Staging sync failed, will retry: {e}")
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="staging-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, final_sync: bool = True) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if final_sync:
+            self.sync_once()
+
+    def stats(self) -> dict:
+        return {
+            "rows_synced": self.rows_synced,
+            "last_sync_ms": round(self.last_sync_ms, 2),
+            "failed_syncs": self.failed_syncs,
+            "high_water": {table: self.high_water(table) for table in TABLE_COLUMNS},
+        }
+
+
 # --- Run standalone to verify connection & schema ---
 if __name__ == "__main__":
     con = get_connection()
@@ -122,7 +640,7 @@ if __name__ == "__main__":
 
     # Quick sanity check
     tables = con.execute("SHOW TABLES").fetchall()
-    print("Tables in ghostmarket DB:")
+    print(f"Tables in ghostmarket DB ({DB_MODE}):")
     for t in tables:
         print(f"  - {t[0]}")
 
@@ -0,0 +1,60 @@
+import os
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+# Standard logging names, so PROCESSOR_LOG_LEVEL=WARNING works too
+ALIASES = {"WARNING": "WARN", "CRITICAL": "ERROR", "FATAL": "ERROR"}
+LOG_LEVEL = os.getenv("PROCESSOR_LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_EVERY = int(os.getenv("PROCESSOR_LOG_SAMPLE_EVERY", "1"))   # print 1 in N sampled lines
+
+
+class SampledLogger:
+    """
+    Level-gated print logger for the hot path. Messages below the level cost
+    one comparison: formatting is lazy (%-style args), so a disabled debug line
+    never builds its string. Per-message lines can also be sampled, printing
+    only every Nth call for the same format string.
+
+    Usage:
+        log = SampledLogger("DEBUG", sample_every=100)
+        log.debug("[PRICE] %s = $%.2f", ticker, price, sample=True)
+        if log.debug_enabled:   # guard args that are expensive to compute
+            log.debug("[VIBE] %s avg=%+.3f", ticker, window.average())
+    """
+
+    def __init__(self, level: str = LOG_LEVEL, sample_every: int = LOG_SAMPLE_EVERY):
+        self.sample_every = max(1, sample_every)
+        self._counts: dict[str, int] = {}
+        self.set_level(level)
+
+    def set_level(self, level: str) -> None:
+        level = ALIASES.get(level.upper(), level.upper())
+        if level not in LEVELS:
+            raise ValueError(f"Unknown log level {level!r} (expected one of {', '.join(LEVELS)})")
+        self.level = LEVELS[level]
+        self.debug_enabled = self.level <= LEVELS["DEBUG"]
+
+    def _emit(self, level: int, msg: str, args: tuple, sample: bool) -> None:
+        if level < self.level:
+            return
+        if sample and self.sample_every > 1:
+            n = self._counts.get(msg, 0)
+            self._counts[msg] = n + 1
+            if n % self.sample_every:
+                return
+        print(msg % args if args else msg)
+
+    def debug(self, msg: str, *args, sample: bool = False) -> None:
+        if self.debug_enabled:
+            self._emit(LEVELS["DEBUG"], msg, args, sample)
+
+    def info(self, msg: str, *args, sample: bool = False) -> None:
+        self._emit(LEVELS["INFO"], msg, args, sample)
+
+    def warn(self, msg: str, *args, sample: bool = False) -> None:
+        self._emit(LEVELS["WARN"], msg, args, sample)
+
+    def error(self, msg: str, *args, sample: bool = False) -> None:
+        self._emit(LEVELS["ERROR"], msg, args, sample)
+
+
+log = SampledLogger()
@@ -1,14 +1,44 @@
 from collections import deque
+import math
 import time
 
+import numpy as np
+
+
+class _KahanSum:
+    """Compensated running sum: adds/subtracts without accumulating float drift."""
+
+    __slots__ = ("total", "_c")
+
+    def __init__(self):
+        self.total = 0.0
+        self._c = 0.0
+
+    def add(self, x: float) -> None:
+        y = x - self._c
+        t = self.total + y
+        self._c = (t - self.total) - y
+        self.total = t
+
+    def reset(self, total: float = 0.0) -> None:
+        self.total = total
+        self._c = 0.0
+
 
 class SlidingWindow:
     """
     Memory-efficient sliding window using deque with a time-based expiry.
     Automatically evicts data points older than `window_seconds`.
-    All operations are O(1) amortized.
+
+    Running sum / sum of squares (Kahan-compensated) and monotonic min/max
+    deques are updated on add and eviction, so every aggregate is O(1)
+    (add is O(1) amortized).
     """
 
+    # Exact recompute of the running sums after this many updates, so
+    # compensated rounding error can never build up over a long-lived window.
+    RECOMPUTE_EVERY = 100_000
+
     def __init__(self, window_seconds: int = 300):
         """
         Args:
@@ -17,6 +47,20 @@ class SlidingWindow:
         self.window_seconds = window_seconds
         self._data: deque[tuple[float, float]] = deque()  # (timestamp, value)
 
+        # Sums are kept over (value - shift), shift = first value ever added:
+        # keeps sum-of-squares variance accurate for large prices.
+        self._shift: float | None = None
+        self._sum = _KahanSum()
+        self._sumsq = _KahanSum()
+        self._updates = 0
+
+        # Monotonic deques of (seq, value): front is the current min / max.
+        # seq numbers identify points so eviction can drop the matching front.
+        self._min: deque[tuple[int, float]] = deque()
+        self._max: deque[tuple[int, float]] = deque()
+        self._head_seq = 0   # seq of self._data[0]
+        self._next_seq = 0
+
     def add(self, value: float, timestamp: float | None = None) -> None:
         """
         Append a new data point and evict expired entries.
@@ -28,23 +72,95 @@ class SlidingWindow:
         if timestamp is None:
             timestamp = time.time()
 
+        if self._shift is None:
+            self._shift = value
+
         self._data.append((timestamp, value))
+        d = value - self._shift
+        self._sum.add(d)
+        self._sumsq.add(d * d)
+
+        seq = self._next_seq
+        self._next_seq += 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
         self._evict_expired(timestamp)
+        self._tick()
 
     def _evict_expired(self, now: float) -> None:
         """Remove entries older than window_seconds from the left."""
         cutoff = now - self.window_seconds
         while self._data and self._data[0][0] < cutoff:
-            self._data.popleft()
+            _, value = self._data.popleft()
+            d = value - self._shift
+            self._sum.add(-d)
+            self._sumsq.add(-d * d)
+
+            if self._min[0][0] == self._head_seq:
+                self._min.popleft()
+            if self._max[0][0] == self._head_seq:
+                self._max.popleft()
+            self._head_seq += 1
+            self._tick()
+
+    def _tick(self) -> None:
+        self._updates += 1
+        if self._updates >= self.RECOMPUTE_EVERY:
+            self._recompute()
+
+    def _recompute(self) -> None:
+        """Reset the running sums from the raw data (exact, O(n), rare)."""
+        shift = self._shift or 0.0
+        self._sum.reset(math.fsum(v - shift for _, v in self._data))
+        self._sumsq.reset(math.fsum((v - shift) ** 2 for _, v in self._data))
+        self._updates = 0
 
     def average(self) -> float | None:
         """
-        Compute rolling mean of current window.
+        Rolling mean of current window, O(1).
         Returns None if window is empty.
         """
         if not self._data:
             return None
-        return sum(v for _, v in self._data) / len(self._data)
+        return self._shift + self._sum.total / len(self._data)
+
+    def variance(self) -> float | None:
+        """Population variance of current window, O(1). None if empty."""
+        if not self._data:
+            return None
+        n = len(self._data)
+        mean_d = self._sum.total / n
+        return max(0.0, self._sumsq.total / n - mean_d * mean_d)
+
+    def std(self) -> float | None:
+        """Population standard deviation of current window, O(1). None if empty."""
+        var = self.variance()
+        return None if var is None else math.sqrt(var)
+
+    def zscore(self, value: float) -> float | None:
+        """
+        How many standard deviations `value` sits from the window mean.
+        None if empty; 0.0 if the window has no spread.
+        """
+        std = self.std()
+        if std is None:
+            return None
+        if std == 0:
+            return 0.0
+        return (value - self.average()) / std
+
+    def min(self) -> float | None:
+        """Smallest value in the window, O(1). None if empty."""
+        return self._min[0][1] if self._data else None
+
+    def max(self) -> float | None:
+        """Largest value in the window, O(1). None if empty."""
+        return self._max[0][1] if self._data else None
 
     def count(self) -> int:
         """Message velocity: number of data points in current window."""
@@ -67,6 +183,11 @@ class SlidingWindow:
 
 # --- Decoupling Metrics ---
 
+# Default alert thresholds (see check_alert)
+ALERT_HYPE_THRESHOLD = 1
+ALERT_MAX_PRICE_MOVE = 0.02
+
+
 def delta_price(p_current: float, p_avg: float) -> float | None:
     """
     Relative price move from rolling average.
@@ -99,22 +220,141 @@ def hype_momentum(dv: float, n: int) -> float:
     return dv * n
 
 
-def check_alert(m_hype: float, dp: float) -> str | None:
+def check_alert(
+    m_hype: float,
+    dp: float | None,
+    hype_threshold: float = ALERT_HYPE_THRESHOLD,
+    max_price_move: float = ALERT_MAX_PRICE_MOVE,
+) -> str | None:
     """
     Fire alert if hype is high but price hasn't moved yet.
 
     Conditions:
-        M_hype > 100  → strong positive vibe with high message volume
-        ΔP < 0.02     → price has NOT reacted yet (< 2% move)
+        M_hype > hype_threshold  → strong positive vibe with high message volume
+        ΔP < max_price_move      → price has NOT reacted yet (default < 2% move)
 
     Returns:
         "IMMINENT_HYPE_PUMP" or None
     """
-    if m_hype > 1 and dp < 0.02:
+    if dp is not None and m_hype > hype_threshold and dp < max_price_move:
         return "IMMINENT_HYPE_PUMP"
     return None
 
 
+def compute_signal(
+    ticker: str,
+    p_current: float,
+    p_avg: float,
+    v_current: float,
+    v_avg: float,
+    n: int,
+    timestamp: float,
+    hype_threshold: float = ALERT_HYPE_THRESHOLD,
+    max_price_move: float = ALERT_MAX_PRICE_MOVE,
+) -> dict:
+    """
+    Decoupling signal row from window aggregates (no I/O, no clock), shared
+    by the live processor and historical replay.
+
+    Args:
+        n: vibe message count in the window (M_hype volume gate)
+        timestamp: time the signal is stamped with
+    """
+    dp = delta_price(p_current, p_avg)
+    dv = delta_vibe(v_current, v_avg)
+    mh = hype_momentum(dv, n)
+    return {
+        "ticker": ticker,
+        "timestamp": timestamp,
+        "price_current": p_current,
+        "price_avg": p_avg,
+        "vibe_current": v_current,
+        "vibe_avg": v_avg,
+        "delta_price": dp,
+        "delta_vibe": dv,
+        "hype_momentum": mh,
+        "alert": check_alert(mh, dp, hype_threshold, max_price_move),   # NULL in DB when no alert
+    }
+
+
+# --- Batch (vectorized) metrics ---
+
+def compute_metrics_batch(
+    p_current: np.ndarray,
+    p_avg: np.ndarray,
+    v_current: np.ndarray,
+    v_avg: np.ndarray,
+    n: np.ndarray,
+    hype_threshold: float = ALERT_HYPE_THRESHOLD,
+    max_price_move: float = ALERT_MAX_PRICE_MOVE,
+) -> dict[str, np.ndarray]:
+    """
+    delta_price / delta_vibe / hype_momentum / check_alert for many tickers
+    at once: one NumPy pass over arrays with one entry per ticker, same
+    results as the scalar functions.
+
+    ΔP is NaN where p_avg is 0 (the scalar None); those tickers never alert.
+
+    Returns:
+        {"delta_price", "delta_vibe", "hype_momentum": float arrays,
+         "alert": bool array (True = IMMINENT_HYPE_PUMP)}
+    """
+    p_current = np.asarray(p_current, dtype=np.float64)
+    p_avg = np.asarray(p_avg, dtype=np.float64)
+    dp = np.full(p_avg.shape, np.nan)
+    np.divide(p_current - p_avg, p_avg, out=dp, where=p_avg != 0)
+    dv = np.asarray(v_current, dtype=np.float64) - np.asarray(v_avg, dtype=np.float64)
+    mh = dv * np.asarray(n, dtype=np.float64)
+    # NaN ΔP compares False, so the zero-average guard carries through
+    alert = (mh > hype_threshold) & (dp < max_price_move)
+    return {"delta_price": dp, "delta_vibe": dv, "hype_momentum": mh, "alert": alert}
+
+
+def compute_signals(
+    tickers: list[str],
+    p_current: np.ndarray,
+    p_avg: np.ndarray,
+    v_current: np.ndarray,
+    v_avg: np.ndarray,
+    n: np.ndarray,
+    timestamp: float,
+    hype_threshold: float = ALERT_HYPE_THRESHOLD,
+    max_price_move: float = ALERT_MAX_PRICE_MOVE,
+) -> list[dict]:
+    """
+    compute_signal() for every ticker in `tickers` (arrays aligned with it):
+    the metrics are computed with compute_metrics_batch(), then turned into
+    the same signal rows.
+    """
+    m = compute_metrics_batch(p_current, p_avg, v_current, v_avg, n, hype_threshold, max_price_move)
+    columns = zip(
+        tickers,
+        np.asarray(p_current, dtype=np.float64).tolist(),
+        np.asarray(p_avg, dtype=np.float64).tolist(),
+        np.asarray(v_current, dtype=np.float64).tolist(),
+        np.asarray(v_avg, dtype=np.float64).tolist(),
+        m["delta_price"].tolist(),
+        m["delta_vibe"].tolist(),
+        m["hype_momentum"].tolist(),
+        m["alert"].tolist(),
+    )
+    return [
+        {
+            "ticker": ticker,
+            "timestamp": timestamp,
+            "price_current": pc,
+            "price_avg": pa,
+            "vibe_current": vc,
+            "vibe_avg": va,
+            "delta_price": None if math.isnan(dp) else dp,
+            "delta_vibe": dv,
+            "hype_momentum": mh,
+            "alert": "IMMINENT_HYPE_PUMP" if alert else None,
+        }
+        for ticker, pc, pa, vc, va, dp, dv, mh, alert in columns
+    ]
+
+
 # --- Run standalone to verify math ---
 if __name__ == "__main__":
     print("=== SlidingWindow Test ===")
@@ -126,6 +366,9 @@ if __name__ == "__main__":
     print(f"Count  : {window.count()}")
     print(f"Average: {window.average():.4f}")
     print(f"Latest : {window.latest()}")
+    print(f"Std    : {window.std():.4f}")
+    print(f"Min/Max: {window.min()} / {window.max()}")
+    print(f"Z(0.8) : {window.zscore(0.8):.4f}")
     print(window)
 
     print("\n=== Decoupling Metrics Test ===")
@@ -137,4 +380,26 @@ if __name__ == "__main__":
     print(f"ΔP           : {dp:.4f}")
     print(f"ΔV           : {dv:.4f}")
     print(f"M_hype       : {mh:.2f}")
-    print(f"Alert        : {alert}")
\ No newline at end of file
+    print(f"Alert        : {alert}")
+
+    print("\n=== Batch Metrics Test ===")
+    rng = np.random.default_rng(0)
+    k = 1_000
+    p_avg = rng.uniform(1, 100, k)
+    p_avg[:10] = 0.0                                  # zero-average guard
+    p_cur = p_avg * rng.uniform(0.97, 1.03, k)
+    v_cur, v_avg = rng.uniform(-1, 1, k), rng.uniform(-0.2, 0.2, k)
+    counts = rng.integers(0, 50, k)
+    names = [f"coin{i}" for i in range(k)]
+
+    t0 = time.perf_counter()
+    loop = [compute_signal(*row, 0.0) for row in zip(names, p_cur, p_avg, v_cur, v_avg, counts.tolist())]
+    t1 = time.perf_counter()
+    batch = compute_signals(names, p_cur, p_avg, v_cur, v_avg, counts, 0.0)
+    t2 = time.perf_counter()
+    metrics_only = compute_metrics_batch(p_cur, p_avg, v_cur, v_avg, counts)
+    t3 = time.perf_counter()
+
+    print(f"Match        : {batch == loop} ({sum(1 for s in batch if s['alert'])} alerts)")
+    print(f"{k} tickers : loop {(t1 - t0) * 1e3:.2f} ms | compute_signals {(t2 - t1) * 1e3:.2f} ms"
+          f" | compute_metrics_batch {(t3 - t2) * 1e3:.3f} ms")
@@ -0,0 +1,237 @@
+import bisect
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets (seconds): 10µs .. 60s
+LATENCY_BUCKETS = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class _Metric:
+    """
+    Base for one metric family. Children are keyed by label values; the hot
+    path is a dict lookup plus a few arithmetic ops, no locking (creating a
+    new label combination takes the lock once).
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _child(self, key: tuple):
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. records consumed per topic."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return [0.0]
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        self._child(label_values)[0] += amount
+
+    def value(self, *label_values) -> float:
+        child = self._children.get(label_values)
+        return child[0] if child else 0.0
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_str(key)} {_num(child[0])}"]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, e.g. rows waiting in the DB writer."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return [0.0]
+
+    def set(self, *label_values, value: float) -> None:
+        self._child(label_values)[0] = value
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_str(key)} {_num(child[0])}"]
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)   # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram (Prometheus semantics: cumulative buckets, _sum,
+    _count). observe() is one bisect over the bucket bounds.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(len(self.buckets))
+
+    def observe(self, value: float, *label_values) -> None:
+        child = self._child(label_values)
+        child.counts[bisect.bisect_left(self.buckets, value)] += 1
+        child.sum += value
+        child.count += 1
+
+    def snapshot(self, *label_values) -> dict:
+        """count / sum / p50 / p99 (bucket upper bounds) for one label set."""
+        child = self._children.get(label_values)
+        if child is None or child.count == 0:
+            return {"count": 0, "sum": 0.0, "p50": None, "p99": None}
+        return {
+            "count": child.count,
+            "sum": child.sum,
+            "p50": self._quantile(child, 0.50),
+            "p99": self._quantile(child, 0.99),
+        }
+
+    def _quantile(self, child: _HistogramChild, q: float) -> float:
+        target = q * child.count
+        running = 0
+        for bound, n in zip(self.buckets + (math.inf,), child.counts):
+            running += n
+            if running >= target:
+                return bound
+        return math.inf
+
+    def _render_child(self, key, child):
+        lines = []
+        running = 0
+        for bound, n in zip(self.buckets, child.counts):
+            running += n
+            le = 'le="' + _num(bound) + '"'
+            lines.append(f"{self.name}_bucket{self._label_str(key, le)} {running}")
+        le = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{self._label_str(key, le)} {child.count}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {_num(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {child.count}")
+        return lines
+
+
+def _num(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- Pipeline metrics ---
+
+RECORDS = Counter("ghostmarket_records_total", "Records consumed", ("topic",))
+BAD_RECORDS = Counter("ghostmarket_bad_records_total", "Records that failed to parse", ("stream",))
+CONSUME_LAG = Histogram("ghostmarket_consume_lag_seconds", "Kafka record timestamp to consume time", ("topic",))
+PARSE_SECONDS = Histogram("ghostmarket_parse_seconds", "Payload decode (binary or JSON) per record", ("stream",))
+INFERENCE_SECONDS = Histogram("ghostmarket_inference_seconds", "Sentiment scoring per batch (in the worker)")
+INFERENCE_BATCH = Histogram(
+    "ghostmarket_inference_batch_size", "Texts per sentiment batch (cache misses)", buckets=SIZE_BUCKETS,
+)
+SENTIMENT_IN_FLIGHT = Gauge("ghostmarket_sentiment_in_flight_batches", "Batches submitted to the sentiment pool, not yet applied")
+WINDOW_UPDATE_SECONDS = Histogram("ghostmarket_window_update_seconds", "Window add per data point", ("ticker", "stream"))
+SIGNAL_SECONDS = Histogram(
+    "ghostmarket_signal_compute_seconds", "compute_and_alert_batch per loop iteration (all changed tickers)",
+)
+EVENT_TO_SIGNAL = Histogram(
+    "ghostmarket_event_to_signal_seconds", "Newest event timestamp to signal computed", ("ticker",),
+)
+SIGNALS = Counter("ghostmarket_signals_total", "Signals computed", ("ticker",))
+ALERTS = Counter("ghostmarket_alerts_total", "Alerts fired", ("ticker", "alert"))
+DB_FLUSH_SECONDS = Histogram("ghostmarket_db_flush_seconds", "BulkWriter flush latency")
+DB_ROWS = Counter("ghostmarket_db_rows_total", "Rows written by BulkWriter flushes")
+DB_PENDING = Gauge("ghostmarket_db_pending_rows", "Rows buffered in BulkWriter")
+
+REGISTRY = [
+    RECORDS, BAD_RECORDS, CONSUME_LAG, PARSE_SECONDS, INFERENCE_SECONDS, INFERENCE_BATCH, SENTIMENT_IN_FLIGHT,
+    WINDOW_UPDATE_SECONDS, SIGNAL_SECONDS, EVENT_TO_SIGNAL, SIGNALS, ALERTS,
+    DB_FLUSH_SECONDS, DB_ROWS, DB_PENDING,
+]
+
+
+def render(registry=None) -> str:
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in registry or REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass   # no access log per scrape
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Expose /metrics on a daemon thread. Returns the server (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"[INFO] Metrics on http://{host}:{port}/metrics")
+    return server
+
+
+# --- Run standalone to see the exposition format and observe() cost ---
+if __name__ == "__main__":
+    n = 1_000_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        WINDOW_UPDATE_SECONDS.observe(i * 1e-9, "bitcoin", "price")
+    elapsed = time.perf_counter() - t0
+    RECORDS.inc("bitcoin")
+    print(render().split("# HELP ghostmarket_signal_compute_seconds")[0][-900:])
+    print(f"observe(): {elapsed / n * 1e9:.0f} ns/call")
+    print(WINDOW_UPDATE_SECONDS.snapshot("bitcoin", "price"))
@@ -0,0 +1,266 @@
+import math
+import time
+
+import numpy as np
+
+# Views answered from the same panes: name -> seconds
+RESOLUTIONS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+
+
+class _Panes:
+    """
+    One ticker's ring of pre-aggregated panes. Slot i holds pane `ids[i]`
+    (pane number = timestamp // pane_seconds, -1 = never used); a slot is
+    reset when a newer pane claims it, so memory never grows.
+    """
+
+    __slots__ = ("ids", "count", "sum", "sumsq", "min", "max", "shift", "max_ts", "latest", "late")
+
+    def __init__(self, n_panes: int):
+        self.ids = np.full(n_panes, -1, dtype=np.int64)
+        self.count = np.zeros(n_panes, dtype=np.int64)
+        # Sums over (value - shift), shift = first value ever added (as in WindowStore)
+        self.sum = np.zeros(n_panes, dtype=np.float64)
+        self.sumsq = np.zeros(n_panes, dtype=np.float64)
+        self.min = np.full(n_panes, np.inf)
+        self.max = np.full(n_panes, -np.inf)
+        self.shift: float | None = None
+        self.max_ts = -math.inf   # newest event time seen (drives the watermark)
+        self.latest: float | None = None
+        self.late = 0
+
+
+class PaneStore:
+    """
+    Event-time windows at several resolutions from one bounded buffer per
+    ticker.
+
+    Points are folded into fixed panes (default 10s) holding count, sum,
+    sum of squares, min and max; a 1m / 5m / 15m / 1h aggregate combines the
+    last 6 / 30 / 90 / 360 panes. Memory is n_panes x 48 bytes per ticker,
+    whatever the message rate.
+
+    Out-of-order points land in their own pane as long as they are within
+    `allowed_lateness` of the newest event time seen for the ticker (the
+    watermark); older points are dropped and counted in late_events.
+    Aggregates are pane-aligned: "1m" covers the pane containing `now` plus
+    the 5 before it.
+
+    Usage:
+        panes = PaneStore(pane_seconds=10, horizon_seconds=3600, allowed_lateness=30)
+        panes.register("bitcoin")
+        panes.add("bitcoin", 62500.0, ts)
+        panes.aggregate("bitcoin", 300)          # {"count", "mean", "std", "min", "max"}
+        panes.multi("bitcoin")                   # {"1m": {...}, "5m": {...}, ...}
+    """
+
+    def __init__(self, pane_seconds: int = 10, horizon_seconds: int = 3600, allowed_lateness: float = 30.0):
+        """
+        Args:
+            pane_seconds: Pane width; every resolution must be a multiple of it.
+            horizon_seconds: Longest window that can be asked for. Default = 1 hour.
+            allowed_lateness: How far (seconds) behind the newest event a point
+                may arrive and still be counted.
+        """
+        self.pane_seconds = pane_seconds
+        self.horizon_seconds = horizon_seconds
+        self.allowed_lateness = allowed_lateness
+        # Horizon + lateness, so a late point's pane is never recycled while it may still arrive
+        self.n_panes = math.ceil(horizon_seconds / pane_seconds) + math.ceil(allowed_lateness / pane_seconds) + 1
+        self.late_events = 0
+        self._panes: dict[str, _Panes] = {}
+
+    # --- Ticker registry ---
+
+    def register(self, ticker: str) -> None:
+        """Start tracking `ticker` (no-op if already tracked)."""
+        if ticker not in self._panes:
+            self._panes[ticker] = _Panes(self.n_panes)
+
+    def tickers(self) -> list[str]:
+        return list(self._panes)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._panes
+
+    def __iter__(self):
+        return iter(self._panes)
+
+    def __len__(self) -> int:
+        return len(self._panes)
+
+    # --- Writes ---
+
+    def add(self, ticker: str, value: float, timestamp: float | None = None) -> bool:
+        """
+        Fold a data point into its pane.
+
+        Args:
+            ticker: A registered ticker.
+            value: The numeric value to store (price or vibe score).
+            timestamp: Unix event timestamp. Defaults to now if not provided.
+
+        Returns:
+            False if the point was behind the watermark and dropped.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        p = self._panes[ticker]
+        if timestamp < p.max_ts - self.allowed_lateness:
+            p.late += 1
+            self.late_events += 1
+            return False
+
+        pane = int(timestamp // self.pane_seconds)
+        slot = pane % self.n_panes
+        if p.ids[slot] != pane:
+            # Claim the slot: whatever it held is older than the horizon
+            p.ids[slot] = pane
+            p.count[slot] = 0
+            p.sum[slot] = 0.0
+            p.sumsq[slot] = 0.0
+            p.min[slot] = np.inf
+            p.max[slot] = -np.inf
+
+        if p.shift is None:
+            p.shift = float(value)
+        d = value - p.shift
+        p.count[slot] += 1
+        p.sum[slot] += d
+        p.sumsq[slot] += d * d
+        if value < p.min[slot]:
+            p.min[slot] = value
+        if value > p.max[slot]:
+            p.max[slot] = value
+
+        if timestamp >= p.max_ts:
+            p.max_ts = timestamp
+            p.latest = value
+        return True
+
+    # --- Reads ---
+
+    def watermark(self, ticker: str) -> float | None:
+        """
+        Event time before which `ticker` accepts no more points (None before
+        the first one). Aggregates with now <= watermark are final.
+        """
+        p = self._panes[ticker]
+        return None if p.max_ts == -math.inf else p.max_ts - self.allowed_lateness
+
+    def latest(self, ticker: str) -> float | None:
+        """Value of the newest event (by event time). None if empty."""
+        return self._panes[ticker].latest
+
+    def aggregate(self, ticker: str, seconds: int, now: float | None = None) -> dict | None:
+        """
+        count / mean / std (population) / min / max over the panes covering
+        the last `seconds` up to `now` (default: the newest event time).
+        None if the ticker has no data; count 0 (and None stats) if the
+        window is empty.
+        """
+        return self.multi(ticker, now, {"": seconds})[""]
+
+    def multi(self, ticker: str, now: float | None = None, resolutions: dict[str, int] = RESOLUTIONS) -> dict:
+        """
+        aggregate() at every resolution, e.g. {"1m": {...}, "5m": {...}, "15m": {...}, "1h": {...}},
+        from one pass over the panes (newest first, cumulative sums read at
+        each resolution's pane count).
+        """
+        longest = max(resolutions.values())
+        if longest > self.horizon_seconds:
+            raise ValueError(f"{longest}s window exceeds the {self.horizon_seconds}s horizon")
+        p = self._panes[ticker]
+        if p.max_ts == -math.inf:
+            return {name: None for name in resolutions}
+        now = p.max_ts if now is None else now
+
+        # Pane ids from `now` backwards, and the slots that actually hold them
+        wanted = int(now // self.pane_seconds) - np.arange(math.ceil(longest / self.pane_seconds))
+        slots = wanted % self.n_panes
+        live = p.ids[slots] == wanted
+        count = np.cumsum(np.where(live, p.count[slots], 0))
+        total = np.cumsum(np.where(live, p.sum[slots], 0.0))
+        total_sq = np.cumsum(np.where(live, p.sumsq[slots], 0.0))
+        low = np.minimum.accumulate(np.where(live, p.min[slots], np.inf))
+        high = np.maximum.accumulate(np.where(live, p.max[slots], -np.inf))
+
+        out = {}
+        for name, seconds in resolutions.items():
+            k = math.ceil(seconds / self.pane_seconds) - 1
+            n = int(count[k])
+            if n == 0:
+                out[name] = {"count": 0, "mean": None, "std": None, "min": None, "max": None}
+                continue
+            mean_d = float(total[k]) / n
+            var = max(0.0, float(total_sq[k]) / n - mean_d * mean_d)
+            out[name] = {
+                "count": n,
+                "mean": p.shift + mean_d,
+                "std": math.sqrt(var),
+                "min": float(low[k]),
+                "max": float(high[k]),
+            }
+        return out
+
+    def nbytes(self) -> int:
+        """Bytes allocated for panes across all tickers (fixed per ticker)."""
+        return sum(
+            p.ids.nbytes + p.count.nbytes + p.sum.nbytes + p.sumsq.nbytes + p.min.nbytes + p.max.nbytes
+            for p in self._panes.values()
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PaneStore(pane={self.pane_seconds}s, horizon={self.horizon_seconds}s, "
+            f"tickers={len(self._panes)}, late={self.late_events})"
+        )
+
+
+# --- Run standalone to check against exact aggregates and show memory ---
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+    start = 1_740_000_000.0
+
+    for rate in (1, 100):
+        n = 3_600 * rate
+        ts = start + np.sort(rng.uniform(0, 3_600, n))
+        arrival = ts + rng.exponential(2.0, n)     # network / producer jitter
+        arrival[rng.random(n) < 0.001] += 120     # a few very late stragglers
+        order = np.argsort(arrival)
+        values = 62_000 + np.cumsum(rng.normal(0, 5, n))
+
+        panes = PaneStore()
+        panes.register("bitcoin")
+        t0 = time.perf_counter()
+        for i in order:
+            panes.add("bitcoin", values[i], ts[i])
+        add_us = (time.perf_counter() - t0) / n * 1e6
+
+        accepted = np.ones(n, dtype=bool)
+        newest = -math.inf
+        for i in order:   # replay the watermark rule to know what was kept
+            accepted[i] = ts[i] >= newest - panes.allowed_lateness
+            newest = max(newest, ts[i])
+
+        now = ts.max()
+        views = panes.multi("bitcoin")
+        t0 = time.perf_counter()
+        for _ in range(1_000):
+            panes.multi("bitcoin")
+        multi_us = (time.perf_counter() - t0) * 1e3
+
+        pane = panes.pane_seconds
+        ok = True
+        for name, seconds in RESOLUTIONS.items():
+            lo = (int(now // pane) - math.ceil(seconds / pane) + 1) * pane
+            exact = values[accepted & (ts >= lo)]
+            got = views[name]
+            ok &= got["count"] == len(exact) and math.isclose(got["mean"], exact.mean(), rel_tol=1e-12) \
+                and math.isclose(got["std"], exact.std(), rel_tol=1e-6) and got["max"] == exact.max()
+
+        print(f"{rate:>3}/s: {n:>7,} points, {panes.late_events} late | add {add_us:.2f} µs | "
+              f"multi {multi_us:.0f} µs | panes {panes.nbytes() / 1e3:.0f} kB "
+              f"(raw 1h window: {n * 16 / 1e3:,.0f} kB) | match: {ok}")
+    print(panes.multi("bitcoin")["5m"])
@@ -0,0 +1,222 @@
+import argparse
+import os
+import time
+
+import duckdb
+
+from window_store import WindowStore
+from math_utils import ALERT_HYPE_THRESHOLD, ALERT_MAX_PRICE_MOVE, compute_signal
+from db import TABLE_COLUMNS, connect_local, create_signals_table, get_connection, insert_columns
+
+REPLAY_TABLE = "decoupling_signals_replay"   # default output, never the live table
+CHUNK_ROWS = 50_000                          # events fetched from DuckDB per chunk
+WRITE_ROWS = 50_000                          # signals buffered per output insert
+
+PRICE_EVENT, SOCIAL_EVENT = 0, 1
+
+_READERS = {".parquet": "read_parquet", ".jsonl": "read_json_auto", ".json": "read_json_auto", ".csv": "read_csv_auto"}
+
+
+def open_dump(prices_path: str, social_path: str) -> duckdb.DuckDBPyConnection:
+    """
+    In-memory DuckDB exposing JSONL / Parquet / CSV dumps as the
+    price_snapshots and social_signals views replay reads from.
+    Dumps need the table's columns (social rows must carry vibe_score).
+    """
+    con = duckdb.connect()
+    for view, path in (("price_snapshots", prices_path), ("social_signals", social_path)):
+        reader = _READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise ValueError(f"Unsupported dump format: {path} (expected {', '.join(_READERS)})")
+        literal = path.replace("'", "''")   # views can't take prepared parameters
+        con.execute(f"CREATE VIEW {view} AS SELECT * FROM {reader}('{literal}')")
+    return con
+
+
+def iter_events(
+    con: duckdb.DuckDBPyConnection,
+    start: float | None = None,
+    end: float | None = None,
+    tickers: list[str] | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+):
+    """
+    Stream (kind, ticker, value, timestamp) tuples from price_snapshots and
+    social_signals, merged in event-time order (prices first on ties), fetched
+    `chunk_rows` at a time. Social rows reuse their stored vibe_score.
+    """
+    filters, params = [], []
+    if start is not None:
+        filters.append("timestamp >= ?")
+        params.append(start)
+    if end is not None:
+        filters.append("timestamp < ?")
+        params.append(end)
+    if tickers:
+        filters.append(f"ticker IN ({', '.join('?' for _ in tickers)})")
+        params.extend(tickers)
+    where = " AND ".join(filters) or "TRUE"
+
+    cursor = con.cursor()
+    cursor.execute(
+        f"""
+        SELECT {PRICE_EVENT} AS kind, ticker, price_usd AS value, timestamp
+        FROM price_snapshots WHERE {where} AND price_usd IS NOT NULL
+        UNION ALL
+        SELECT {SOCIAL_EVENT}, ticker, vibe_score, timestamp
+        FROM social_signals WHERE {where} AND vibe_score IS NOT NULL
+        ORDER BY timestamp, kind
+        """,
+        params + params,
+    )
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+class Replayer:
+    """
+    Runs historical events through the processor's window -> metrics -> alert
+    path (WindowStore + compute_signal), one signal per event for the event's
+    ticker, stamped with event time. No Kafka, no FinBERT.
+
+    Usage:
+        replayer = Replayer(hype_threshold=5)
+        stats = replayer.run(iter_events(con), out_con)
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 300,
+        hype_threshold: float = ALERT_HYPE_THRESHOLD,
+        max_price_move: float = ALERT_MAX_PRICE_MOVE,
+        speed: float | None = None,
+    ):
+        """
+        Args:
+            window_seconds: Sliding window length, as in the live processor.
+            hype_threshold / max_price_move: Alert thresholds under test.
+            speed: Replay at `speed` x real time (e.g. 60 = an hour per minute);
+                None = as fast as possible.
+        """
+        self.hype_threshold = hype_threshold
+        self.max_price_move = max_price_move
+        self.speed = speed
+        self.price_windows = WindowStore(window_seconds=window_seconds)
+        self.vibe_windows = WindowStore(window_seconds=window_seconds)
+
+    def feed(self, kind: int, ticker: str, value: float, timestamp: float) -> dict | None:
+        """Apply one event; returns the ticker's signal, or None while it has no price yet."""
+        if ticker not in self.price_windows:
+            self.price_windows.register(ticker)
+            self.vibe_windows.register(ticker)
+
+        windows = self.price_windows if kind == PRICE_EVENT else self.vibe_windows
+        windows.add(ticker, value, timestamp)
+
+        p_current = self.price_windows.latest(ticker)
+        if p_current is None:
+            return None
+        v_current = self.vibe_windows.latest(ticker)
+        return compute_signal(
+            ticker,
+            p_current,
+            self.price_windows.average(ticker),
+            0.0 if v_current is None else v_current,       # no vibe yet: neutral
+            self.vibe_windows.average(ticker) or 0.0,
+            self.vibe_windows.count(ticker),
+            timestamp,
+            self.hype_threshold,
+            self.max_price_move,
+        )
+
+    def run(self, events, out_con: duckdb.DuckDBPyConnection, table: str = REPLAY_TABLE) -> dict:
+        """
+        Replay `events` into a freshly created `table` on `out_con`.
+        Returns counters: events, signals, alerts, seconds, events_per_s.
+        """
+        create_signals_table(out_con, table, replace=True)
+        columns = TABLE_COLUMNS["decoupling_signals"]
+        buffer = [[] for _ in columns]
+        stats = {"events": 0, "signals": 0, "alerts": 0}
+
+        started = time.perf_counter()
+        first_ts = None
+        for kind, ticker, value, timestamp in events:
+            stats["events"] += 1
+
+            if self.speed:
+                if first_ts is None:
+                    first_ts = timestamp
+                ahead = (timestamp - first_ts) / self.speed - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+            signal = self.feed(kind, ticker, value, timestamp)
+            if signal is None:
+                continue
+            stats["signals"] += 1
+            if signal["alert"]:
+                stats["alerts"] += 1
+            for column, name in zip(buffer, columns):
+                column.append(signal[name])
+
+            if len(buffer[0]) >= WRITE_ROWS:
+                insert_columns(out_con, table, columns, buffer)
+                buffer = [[] for _ in columns]
+
+        insert_columns(out_con, table, columns, buffer)
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        stats["events_per_s"] = round(stats["events"] / stats["seconds"]) if stats["seconds"] else 0
+        return stats
+
+
+# --- Run standalone to backtest thresholds over stored history ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay stored prices/vibes into a fresh signals table.")
+    parser.add_argument("--db", help="DuckDB file to read (default: the processor's GHOSTMARKET_DB_MODE connection)")
+    parser.add_argument("--prices", help="price_snapshots dump (.jsonl / .parquet / .csv) instead of a DB")
+    parser.add_argument("--social", help="social_signals dump (.jsonl / .parquet / .csv) instead of a DB")
+    parser.add_argument("--out-db", help="DuckDB file to write signals to (default: same as the source DB)")
+    parser.add_argument("--table", default=REPLAY_TABLE, help=f"output table, replaced (default: {REPLAY_TABLE})")
+    parser.add_argument("--start", type=float, help="first event timestamp (unix seconds)")
+    parser.add_argument("--end", type=float, help="stop before this timestamp (unix seconds)")
+    parser.add_argument("--tickers", help="comma-separated tickers (default: all)")
+    parser.add_argument("--window", type=int, default=300, help="window seconds (default: 300)")
+    parser.add_argument("--hype-threshold", type=float, default=ALERT_HYPE_THRESHOLD)
+    parser.add_argument("--max-price-move", type=float, default=ALERT_MAX_PRICE_MOVE)
+    parser.add_argument("--speed", type=float, help="replay speed-up factor (default: as fast as possible)")
+    args = parser.parse_args()
+
+    if bool(args.prices) != bool(args.social):
+        parser.error("--prices and --social go together")
+    if args.table == "decoupling_signals":
+        parser.error("refusing to overwrite the live decoupling_signals table")
+
+    if args.prices:
+        source = open_dump(args.prices, args.social)
+    elif args.db:
+        source = connect_local(args.db)
+    else:
+        source = get_connection()
+    if args.out_db:
+        out = connect_local(args.out_db)
+    elif args.prices:
+        parser.error("--out-db is required when replaying dumps")
+    else:
+        out = source
+
+    events = iter_events(source, args.start, args.end, args.tickers.split(",") if args.tickers else None)
+    replayer = Replayer(args.window, args.hype_threshold, args.max_price_move, args.speed)
+    stats = replayer.run(events, out, args.table)
+    print(f"[INFO] Replay done → {args.table}: {stats}")
+
+    if out is not source:
+        out.close()
+    source.close()
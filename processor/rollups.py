@@ -0,0 +1,146 @@
+import math
+import zlib
+
+ROLLUP_SECONDS = 60   # bucket width of *_rollup_1m tables
+
+# Distinct-source sketch: each source sets one bit of a 63-bit mask (fits a
+# signed BIGINT). OR-ing masks merges sketches; linear counting turns the
+# number of set bits back into a distinct-count estimate. Always an estimate:
+# sources whose crc32 lands on the same bit count once, so expect undercounts
+# (even with a handful of sources) that grow with the number of sources.
+SKETCH_BITS = 63
+
+
+def bucket_start(timestamp: float) -> int:
+    """Unix seconds of the start of the rollup bucket containing `timestamp`."""
+    return int(timestamp // ROLLUP_SECONDS) * ROLLUP_SECONDS
+
+
+def source_bit(source: str | None) -> int:
+    """Sketch bit for one source (0 for NULL, like COUNT(DISTINCT) ignores NULLs)."""
+    if source is None:
+        return 0
+    return 1 << (zlib.crc32(source.encode("utf-8")) % SKETCH_BITS)
+
+
+def estimate_distinct(sketch: int | None) -> int:
+    """Linear-counting estimate of distinct sources from an OR-ed sketch."""
+    if not sketch:
+        return 0
+    set_bits = bin(sketch).count("1")
+    zeros = SKETCH_BITS - set_bits
+    if zeros == 0:
+        return SKETCH_BITS  # saturated: at least this many
+    return round(-SKETCH_BITS * math.log(zeros / SKETCH_BITS))
+
+
+class RollupBuilder:
+    """
+    Accumulates per (ticker, minute) partial aggregates as the processor ingests
+    rows, and hands them to the BulkWriter on every flush.
+
+    Rollup tables are append-only: a minute that spans several flushes gets
+    several partial rows, and readers SUM / MIN / MAX / bit_or them. That keeps
+    writes to plain appends (no upserts), which the staging sync relies on.
+
+    Usage:
+        rollups = RollupBuilder()
+        writer = BulkWriter(con, before_flush=rollups.drain_into)
+        rollups.add_price("bitcoin", 62500.0, ts)
+    """
+
+    def __init__(self):
+        # (ticker, minute) -> [n, vibe_sum, vibe_min, vibe_max, source_sketch]
+        self._social: dict[tuple[str, int], list] = {}
+        # (ticker, minute) -> [n, price_sum, price_min, price_max]
+        self._price: dict[tuple[str, int], list] = {}
+
+    def add_social(self, ticker: str, vibe_score: float, source: str | None, timestamp: float) -> None:
+        key = (ticker, bucket_start(timestamp))
+        acc = self._social.get(key)
+        if acc is None:
+            self._social[key] = [1, vibe_score, vibe_score, vibe_score, source_bit(source)]
+            return
+        acc[0] += 1
+        acc[1] += vibe_score
+        acc[2] = min(acc[2], vibe_score)
+        acc[3] = max(acc[3], vibe_score)
+        acc[4] |= source_bit(source)
+
+    def add_price(self, ticker: str, price_usd: float, timestamp: float) -> None:
+        key = (ticker, bucket_start(timestamp))
+        acc = self._price.get(key)
+        if acc is None:
+            self._price[key] = [1, price_usd, price_usd, price_usd]
+            return
+        acc[0] += 1
+        acc[1] += price_usd
+        acc[2] = min(acc[2], price_usd)
+        acc[3] = max(acc[3], price_usd)
+
+    def drain_into(self, writer) -> None:
+        """Queue every accumulated partial rollup on `writer` and reset."""
+        social, self._social = self._social, {}
+        price, self._price = self._price, {}
+        for (ticker, minute), acc in social.items():
+            writer.add("social_rollup_1m", (ticker, minute, *acc))
+        for (ticker, minute), acc in price.items():
+            writer.add("price_rollup_1m", (ticker, minute, *acc))
+
+    def __len__(self) -> int:
+        return len(self._social) + len(self._price)
+
+
+def backfill_rollups(con) -> None:
+    """
+    Build rollups from the raw tables for history the processor never rolled
+    up: per ticker, every minute before that ticker's first existing rollup
+    (all of it for tickers with no rollups). Safe to re-run. The minute the
+    live rollups start in may stay partial (rows ingested before the deploy).
+    """
+    con.execute(f"""
+        INSERT INTO price_rollup_1m (ticker, minute, n, price_sum, price_min, price_max)
+        SELECT
+            p.ticker,
+            (floor(p.timestamp / {ROLLUP_SECONDS}) * {ROLLUP_SECONDS})::BIGINT AS minute,
+            COUNT(*), SUM(p.price_usd), MIN(p.price_usd), MAX(p.price_usd)
+        FROM price_snapshots p
+        LEFT JOIN (SELECT ticker, MIN(minute) AS first_minute FROM price_rollup_1m GROUP BY ticker) f
+            ON p.ticker = f.ticker
+        WHERE f.first_minute IS NULL OR p.timestamp < f.first_minute
+        GROUP BY 1, 2
+    """)
+
+    # Sketch bits are computed in Python (crc32) so they match live rollups
+    sources = [row[0] for row in con.execute("SELECT DISTINCT source FROM social_signals").fetchall()]
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS _source_bits (source TEXT, bit BIGINT)")
+    con.execute("DELETE FROM _source_bits")
+    if sources:
+        con.executemany("INSERT INTO _source_bits VALUES (?, ?)", [[s, source_bit(s)] for s in sources])
+    con.execute(f"""
+        INSERT INTO social_rollup_1m
+            (ticker, minute, n, vibe_sum, vibe_min, vibe_max, source_sketch)
+        SELECT
+            s.ticker,
+            (floor(s.timestamp / {ROLLUP_SECONDS}) * {ROLLUP_SECONDS})::BIGINT AS minute,
+            COUNT(*), SUM(s.vibe_score), MIN(s.vibe_score), MAX(s.vibe_score),
+            COALESCE(bit_or(b.bit), 0)
+        FROM social_signals s
+        LEFT JOIN _source_bits b ON s.source = b.source
+        LEFT JOIN (SELECT ticker, MIN(minute) AS first_minute FROM social_rollup_1m GROUP BY ticker) f
+            ON s.ticker = f.ticker
+        WHERE f.first_minute IS NULL OR s.timestamp < f.first_minute
+        GROUP BY 1, 2
+    """)
+
+
+# --- Run standalone to backfill rollups from existing raw rows ---
+if __name__ == "__main__":
+    from db import get_connection, init_schema
+
+    con = get_connection()
+    init_schema(con)
+    backfill_rollups(con)
+    for table in ("price_rollup_1m", "social_rollup_1m"):
+        print(f"{table}: {con.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]} rows")
+    con.close()
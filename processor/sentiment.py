@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+MODEL_NAME = os.getenv("SENTIMENT_MODEL", "ProsusAI/finbert")
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")        # torch | torch-int8 | onnx
+SENTIMENT_ONNX_DIR = os.getenv("SENTIMENT_ONNX_DIR", "finbert-onnx")
+SENTIMENT_THREADS = int(os.getenv("SENTIMENT_THREADS", "0"))       # intra-op threads; 0 = library default
+BATCH_SIZE = 32       # texts per forward pass
+MAX_TOKENS = 512      # FinBERT's max sequence length
+
+
+def to_vibe(label: str, confidence: float) -> float:
+    """
+    Map one FinBERT prediction to a score in [-1, +1].
+    positive  → +confidence
+    negative  → -confidence
+    neutral   → 0.0
+    """
+    if label == "positive":
+        return confidence
+    elif label == "negative":
+        return -confidence
+    else:
+        return 0.0
+
+
+class SentimentBackend:
+    """
+    A FinBERT scorer. Nothing is loaded until the first score() (or an
+    explicit load()), so importing the processor stays cheap.
+
+    Texts are length-bucketed (sorted by length) before batching so each padded
+    batch holds similarly sized texts, and the tokenizer truncates each text to
+    `max_tokens` tokens (instead of cutting characters).
+
+    Subclasses implement _load() and _predict(texts) -> [(label, confidence)].
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        batch_size: int = BATCH_SIZE,
+        max_tokens: int = MAX_TOKENS,
+        threads: int = SENTIMENT_THREADS,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.threads = threads
+        self.load_seconds: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.load_seconds is not None
+
+    def load(self) -> None:
+        """Load the model now (no-op if already loaded)."""
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            print(f"[INFO] Loading sentiment backend {self.name} ({self.model_name})...")
+            started = time.perf_counter()
+            self._load()
+            self.load_seconds = time.perf_counter() - started
+            print(f"[INFO] Sentiment backend {self.name} ready in {self.load_seconds:.1f}s.")
+
+    def score(self, texts: list[str]) -> list[float]:
+        """One score in [-1, +1] per text, in input order."""
+        if not texts:
+            return []
+        self.load()
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        predictions = self._predict([texts[i] for i in order])
+
+        scores = [0.0] * len(texts)
+        for i, (label, confidence) in zip(order, predictions):
+            scores[i] = to_vibe(label, confidence)
+        return scores
+
+    def _load(self) -> None:
+        raise NotImplementedError
+
+    def _predict(self, texts: list[str]) -> list[tuple[str, float]]:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        state = f"loaded in {self.load_seconds:.1f}s" if self.loaded else "not loaded"
+        return f"{type(self).__name__}({self.model_name}, {state})"
+
+
+class TorchBackend(SentimentBackend):
+    """
+    Hugging Face pipeline on PyTorch. With quantize=True the Linear layers are
+    converted to dynamic int8 (weights int8, activations quantized per batch),
+    which roughly halves CPU latency and model RAM for a small score drift.
+    """
+
+    def __init__(self, *args, quantize: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.quantize = quantize
+        self.name = "torch-int8" if quantize else "torch"
+        self._pipeline = None
+
+    def _load(self) -> None:
+        from transformers import pipeline
+
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+
+        if not self.quantize:
+            self._pipeline = pipeline("text-classification", model=self.model_name, tokenizer=self.model_name)
+            return
+
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name).eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self._pipeline = pipeline("text-classification", model=model, tokenizer=tokenizer)
+
+    def _predict(self, texts: list[str]) -> list[tuple[str, float]]:
+        results = self._pipeline(texts, batch_size=self.batch_size, truncation=True, max_length=self.max_tokens)
+        return [(result["label"], result["score"]) for result in results]
+
+
+class OnnxBackend(SentimentBackend):
+    """
+    ONNX Runtime on CPU, from a directory written by export_onnx() (model.onnx,
+    dynamically int8-quantized by default, plus tokenizer files and labels.json).
+    Needs onnxruntime + a tokenizer only; no PyTorch at serving time.
+    """
+
+    name = "onnx"
+
+    def __init__(self, *args, model_dir: str = SENTIMENT_ONNX_DIR, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.model_dir = model_dir
+        self._session = None
+        self._tokenizer = None
+        self._labels: list[str] = []
+        self._input_names: list[str] = []
+
+    def _load(self) -> None:
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(self.model_dir, "model.onnx")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found; create it with: python processor/sentiment.py --export-onnx {self.model_dir}"
+            )
+        options = ort.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self._session.get_inputs()]
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        with open(os.path.join(self.model_dir, "labels.json"), encoding="utf-8") as f:
+            self._labels = json.load(f)
+
+    def _predict(self, texts: list[str]) -> list[tuple[str, float]]:
+        out = []
+        for i in range(0, len(texts), self.batch_size):
+            encoded = self._tokenizer(
+                texts[i:i + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_tokens,
+                return_tensors="np",
+            )
+            feed = {name: encoded[name].astype(np.int64) for name in self._input_names}
+            logits = self._session.run(None, feed)[0]
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            best = probs.argmax(axis=1)
+            out.extend((self._labels[k], float(probs[row, k])) for row, k in enumerate(best))
+        return out
+
+
+BACKENDS = {
+    "torch": lambda **kw: TorchBackend(**kw),
+    "torch-int8": lambda **kw: TorchBackend(quantize=True, **kw),
+    "onnx": lambda **kw: OnnxBackend(**kw),
+}
+
+
+def get_backend(name: str = SENTIMENT_BACKEND, **kwargs) -> SentimentBackend:
+    """Backend by name (torch | torch-int8 | onnx), not loaded yet."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {name!r} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
+
+
+def export_onnx(model_dir: str, model_name: str = MODEL_NAME, quantize: bool = True) -> str:
+    """
+    Export `model_name` to `model_dir`/model.onnx (dynamic int8 unless
+    quantize=False) with its tokenizer and label order. Needs torch + onnxruntime.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    sample = tokenizer(["bitcoin to the moon", "dumping hard"], padding=True, return_tensors="pt")
+    input_names = list(sample.keys())   # input_ids, token_type_ids, attention_mask
+
+    fp32_path = os.path.join(model_dir, "model.fp32.onnx")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in input_names),
+        fp32_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+    )
+
+    model_path = os.path.join(model_dir, "model.onnx")
+    if quantize:
+        quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+    else:
+        os.replace(fp32_path, model_path)
+
+    tokenizer.save_pretrained(model_dir)
+    with open(os.path.join(model_dir, "labels.json"), "w", encoding="utf-8") as f:
+        json.dump([model.config.id2label[i] for i in range(model.config.num_labels)], f)
+    return model_path
+
+
+def compare_backends(names: list[str], texts: list[str], batch_size: int = BATCH_SIZE) -> list[dict]:
+    """
+    Load each backend, score `texts` in batches of `batch_size`, and report
+    load time, per-batch latency and parity with the first backend (max score
+    difference and sign agreement).
+    """
+    reference = None
+    rows = []
+    for name in names:
+        backend = get_backend(name, batch_size=batch_size)
+        backend.load()
+        backend.score(texts[:batch_size])   # warm-up
+        timings, scores = [], []
+        for i in range(0, len(texts), batch_size):
+            started = time.perf_counter()
+            scores += backend.score(texts[i:i + batch_size])
+            timings.append(time.perf_counter() - started)
+        scores = np.array(scores)
+        timings.sort()
+
+        row = {
+            "backend": name,
+            "load_s": backend.load_seconds,
+            "batch_p50_ms": timings[len(timings) // 2] * 1000,
+            "batch_p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+            "texts_per_s": len(texts) / sum(timings),
+        }
+        if reference is None:
+            reference = scores
+        else:
+            row["max_abs_diff"] = float(np.abs(scores - reference).max())
+            row["sign_agreement"] = float(np.mean(np.sign(scores) == np.sign(reference)))
+        rows.append(row)
+    return rows
+
+
+# --- Run standalone for parity + startup/latency comparison between backends ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FinBERT backend export / parity / timing.")
+    parser.add_argument("--export-onnx", metavar="DIR", help="export the model to DIR for the onnx backend and exit")
+    parser.add_argument("--no-quantize", action="store_true", help="with --export-onnx: keep fp32 weights")
+    parser.add_argument("--backends", default="torch,torch-int8,onnx",
+                        help="comma-separated backends to compare; the first is the parity reference")
+    parser.add_argument("-n", type=int, default=512, help="texts to score (default: 512)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="max score difference vs the reference before parity fails (default: 0.05)")
+    args = parser.parse_args()
+
+    if args.export_onnx:
+        print(f"[INFO] Exported {export_onnx(args.export_onnx, quantize=not args.no_quantize)}")
+        sys.exit(0)
+
+    # Telegram-like texts from the benchmark generator
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+    from synthetic import SyntheticStream
+
+    texts = [m["text"] for m in SyntheticStream(seed=7, duplicate_ratio=0).messages(args.n)]
+    rows = compare_backends(args.backends.split(","), texts, args.batch_size)
+
+    print(f"\n{'backend':12} {'load s':>8} {'p50 ms':>9} {'p99 ms':>9} {'texts/s':>9} {'max |Δ|':>9} {'sign ok':>8}")
+    failed = []
+    for row in rows:
+        line = (f"{row['backend']:12} {row['load_s']:>8.2f} {row['batch_p50_ms']:>9.1f} "
+                f"{row['batch_p99_ms']:>9.1f} {row['texts_per_s']:>9.0f}")
+        if "max_abs_diff" in row:
+            line += f" {row['max_abs_diff']:>9.4f} {row['sign_agreement']:>8.1%}"
+            if row["max_abs_diff"] > args.tolerance:
+                failed.append(row["backend"])
+        print(line)
+    if failed:
+        print(f"\n[WARN] Parity beyond {args.tolerance} vs {rows[0]['backend']}: {', '.join(failed)}")
+        sys.exit(1)
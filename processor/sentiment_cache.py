@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys: lowercase, trimmed, whitespace collapsed.
+    "BTC  to the moon 🚀 " and "btc to the moon 🚀" share one entry.
+    """
+    return _WHITESPACE.sub(" ", text.strip().lower())
+
+
+def text_key(text: str) -> str:
+    """Content address of a text: SHA-1 of its normalized form."""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Bounded vibe-score cache keyed on the hash of the normalized text.
+
+    Evicts the least recently used entry once `max_entries` is reached, and
+    treats entries older than `ttl_seconds` as misses. Entry ages use wall-clock
+    time so they stay meaningful after save()/load() across restarts.
+    """
+
+    def __init__(self, max_entries: int = 50_000, ttl_seconds: float = 6 * 3600):
+        """
+        Args:
+            max_entries: Max number of cached scores (LRU beyond that).
+            ttl_seconds: How long a score stays valid. Default = 6 hours.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, float]] = OrderedDict()  # key -> (score, stored_at)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> float | None:
+        """Cached score for `text`, or None on miss/expiry."""
+        key = text_key(text)
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        score, stored_at = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def put(self, text: str, score: float) -> None:
+        """Store a score, evicting the least recently used entry if full."""
+        key = text_key(text)
+        self._data[key] = (score, time.time())
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate(), 4),
+        }
+
+    # --- Persistence ---
+
+    def save(self, path: str) -> None:
+        """Write live entries to `path` (JSON, LRU order). Atomic via rename."""
+        now = time.time()
+        entries = [
+            [key, score, stored_at]
+            for key, (score, stored_at) in self._data.items()
+            if now - stored_at <= self.ttl_seconds
+        ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """
+        Load entries saved by save(), skipping expired ones.
+        Returns the number of entries loaded (0 if the file doesn't exist).
+        """
+        if not os.path.exists(path):
+            return 0
+
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+
+        now = time.time()
+        loaded = 0
+        for key, score, stored_at in entries:
+            if now - stored_at > self.ttl_seconds:
+                continue
+            self._data[key] = (float(score), float(stored_at))
+            self._data.move_to_end(key)
+            loaded += 1
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        return loaded
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return (
+            f"SentimentCache(entries={len(self._data)}/{self.max_entries}, "
+            f"hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate():.2%})"
+        )
+
+
+# --- Run standalone to verify caching ---
+if __name__ == "__main__":
+    cache = SentimentCache(max_entries=2, ttl_seconds=60)
+
+    cache.put("btc to the moon 🚀", 0.91)
+    print(f"Hit (normalized): {cache.get('  BTC to   the moon 🚀')}")
+    print(f"Miss            : {cache.get('doge is dead')}")
+
+    cache.put("doge is dead", -0.8)
+    cache.put("eth flat", 0.0)      # evicts "btc to the moon 🚀" (LRU)
+    print(f"Evicted         : {cache.get('btc to the moon 🚀')}")
+    print(cache)
@@ -0,0 +1,215 @@
+import multiprocessing as mp
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from sentiment import SENTIMENT_BACKEND, SENTIMENT_THREADS, SentimentBackend, get_backend
+
+
+def resolve_workers(setting: str) -> int:
+    """SENTIMENT_WORKERS value -> process count: "auto" = half the cores, "0" = score inline."""
+    if setting == "auto":
+        return max(1, (os.cpu_count() or 2) // 2)
+    return max(0, int(setting))
+
+
+SENTIMENT_WORKERS = resolve_workers(os.getenv("SENTIMENT_WORKERS", "1"))
+
+# --- Worker process side ---
+_worker_backend: SentimentBackend | None = None
+
+
+def _init_worker(backend_name: str, backend_kwargs: dict) -> None:
+    global _worker_backend
+    # Ctrl+C goes to the whole process group; the parent drains and shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_backend = get_backend(backend_name, **backend_kwargs)
+    _worker_backend.load()
+
+
+def _score(texts: list[str]) -> tuple[list[float], float]:
+    started = time.perf_counter()
+    scores = _worker_backend.score(texts)
+    return scores, time.perf_counter() - started
+
+
+def _ready() -> None:
+    pass   # the initializer (model load) has run by the time this does
+
+
+class SentimentPool:
+    """
+    Scores text batches in worker processes so a slow FinBERT pass never
+    blocks the processor loop.
+
+    submit() hands a batch to the pool and returns immediately unless
+    `max_in_flight` batches are already being scored (then it waits for one:
+    backpressure instead of an unbounded queue). completed() returns finished
+    batches strictly in submission order, so results are applied in the order
+    the messages were consumed. With workers=0 batches are scored inline by
+    `backend`, through the same interface.
+
+    A batch whose scoring raises is logged and returned with scores=None
+    (the caller drops it). If a worker dies, the pool is recreated and every
+    unfinished batch resubmitted; after MAX_RESTARTS restarts in a row with
+    no batch succeeding, completed() raises instead.
+
+    Usage:
+        pool = SentimentPool(workers=2)
+        pool.submit(texts, tag=batch)
+        for tag, scores, seconds in pool.completed():   # call every loop iteration
+            ...
+        pool.shutdown()
+    """
+
+    MAX_RESTARTS = 3
+
+    def __init__(
+        self,
+        workers: int = SENTIMENT_WORKERS,
+        backend_name: str = SENTIMENT_BACKEND,
+        backend: SentimentBackend | None = None,
+        max_in_flight: int | None = None,
+        **backend_kwargs,
+    ):
+        """
+        Args:
+            workers: Worker processes (each loads its own model); 0 = inline.
+            backend: Inline mode only: the backend to score with (default: a new
+                `backend_name` backend, loaded on first use).
+            max_in_flight: Batches submitted but not yet finished before
+                submit() blocks (default: 2 per worker).
+            backend_kwargs: Passed to get_backend() in each worker (batch_size...).
+        """
+        self.workers = workers
+        self.max_in_flight = max_in_flight or max(1, 2 * workers)
+        self._in_flight: deque[tuple[object, list[str], Future]] = deque()
+        self._executor = None
+        self.backend = None
+        self.submitted = 0
+        self.waits = 0      # times submit() blocked on a full pool
+        self.failed = 0     # batches dropped because scoring raised
+        self.restarts = 0   # pools recreated after a worker died
+        self._restarts_in_row = 0
+
+        if workers == 0:
+            self.backend = backend or get_backend(backend_name, **backend_kwargs)
+            return
+
+        # Split the cores between workers unless a thread count is given
+        backend_kwargs.setdefault("threads", SENTIMENT_THREADS or max(1, (os.cpu_count() or 1) // workers))
+        self._initargs = (backend_name, backend_kwargs)
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+
+    def _restart(self, error: BaseException) -> None:
+        """
+        Replace a broken executor and resubmit every unfinished batch, in
+        order. Batches that already finished (scored, or failed on their own)
+        keep their result.
+        """
+        self._restarts_in_row += 1
+        if self._restarts_in_row > self.MAX_RESTARTS:
+            raise RuntimeError(f"Sentiment workers died {self.MAX_RESTARTS + 1} times in a row") from error
+        print(f"[WARN] Sentiment pool broken ({error!r}); restarting {self.workers} workers")
+        self.restarts += 1
+        finished = [
+            future.done() and not future.cancelled() and not isinstance(future.exception(), BrokenProcessPool)
+            for _, _, future in self._in_flight
+        ]
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._new_executor()
+        self._in_flight = deque(
+            (tag, texts, future if done else self._executor.submit(_score, texts))
+            for (tag, texts, future), done in zip(self._in_flight, finished)
+        )
+
+    def load(self) -> None:
+        """Start the workers and wait until their models are loaded (or load the inline backend)."""
+        if self._executor is None:
+            self.backend.load()
+            return
+        started = time.perf_counter()
+        for future in [self._executor.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+        print(f"[INFO] Sentiment pool ready: {self.workers} workers in {time.perf_counter() - started:.1f}s")
+
+    def submit(self, texts: list[str], tag=None) -> None:
+        """Queue one batch; `tag` comes back with its scores from completed()."""
+        self.submitted += 1
+        future: Future
+        if not texts or self._executor is None:
+            future = Future()
+            started = time.perf_counter()
+            try:
+                scores = self.backend.score(texts) if texts else []
+            except Exception as e:   # reported by completed(), like a worker error
+                future.set_exception(e)
+            else:
+                future.set_result((scores, time.perf_counter() - started))
+        else:
+            running = [f for _, _, f in self._in_flight if not f.done()]
+            if len(running) >= self.max_in_flight:
+                self.waits += 1
+                wait(running, return_when=FIRST_COMPLETED)
+            try:
+                future = self._executor.submit(_score, texts)
+            except BrokenProcessPool as e:
+                self._restart(e)
+                future = self._executor.submit(_score, texts)
+        self._in_flight.append((tag, texts, future))
+
+    def completed(self, block: bool = False) -> list[tuple[object, list[float], float]]:
+        """
+        Finished batches as (tag, scores, seconds), oldest first, stopping at
+        the first unfinished one. With block=True, waits for every batch.
+        scores is None for a batch whose scoring raised (logged, not retried).
+        """
+        out = []
+        while self._in_flight:
+            tag, texts, future = self._in_flight[0]
+            if not block and not future.done():
+                break
+            try:
+                scores, seconds = future.result()
+            except BrokenProcessPool as e:
+                self._restart(e)   # same batch, new future: look at it again
+                continue
+            except Exception as e:
+                self._in_flight.popleft()
+                self.failed += 1
+                print(f"[ERROR] Sentiment batch of {len(texts)} texts failed, dropped: {e!r}")
+                out.append((tag, None, 0.0))
+                continue
+            self._in_flight.popleft()
+            self._restarts_in_row = 0
+            out.append((tag, scores, seconds))
+        return out
+
+    def in_flight(self) -> int:
+        """Batches submitted whose results haven't been collected yet."""
+        return len(self._in_flight)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers, "in_flight": self.in_flight(), "submitted": self.submitted,
+            "waits": self.waits, "failed": self.failed, "restarts": self.restarts,
+        }
+
+    def __repr__(self) -> str:
+        return f"SentimentPool({self.stats()})"
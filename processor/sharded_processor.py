@@ -0,0 +1,123 @@
+import argparse
+import multiprocessing as mp
+import os
+import signal
+import time
+
+# Worker restart backoff: doubles per crash in a row, reset once a worker stays up
+RESTART_BACKOFF_MIN = 1.0
+RESTART_BACKOFF_MAX = 60.0
+HEALTHY_AFTER = 60.0   # seconds of uptime before a worker counts as healthy again
+CHECK_INTERVAL = 1.0
+
+
+def _exit_on_sigterm(signum, frame):
+    # Raising SystemExit unwinds run(), so its finally block flushes and commits
+    raise SystemExit(0)
+
+
+def _worker(shard_index: int, n_shards: int) -> None:
+    """Process entry point: one stream processor owning one shard of the tickers."""
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    # Imported here so each worker loads FinBERT / opens Kafka in its own process
+    import stream_processor
+    try:
+        stream_processor.run(shard_index=shard_index, n_shards=n_shards)
+    except KeyboardInterrupt:
+        pass
+
+
+class Supervisor:
+    """
+    Runs `n_shards` stream processor workers and restarts any that die.
+
+    Each worker consumes every topic in its own consumer group and keeps only
+    the tickers ShardFilter assigns to it, so per-ticker windows, signals and
+    DB rows never overlap between workers.
+    """
+
+    def __init__(self, n_shards: int):
+        self.n_shards = n_shards
+        self._ctx = mp.get_context("spawn")   # no forked Kafka/DuckDB/torch state
+        self._procs: dict[int, mp.Process] = {}
+        self._started_at: dict[int, float] = {}
+        self._backoff: dict[int, float] = {i: RESTART_BACKOFF_MIN for i in range(n_shards)}
+        self._restart_at: dict[int, float] = {}
+        self.restarts = 0
+
+    def _start(self, shard_index: int) -> None:
+        proc = self._ctx.Process(
+            target=_worker,
+            args=(shard_index, self.n_shards),
+            name=f"processor-shard{shard_index}",
+        )
+        proc.start()
+        self._procs[shard_index] = proc
+        self._started_at[shard_index] = time.monotonic()
+        print(f"[INFO] Started shard {shard_index}/{self.n_shards} (pid={proc.pid})")
+
+    def _check(self) -> None:
+        now = time.monotonic()
+        for shard_index in range(self.n_shards):
+            proc = self._procs.get(shard_index)
+
+            if proc is not None and proc.is_alive():
+                if now - self._started_at[shard_index] >= HEALTHY_AFTER:
+                    self._backoff[shard_index] = RESTART_BACKOFF_MIN
+                continue
+
+            if proc is not None:
+                # Just died: schedule a restart after the current backoff
+                delay = self._backoff[shard_index]
+                print(f"[WARN] Shard {shard_index} exited (code={proc.exitcode}), restarting in {delay:.0f}s")
+                self._procs.pop(shard_index)
+                self._restart_at[shard_index] = now + delay
+                self._backoff[shard_index] = min(delay * 2, RESTART_BACKOFF_MAX)
+            elif now >= self._restart_at.get(shard_index, 0.0):
+                self._restart_at.pop(shard_index, None)
+                if shard_index in self._started_at:
+                    self.restarts += 1
+                self._start(shard_index)
+
+    def run(self) -> None:
+        print(f"[INFO] Supervisor starting {self.n_shards} workers...")
+        try:
+            while True:
+                self._check()
+                time.sleep(CHECK_INTERVAL)
+        except KeyboardInterrupt:
+            print("[INFO] Shutting down workers...")
+        finally:
+            self.stop()
+
+    def stop(self, timeout_s: float = 30.0) -> None:
+        """SIGTERM every worker, wait for them to flush, then kill stragglers."""
+        for proc in self._procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        deadline = time.monotonic() + timeout_s
+        for proc in self._procs.values():
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                print(f"[WARN] {proc.name} did not stop in {timeout_s:.0f}s, killing it")
+                proc.kill()
+                proc.join()
+        self._procs.clear()
+
+
+if __name__ == "__main__":
+    from stream_processor import PRICE_TOPICS
+
+    # More shards than tickers would only start idle workers
+    default_workers = min(os.cpu_count() or 1, len(PRICE_TOPICS))
+    parser = argparse.ArgumentParser(description="Run the stream processor as N ticker-sharded workers.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("PROCESSOR_WORKERS", default_workers)),
+        help="number of worker processes (default: $PROCESSOR_WORKERS or min(CPU count, tracked tickers))",
+    )
+    args = parser.parse_args()
+
+    Supervisor(max(1, args.workers)).run()
@@ -0,0 +1,74 @@
+import hashlib
+
+
+def shard_for(ticker: str, n_shards: int) -> int:
+    """
+    Which of `n_shards` workers owns `ticker` (rendezvous / highest-random-weight
+    hashing). Stable across processes and restarts, and consistent: going from
+    N to N+1 shards only moves the tickers the new shard wins, ~1/(N+1) of them.
+    """
+    if n_shards <= 1:
+        return 0
+    return max(range(n_shards), key=lambda shard: _weight(shard, ticker))
+
+
+def _weight(shard: int, ticker: str) -> int:
+    digest = hashlib.blake2b(f"{shard}:{ticker}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def parse_pins(spec: str) -> dict[str, int]:
+    """ "bitcoin:0,dogecoin:1" → {"bitcoin": 0, "dogecoin": 1} """
+    pins = {}
+    for item in spec.split(","):
+        if item.strip():
+            ticker, shard = item.split(":")
+            pins[ticker.strip()] = int(shard)
+    return pins
+
+
+class ShardFilter:
+    """
+    Ownership test for one worker; shard 0 of 1 owns everything.
+
+    `pins` overrides the hash for specific tickers (with only a few tickers,
+    hashing can put them all on one shard).
+    """
+
+    def __init__(self, shard_index: int = 0, n_shards: int = 1, pins: dict[str, int] | None = None):
+        if not 0 <= shard_index < max(n_shards, 1):
+            raise ValueError(f"shard_index {shard_index} out of range for {n_shards} shards")
+        self.shard_index = shard_index
+        self.n_shards = n_shards
+        self.pins = pins or {}
+        self._cache: dict[str, bool] = {}
+
+    def shard_of(self, ticker: str) -> int:
+        pinned = self.pins.get(ticker)
+        if pinned is not None:
+            return pinned % self.n_shards
+        return shard_for(ticker, self.n_shards)
+
+    def owns(self, ticker: str) -> bool:
+        if self.n_shards <= 1:
+            return True
+        owned = self._cache.get(ticker)
+        if owned is None:
+            owned = self._cache[ticker] = self.shard_of(ticker) == self.shard_index
+        return owned
+
+    def __repr__(self) -> str:
+        return f"ShardFilter({self.shard_index}/{self.n_shards})"
+
+
+# --- Run standalone to see how tickers spread over shards ---
+if __name__ == "__main__":
+    tickers = [f"coin{i}" for i in range(1000)] + ["bitcoin", "dogecoin"]
+    for n in (2, 4):
+        counts = [0] * n
+        for t in tickers:
+            counts[shard_for(t, n)] += 1
+        print(f"{n} shards: {counts} | bitcoin→{shard_for('bitcoin', n)}, dogecoin→{shard_for('dogecoin', n)}")
+
+    moved = sum(shard_for(t, 4) != shard_for(t, 5) for t in tickers)
+    print(f"4 → 5 shards moves {moved}/{len(tickers)} tickers")
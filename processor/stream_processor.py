@@ -1,112 +1,330 @@
 import os
-import json
 import time
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from dotenv import load_dotenv
-from transformers import pipeline
-from import_me_to_use_kafka_stuff import receive_one_content_from_kafka_topic
-from math_utils import SlidingWindow, delta_price, delta_vibe, hype_momentum, check_alert
-from db import get_connection, init_schema, insert_price, insert_social, insert_signal
+from sentiment import SENTIMENT_BACKEND, SENTIMENT_THREADS, get_backend
+from sentiment_pool import SENTIMENT_WORKERS, SentimentPool
+from sentiment_cache import SentimentCache, text_key
+from rollups import RollupBuilder, backfill_rollups
+from sharding import ShardFilter, parse_pins
+from window_store import WindowStore
+from pane_window import PaneStore
+from math_utils import compute_signal, compute_signals
+from checkpoint import load_checkpoint, rebuild_from_db, snapshot, write_snapshot
+from message_codec import CodecError, PriceTick, SocialPost, decode_price, decode_social
+from logs import log
+import metrics
+from db import DB_MODE, LOCAL_DB_PATH, SYNC_TARGET, get_connection, get_sync_target_connection, init_schema, BulkWriter, StagingSync
 
 load_dotenv()
 
 # --- Config ---
 PRICE_TOPICS = ["bitcoin"]
 SOCIAL_TOPIC = "live-social"
-POLL_TIMEOUT = 5       # seconds to wait per Kafka poll
+POLL_TIMEOUT = 1       # max seconds to wait for a message when all topics are idle
+MAX_BATCH = 1000       # max messages drained per poll
 WINDOW_SECONDS = 300   # 5-minute sliding window
+SOCIAL_BATCH_SIZE = 32         # max texts per FinBERT forward pass
+SOCIAL_BATCH_DEADLINE = 0.5    # max seconds a social message waits for its batch
+MAX_TOKENS = 512               # FinBERT's max sequence length
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "50000"))
+SENTIMENT_CACHE_TTL = float(os.getenv("SENTIMENT_CACHE_TTL", "21600"))   # seconds
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", "")             # empty = memory only
+SENTIMENT_CACHE_SAVE_EVERY = 300                                          # seconds between saves
+DB_BATCH_ROWS = 500          # flush DB writes once this many rows are buffered...
+DB_FLUSH_INTERVAL = 1.0      # ...or the oldest buffered row is this many seconds old
+STATS_EVERY = 60             # seconds between writer/cache stats log lines
+WINDOWS_EVERY = 10           # seconds between multi-resolution window rows (= pane width)
+SHARD_PINS = os.getenv("SHARD_PINS", "")   # e.g. "bitcoin:0,dogecoin:1" (sharded mode)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))   # Prometheus /metrics (+shard index); 0 = off
+# Window snapshot written at every offset commit, for warm restarts; empty = off
+CHECKPOINT_PATH = os.getenv("PROCESSOR_CHECKPOINT_PATH", "processor_checkpoint.npz")
+COMMIT_INTERVAL = float(os.getenv("PROCESSOR_COMMIT_INTERVAL", "5"))   # seconds between commits + checkpoints
+
+# --- FinBERT sentiment ---
+# Loaded lazily (first score, or at the start of run()): importing this module
+# stays cheap. SENTIMENT_BACKEND picks torch | torch-int8 | onnx.
+sentiment = get_backend(SENTIMENT_BACKEND, batch_size=SOCIAL_BATCH_SIZE, max_tokens=MAX_TOKENS)
+
+# Where social batches are scored: inline with `sentiment` until run() starts
+# SENTIMENT_WORKERS worker processes
+sentiment_pool = SentimentPool(workers=0, backend=sentiment)
+RESULT_POLL_TIMEOUT = 0.01   # max poll() wait while sentiment batches are in flight
+
+
+# Repeated texts (pump-group reposts) cost a dict lookup instead of an inference
+sentiment_cache = SentimentCache(max_entries=SENTIMENT_CACHE_SIZE, ttl_seconds=SENTIMENT_CACHE_TTL)
+
+
+def finbert_score_batch(texts: list[str]) -> list[float]:
+    """
+    Score many texts. Returns one score in [-1, +1] per text, in input order.
+    Cached texts are answered from sentiment_cache; the rest (deduplicated)
+    go through FinBERT in one batched pass and are cached.
+    """
+    scores: list[float | None] = [sentiment_cache.get(text) for text in texts]
+
+    # Unique misses only: the same text twice in a batch is scored once
+    misses: dict[str, str] = {}
+    for text, score in zip(texts, scores):
+        if score is None:
+            misses.setdefault(text_key(text), text)
 
-# --- FinBERT Sentiment Pipeline ---
-print("[INFO] Loading FinBERT model...")
-sentiment = pipeline(
-    "text-classification",
-    model="ProsusAI/finbert",
-    tokenizer="ProsusAI/finbert",
-)
-print("[INFO] FinBERT ready.")
+    if misses:
+        fresh = dict(zip(misses, sentiment.score(list(misses.values()))))
+        for key, text in misses.items():
+            sentiment_cache.put(text, fresh[key])
+        scores = [fresh[text_key(text)] if score is None else score for text, score in zip(texts, scores)]
+
+    return scores
 
 
 def finbert_score(text: str) -> float:
     """
-    Run FinBERT on text. Returns a score in [-1, +1].
-    positive  → +confidence
-    negative  → -confidence
-    neutral   → 0.0
-    Truncates to 512 tokens automatically.
-    """
-    print(f"[DEBUG finbert_score] {text=}")
-    result = sentiment(text[:512])[0]
-    label = result["label"]
-    score = result["score"]
-
-    if label == "positive":
-        return score
-    elif label == "negative":
-        return -score
-    else:
-        return 0.0
+    Run FinBERT on a single text. Returns a score in [-1, +1].
+    Prefer finbert_score_batch for anything on the hot path.
+    """
+    log.debug("[DEBUG] finbert_score text=%r", text)
+    return finbert_score_batch([text])[0]
+
+
+class SocialBatch:
+    """
+    Collects parsed social messages until SOCIAL_BATCH_SIZE messages are pending
+    or the oldest one has waited SOCIAL_BATCH_DEADLINE seconds.
+    """
+
+    def __init__(self, max_size: int = SOCIAL_BATCH_SIZE, deadline_s: float = SOCIAL_BATCH_DEADLINE):
+        self.max_size = max_size
+        self.deadline_s = deadline_s
+        self._pending: list[SocialPost] = []
+        self._positions: list[tuple[tuple[str, int], int] | None] = []
+        self._opened_at = 0.0
+
+    def add(self, post: SocialPost, position: tuple[tuple[str, int], int] | None = None) -> None:
+        """`position` = ((topic, partition), offset) of the record, if it came from Kafka."""
+        if not self._pending:
+            self._opened_at = time.monotonic()
+        self._pending.append(post)
+        self._positions.append(position)
+
+    def is_due(self) -> bool:
+        """True if the batch is full or its deadline has passed."""
+        if not self._pending:
+            return False
+        return len(self._pending) >= self.max_size or self.time_left() == 0.0
+
+    def time_left(self) -> float | None:
+        """Seconds until the deadline, or None if nothing is pending."""
+        if not self._pending:
+            return None
+        return max(0.0, self.deadline_s - (time.monotonic() - self._opened_at))
+
+    def drain(self) -> tuple[list[SocialPost], list]:
+        """Pending posts and their record positions, oldest first."""
+        pending, self._pending = self._pending, []
+        positions, self._positions = self._positions, []
+        return pending, positions
+
+    def __len__(self) -> int:
+        return len(self._pending)
 
 
 # --- Per-ticker state ---
-# Each ticker gets its own sliding windows
-price_windows: dict[str, SlidingWindow] = {}
-vibe_windows: dict[str, SlidingWindow] = {}
+# Which tickers this process owns (all of them unless run() is given a shard)
+shard = ShardFilter()
 
-for ticker in PRICE_TOPICS:
-    price_windows[ticker] = SlidingWindow(window_seconds=WINDOW_SECONDS)
-    vibe_windows[ticker] = SlidingWindow(window_seconds=WINDOW_SECONDS)
+price_windows: WindowStore
+vibe_windows: WindowStore
+price_panes: PaneStore
+vibe_panes: PaneStore
 
 
-def process_price_message(raw: str) -> None:
+def init_windows(tickers: list[str]) -> None:
     """
-    Parse and ingest a price message into the sliding window.
-    Expected format:
-    {"ticker": "bitcoin", "price_usd": 62500.0, "timestamp": 1740134400.0}
+    (Re)create the window stores: one columnar store per stream, one window
+    per ticker, plus the event-time panes behind the 1m/5m/15m/1h views.
     """
-    try:
-        msg = json.loads(raw)
-        ticker = msg["ticker"]
-        price = float(msg["price_usd"])
-        ts = float(msg["timestamp"])
+    global price_windows, vibe_windows, price_panes, vibe_panes
+    price_windows = WindowStore(window_seconds=WINDOW_SECONDS)
+    vibe_windows = WindowStore(window_seconds=WINDOW_SECONDS)
+    price_panes = PaneStore(pane_seconds=WINDOWS_EVERY)
+    vibe_panes = PaneStore(pane_seconds=WINDOWS_EVERY)
+    panes_changed.clear()
+    for ticker in tickers:
+        price_windows.register(ticker)
+        vibe_windows.register(ticker)
+        price_panes.register(ticker)
+        vibe_panes.register(ticker)
+
 
-        if ticker not in price_windows:
-            print(f"[SKIP] Unknown ticker: {ticker}")
-            return
+# Tickers with new pane points since the last window_aggregates rows
+panes_changed: set[str] = set()
 
-        price_windows[ticker].add(price, timestamp=ts)
-        print(f"[PRICE] {ticker} = ${price:,.2f} | window_avg = ${price_windows[ticker].average():,.2f}")
 
-    except (KeyError, ValueError, json.JSONDecodeError) as e:
-        print(f"[ERROR] Bad price message: {e} | raw={raw}")
+init_windows(PRICE_TOPICS)
 
+# Newest event timestamp seen per ticker, for event-to-signal latency
+last_event_ts: dict[str, float] = {}
 
-def process_social_message(raw: str) -> None:
+# Offsets of social records consumed but not applied yet (batching or being
+# scored), per (topic, partition), oldest first: commits stop before them
+unapplied: dict[tuple[str, int], deque[int]] = {}
+
+
+def process_price_message(tick: PriceTick) -> str | None:
     """
-    Parse a social message, run FinBERT, ingest vibe score into window.
-    Expected format:
-    {"source": "telegram", "timestamp": ..., "text": "...", "tickers": ["bitcoin"], "author": "..."}
+    Ingest a decoded price tick into the sliding window.
+    Returns the ticker whose window changed, or None.
     """
-    try:
-        msg = json.loads(raw)
-        text = msg["text"]
-        tickers = msg.get("tickers", [])
-        ts = float(msg["timestamp"])
+    ticker = tick.ticker
+    if ticker not in price_windows:
+        log.warn("[SKIP] Unknown ticker: %s", ticker, sample=True)
+        return None
+
+    started = time.perf_counter()
+    price_windows[ticker].add(tick.price_usd, timestamp=tick.timestamp)
+    metrics.WINDOW_UPDATE_SECONDS.observe(time.perf_counter() - started, ticker, "price")
+    price_panes.add(ticker, tick.price_usd, tick.timestamp)
+    panes_changed.add(ticker)
+    last_event_ts[ticker] = tick.timestamp
+    if log.debug_enabled:
+        log.debug("[PRICE] %s = $%.2f | window_avg = $%.2f", ticker, tick.price_usd, price_windows[ticker].average(),
+                  sample=True)
+    return ticker
+
+
+social_batch = SocialBatch()
 
-        if not tickers:
-            return
+# Per-minute aggregates, appended to the *_rollup_1m tables on each DB flush
+rollups = RollupBuilder()
+
+
+def process_social_message(post: SocialPost, position: tuple[tuple[str, int], int] | None = None) -> None:
+    """Queue a decoded social post for batched FinBERT scoring."""
+    # Sharded: only the tickers this worker owns (others are handled elsewhere)
+    post.tickers = [t for t in post.tickers if shard.owns(t)]
+    if post.tickers:
+        social_batch.add(post, position)
+        if position is not None:
+            unapplied.setdefault(position[0], deque()).append(position[1])
+
+
+def submit_social_batch() -> None:
+    """
+    Hand every pending social message to the sentiment pool, each text scored
+    at most once: cached texts are answered from sentiment_cache now, the
+    unique misses go to the pool as one batch. Returns without waiting.
+    """
+    batch, positions = social_batch.drain()
+    if not batch:
+        return
 
-        vibe = finbert_score(text)
+    cached = [sentiment_cache.get(post.text) for post in batch]
+    misses: dict[str, str] = {}
+    for post, score in zip(batch, cached):
+        if score is None:
+            misses.setdefault(text_key(post.text), post.text)
 
-        for ticker in tickers:
-            if ticker not in vibe_windows:
+    metrics.INFERENCE_BATCH.observe(len(misses))
+    sentiment_pool.submit(list(misses.values()), tag=(batch, cached, misses, positions))
+    metrics.SENTIMENT_IN_FLIGHT.set(value=sentiment_pool.in_flight())
+
+
+def apply_scored_batches(writer: BulkWriter, block: bool = False) -> set[str]:
+    """
+    Feed finished sentiment batches (oldest first; all of them with block=True)
+    into vibe_windows in event-time order, cache the new scores and write them
+    to the DB. Returns the tickers whose vibe window changed.
+    """
+    affected = set()
+    for (batch, cached, misses, positions), scores, seconds in sentiment_pool.completed(block=block):
+        for position in positions:
+            if position is not None:
+                unapplied[position[0]].popleft()
+        if scores is None:   # scoring failed: skipped like a bad record
+            metrics.BAD_RECORDS.inc("social", amount=len(batch))
+            continue
+        if misses:
+            metrics.INFERENCE_SECONDS.observe(seconds)
+        fresh = dict(zip(misses, scores))
+        for key, text in misses.items():
+            sentiment_cache.put(text, fresh[key])
+        vibes = [fresh[text_key(post.text)] if score is None else score for post, score in zip(batch, cached)]
+
+        for post, vibe in sorted(zip(batch, vibes), key=lambda pair: pair[0].timestamp):
+            for ticker in post.tickers:
+                if ticker in vibe_windows:
+                    started = time.perf_counter()
+                    vibe_windows[ticker].add(vibe, timestamp=post.timestamp)
+                    metrics.WINDOW_UPDATE_SECONDS.observe(time.perf_counter() - started, ticker, "vibe")
+                    vibe_panes.add(ticker, vibe, post.timestamp)
+                    panes_changed.add(ticker)
+                    affected.add(ticker)
+                    if post.timestamp > last_event_ts.get(ticker, 0.0):
+                        last_event_ts[ticker] = post.timestamp
+                    if log.debug_enabled:
+                        log.debug("[VIBE]  %s | score=%+.3f | window_avg=%+.3f",
+                                  ticker, vibe, vibe_windows[ticker].average(), sample=True)
+
+                writer.add_social(
+                    ticker=ticker,
+                    vibe_score=vibe,
+                    text=post.text,
+                    author=post.author,
+                    source=post.source,
+                    timestamp=post.timestamp,
+                )
+                rollups.add_social(ticker, vibe, post.source, post.timestamp)
+
+    metrics.SENTIMENT_IN_FLIGHT.set(value=sentiment_pool.in_flight())
+    return affected
+
+
+def write_window_aggregates(writer: BulkWriter) -> int:
+    """
+    Queue the 1m/5m/15m/1h price and vibe aggregates of every ticker with new
+    points since the last call as window_aggregates rows (read by /api/state).
+    Returns rows queued.
+    """
+    rows = 0
+    for ticker in sorted(panes_changed):
+        for stream, panes in (("price", price_panes), ("vibe", vibe_panes)):
+            watermark = panes.watermark(ticker)
+            if watermark is None:
                 continue
-            vibe_windows[ticker].add(vibe, timestamp=ts)
-            print(f"[VIBE]  {ticker} | score={vibe:+.3f} | window_avg={vibe_windows[ticker].average():+.3f}")
+            for resolution, agg in panes.multi(ticker).items():
+                writer.add("window_aggregates", (
+                    ticker, stream, resolution, watermark,
+                    agg["count"], agg["mean"], agg["std"], agg["min"], agg["max"],
+                ))
+                rows += 1
+    panes_changed.clear()
+    return rows
+
+
+def committable_offsets(positions: dict[tuple[str, int], int]) -> dict[tuple[str, int], int]:
+    """
+    `positions` (next offset per partition), held back on social partitions to
+    the oldest record whose vibe score isn't applied yet: what the windows and
+    DB fully reflect, so it is safe to commit and checkpoint without waiting.
+    """
+    return {tp: unapplied[tp][0] if unapplied.get(tp) else offset for tp, offset in positions.items()}
 
-    except (KeyError, ValueError, json.JSONDecodeError) as e:
-        print(f"[ERROR] Bad social message: {e} | raw={raw}")
+
+def flush_social_batch(writer: BulkWriter) -> set[str]:
+    """
+    Score every pending and in-flight social message and apply the results,
+    waiting for the pool. Returns the tickers whose vibe window changed.
+    """
+    submit_social_batch()
+    return apply_scored_batches(writer, block=True)
 
 
 def compute_and_alert(ticker: str) -> dict | None:
@@ -118,7 +336,7 @@ def compute_and_alert(ticker: str) -> dict | None:
     p_win = price_windows[ticker]
     v_win = vibe_windows[ticker]
 
-    print(f"[DEBUG inside compute_and_alert] {vibe_windows=}")
+    log.debug("[DEBUG] compute_and_alert %s vibe_windows=%r", ticker, vibe_windows, sample=True)
 
     p_current = p_win.latest()
     p_avg = p_win.average()
@@ -130,84 +348,391 @@ def compute_and_alert(ticker: str) -> dict | None:
         return None
 
     # Vibe data might not exist yet — default to 0.0 (neutral)
-
-    if v_current is None or v_avg is None:
-        raise ValueError()
-    
     if v_current is None:
         v_current = 0.0
     if v_avg is None:
         v_avg = 0.0
 
-    dp = delta_price(p_current, p_avg)
-    dv = delta_vibe(v_current, v_avg)
-    n = v_win.count()
-    mh = hype_momentum(dv, n)
-    alert = check_alert(mh, dp)
-
-    signal = {
-        "ticker": ticker,
-        "timestamp": time.time(),
-        "price_current": p_current,
-        "price_avg": p_avg,
-        "vibe_current": v_current,
-        "vibe_avg": v_avg,
-        "delta_price": dp,
-        "delta_vibe": dv,
-        "hype_momentum": mh,
-        "alert": alert,   # NULL in DB when no alert — row still written
-    }
+    now = time.time()
+    signal = compute_signal(ticker, p_current, p_avg, v_current, v_avg, v_win.count(), now)
+    _emit_signal(signal, now)
+    return signal
+
+
+def compute_and_alert_batch(tickers: list[str]) -> list[dict]:
+    """
+    compute_and_alert() for many tickers in one vectorized pass: window
+    aggregates are gathered into arrays and ΔP / ΔV / M_hype / alerts are
+    computed with NumPy. Tickers without price data yet are left out.
+    """
+    log.debug("[DEBUG] compute_and_alert_batch %s vibe_windows=%r", tickers, vibe_windows, sample=True)
+
+    p_current, p_avg, _ = price_windows.aggregates(tickers)
+    v_current, v_avg, v_count = vibe_windows.aggregates(tickers)
+
+    # No price data at all yet — too early to write anything
+    has_price = np.flatnonzero(~np.isnan(p_current))
+    if len(has_price) < len(tickers):
+        tickers = [tickers[i] for i in has_price]
+        p_current, p_avg = p_current[has_price], p_avg[has_price]
+        v_current, v_avg, v_count = v_current[has_price], v_avg[has_price], v_count[has_price]
 
+    # Vibe data might not exist yet — default to 0.0 (neutral)
+    v_current = np.nan_to_num(v_current, nan=0.0)
+    v_avg = np.nan_to_num(v_avg, nan=0.0)
+
+    now = time.time()
+    signals = compute_signals(tickers, p_current, p_avg, v_current, v_avg, v_count, now)
+    for signal in signals:
+        _emit_signal(signal, now)
+    return signals
+
+
+def _emit_signal(signal: dict, now: float) -> None:
+    """Signal / latency metrics, and the alert line if it fired."""
+    ticker, alert = signal["ticker"], signal["alert"]
+    metrics.SIGNALS.inc(ticker)
+    if ticker in last_event_ts:
+        metrics.EVENT_TO_SIGNAL.observe(max(0.0, now - last_event_ts[ticker]), ticker)
     if alert:
-        print(f"🚨 ALERT [{ticker}] {alert} | M_hype={mh:.1f} | ΔP={dp:.4f}")
+        metrics.ALERTS.inc(ticker, alert)
+        log.warn("🚨 ALERT [%s] %s | M_hype=%.1f | ΔP=%.4f", ticker, alert, signal["hype_momentum"], signal["delta_price"])
+
+
+# --- Topic dispatch ---
+# Each handler ingests one record and returns the tickers whose windows changed.
+
+def _observe_record(record) -> None:
+    metrics.RECORDS.inc(record.topic)
+    if record.timestamp:
+        metrics.CONSUME_LAG.observe(max(0.0, time.time() - record.timestamp), record.topic)
+
+
+def _observe_flush(rows: int, seconds: float) -> None:
+    metrics.DB_FLUSH_SECONDS.observe(seconds)
+    metrics.DB_ROWS.inc(amount=rows)
+
+
+def _decode(record, decode, stream: str):
+    """Decode a record's payload exactly once; bad payloads are counted, logged and skipped."""
+    started = time.perf_counter()
+    try:
+        item = decode(record.value)
+    except CodecError as e:
+        metrics.BAD_RECORDS.inc(stream)
+        log.error("[ERROR] Bad %s message: %s | raw=%r", stream, e, record.value[:200], sample=True)
+        return None
+    metrics.PARSE_SECONDS.observe(time.perf_counter() - started, stream)
+    log.debug("[DEBUG] %s record %s: %r", stream, record.topic, item, sample=True)
+    return item
+
+
+def handle_price_record(record, writer: BulkWriter) -> set[str]:
+    _observe_record(record)
+    # Price topics are named after their ticker
+    if not shard.owns(record.topic):
+        return set()
+    tick = _decode(record, decode_price, "price")
+    if tick is None:
+        return set()
+    ticker = process_price_message(tick)
+    writer.add_price(tick.ticker, tick.price_usd, tick.timestamp)
+    rollups.add_price(tick.ticker, tick.price_usd, tick.timestamp)
+    return {ticker} if ticker else set()
 
-    return signal
 
+def handle_social_record(record, writer: BulkWriter) -> set[str]:
+    _observe_record(record)
+    post = _decode(record, decode_social, "social")
+    if post is not None:
+        process_social_message(post, ((record.topic, record.partition), record.offset))
+    if len(social_batch) >= social_batch.max_size:
+        submit_social_batch()
+    return set()
 
-def run():
+
+HANDLERS = {topic: handle_price_record for topic in PRICE_TOPICS}
+HANDLERS[SOCIAL_TOPIC] = handle_social_record
+
+
+def restore_windows(con, checkpoint_path: str) -> dict[tuple[str, int], int] | None:
     """
-    Main processor loop.
-    Alternates polling between price topics and social topic.
+    Warm start: load the window checkpoint and return its Kafka offsets, or
+    fall back to rebuilding the windows from recent DB rows (returns None, so
+    consumption resumes from the committed offsets).
     """
-    print("[INFO] Stream processor started...")
+    _refill_panes(con)
+    started = time.perf_counter()
+    offsets = load_checkpoint(checkpoint_path, {"price": price_windows, "vibe": vibe_windows})
+    if offsets is not None:
+        log.info("[INFO] Restored windows from %s in %.1f ms (%s | %s)", checkpoint_path,
+                 (time.perf_counter() - started) * 1000, price_windows, vibe_windows)
+        return offsets
+    try:
+        rows = rebuild_from_db(con, price_windows, vibe_windows)
+    except Exception as e:   # duckdb.Error, MotherDuck unreachable...: start cold
+        log.warn("[WARN] Could not rebuild windows from the DB, starting empty: %s", e)
+        return None
+    log.info("[INFO] Rebuilt windows from %d DB rows in %.1f ms", rows, (time.perf_counter() - started) * 1000)
+    return None
 
-    # Init DB connection once
-    con = get_connection()
-    init_schema(con)
 
-    while True:
-        # Poll price topics
-        for topic in PRICE_TOPICS:
-            raw = receive_one_content_from_kafka_topic(topic, timeout_s=POLL_TIMEOUT)
-            print("DEBUG CHIM TO:", raw, topic)
-            if raw:
-                process_price_message(raw)
-                msg = json.loads(raw)
-                insert_price(con, msg["ticker"], msg["price_usd"], msg["timestamp"])
-
-        # Poll social topic
-        raw = receive_one_content_from_kafka_topic(SOCIAL_TOPIC, timeout_s=POLL_TIMEOUT)
-        print(f"[DEBUG recieve social message] {raw=}")
-        if raw:
-            process_social_message(raw)
-            msg = json.loads(raw)
-            for ticker in msg.get("tickers", []):
-                insert_social(
-                    con,
-                    ticker=ticker,
-                    vibe_score=finbert_score(msg["text"]),
-                    text=msg["text"],
-                    author=msg["author"],
-                    source=msg["source"],
-                    timestamp=msg["timestamp"],
-                )
+def _refill_panes(con) -> None:
+    """The panes cover an hour, more than the checkpoint: refill them from the last hour of DB rows."""
+    started = time.perf_counter()
+    try:
+        rows = rebuild_from_db(con, price_panes, vibe_panes, seconds=price_panes.horizon_seconds)
+    except Exception as e:
+        log.warn("[WARN] Could not refill the 1m-1h panes from the DB, starting empty: %s", e)
+        return
+    log.info("[INFO] Refilled 1m-1h panes from %d DB rows in %.1f ms", rows, (time.perf_counter() - started) * 1000)
+
+
+# Checkpoint files are written (and fsynced) on this thread, off the consume loop.
+# Offsets are committed only once the checkpoint covering them is on disk.
+_checkpoint_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+_checkpoint_write: Future | None = None   # result: the offsets written, None if it failed
+_checkpoint_failed_at = float("-inf")
+
 
-        # Compute metrics and write signals
-        for ticker in PRICE_TOPICS:
-            signal = compute_and_alert(ticker)
-            print(f"[DEBUG] {signal=}")
-            if signal:                          # only None if price window empty
-                insert_signal(con, signal)
+def checkpoint_ready() -> bool:
+    """True if no checkpoint write is pending (a failed one is retried after COMMIT_INTERVAL)."""
+    return _checkpoint_write is None and time.monotonic() - _checkpoint_failed_at >= COMMIT_INTERVAL
+
+
+def write_checkpoint(checkpoint_path: str, positions: dict[tuple[str, int], int], wait: bool = False) -> bool:
+    """
+    Snapshot the windows as of `positions` and write the file in the
+    background; written_checkpoint() hands back `positions` once it is on
+    disk. Returns False (nothing written) if checkpoints are disabled.
+    With wait=True (shutdown), waits for any running write and writes in
+    place, raising if that fails.
+    """
+    global _checkpoint_write
+    if not checkpoint_path:
+        return False
+    if _checkpoint_write is not None:
+        _checkpoint_write.result()   # wait; a failure was already logged
+        _checkpoint_write = None
+
+    arrays = snapshot({"price": price_windows, "vibe": vibe_windows}, positions)
+    if wait:
+        write_snapshot(checkpoint_path, arrays)
+    else:
+        _checkpoint_write = _checkpoint_io.submit(_write_checkpoint_file, checkpoint_path, arrays, positions)
+    return True
+
+
+def written_checkpoint() -> dict[tuple[str, int], int] | None:
+    """
+    Offsets of the background checkpoint write that just finished, once per
+    write. None while it runs, if it failed, or if there is none.
+    """
+    global _checkpoint_write, _checkpoint_failed_at
+    if _checkpoint_write is None or not _checkpoint_write.done():
+        return None
+    done, _checkpoint_write = _checkpoint_write, None
+    offsets = done.result()
+    if offsets is None:
+        _checkpoint_failed_at = time.monotonic()
+    return offsets
+
+
+def _write_checkpoint_file(
+    checkpoint_path: str, arrays: dict, positions: dict[tuple[str, int], int]
+) -> dict[tuple[str, int], int] | None:
+    try:
+        write_snapshot(checkpoint_path, arrays)
+    except OSError as e:
+        log.warn("[WARN] Checkpoint write to %s failed, offsets not committed: %s", checkpoint_path, e, sample=True)
+        return None
+    return positions
+
+
+def shard_path(path: str, shard_index: int, default_ext: str) -> str:
+    """ "data/x.duckdb" -> "data/x.shard1.duckdb" (any or no extension: every shard gets its own file)."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard_index}{ext or default_ext}"
+
+
+def run(shard_index: int = 0, n_shards: int = 1):
+    """
+    Main processor loop.
+    One multiplexed consumer over every topic: each poll returns as soon as any
+    topic has data, every record goes straight to its topic's handler, and
+    signals are recomputed only for the tickers those records touched.
+
+    With n_shards > 1 this process is one worker of sharded_processor.py: it
+    owns the tickers ShardFilter assigns to `shard_index` and ignores the rest.
+    """
+    # Imported here: the Kafka helper needs broker settings and certs at import
+    # time, and the handlers (benchmarks, replay-style callers) don't
+    from import_me_to_use_kafka_stuff import PersistentConsumer
+
+    global shard, sentiment_pool
+    shard = ShardFilter(shard_index, n_shards, parse_pins(SHARD_PINS))
+    init_windows([t for t in PRICE_TOPICS if shard.owns(t)])
+    log.info("[INFO] Stream processor started... (%s, tickers=%s)", shard, price_windows.tickers())
+
+    if not price_windows.tickers():
+        # Nothing to score for: never load FinBERT in this shard
+        log.warn("[WARN] Shard %d/%d owns no tickers; sentiment model not loaded", shard_index, n_shards)
+    else:
+        # Cores are shared by every shard and every sentiment worker in it
+        threads = SENTIMENT_THREADS or max(1, (os.cpu_count() or 1) // (max(SENTIMENT_WORKERS, 1) * n_shards))
+        if SENTIMENT_WORKERS:
+            # FinBERT runs in worker processes; the loop keeps consuming while they score
+            sentiment_pool = SentimentPool(
+                workers=SENTIMENT_WORKERS, backend_name=SENTIMENT_BACKEND,
+                batch_size=SOCIAL_BATCH_SIZE, max_tokens=MAX_TOKENS, threads=threads,
+            )
+        elif n_shards > 1:
+            sentiment.threads = threads
+        sentiment_pool.load()   # up front, so the first social batch doesn't wait for the model
+
+    if METRICS_PORT:
+        try:
+            metrics.serve(METRICS_PORT + shard_index)
+        except OSError as e:
+            log.warn("[WARN] Metrics endpoint disabled, port %d unavailable: %s", METRICS_PORT + shard_index, e)
+
+    # Init DB connection once (a local DuckDB file can only have one writer process)
+    local_path = shard_path(LOCAL_DB_PATH, shard_index, ".duckdb") if n_shards > 1 else None
+    con = get_connection(local_path)
+    init_schema(con)
+    writer = BulkWriter(
+        con,
+        batch_rows=DB_BATCH_ROWS,
+        flush_interval_s=DB_FLUSH_INTERVAL,
+        before_flush=rollups.drain_into,
+        after_flush=_observe_flush,
+    )
+
+    # Staged mode: writes land in the local file; this thread ships them to MotherDuck.
+    # Every shard syncs to MotherDuck; a SYNC_TARGET file is split per shard like the local one.
+    sync = None
+    sync_path = shard_path(SYNC_TARGET, shard_index, ".duckdb") if n_shards > 1 and SYNC_TARGET else None
+    if DB_MODE == "staged":
+        sync = StagingSync(con, get_sync_target_connection(sync_path))
+
+    own_db = DB_MODE == "local" or sync_path is not None   # this shard's file, not shared
+    if shard_index == 0 or (n_shards > 1 and own_db):
+        # Roll up history written before the rollup tables existed, on the DB the
+        # dashboard reads (a no-op once done); on a shared DB only shard 0, so they never race
+        try:
+            if sync is not None:
+                sync.sync_once()   # staged rows not yet shipped are history too
+            backfill_rollups(con if sync is None else sync.target)
+        except Exception as e:
+            log.warn("[WARN] Rollup backfill failed, dashboard stats may miss older rows: %r", e)
+    if sync is not None:
+        sync.start()
+
+    if SENTIMENT_CACHE_PATH:
+        loaded = sentiment_cache.load(SENTIMENT_CACHE_PATH)
+        log.info("[INFO] Loaded %d cached vibe scores from %s", loaded, SENTIMENT_CACHE_PATH)
+    last_cache_save = last_stats = last_windows = time.monotonic()
+
+    checkpoint_path = shard_path(CHECKPOINT_PATH, shard_index, ".npz") if n_shards > 1 and CHECKPOINT_PATH else CHECKPOINT_PATH
+    start_offsets = restore_windows(con, checkpoint_path)
+    # Next offset to consume per (topic, partition): what the windows reflect
+    positions: dict[tuple[str, int], int] = dict(start_offsets or {})
+
+    # Offsets are committed by hand (see end of loop), never for unwritten messages
+    # Every shard reads every message in its own group and keeps what it owns
+    group_id = "ghostmarket-processor" if n_shards == 1 else f"ghostmarket-processor-shard{shard_index}of{n_shards}"
+    consumer = PersistentConsumer(
+        PRICE_TOPICS + [SOCIAL_TOPIC],
+        group_id=group_id,
+        commit_every=None,   # time-based only: each commit force-flushes the DB writer
+        commit_interval_s=COMMIT_INTERVAL,
+        auto_commit=False,
+        start_offsets=start_offsets,   # resume exactly where the checkpoint was taken
+    )
+    try:
+        while True:
+            # Don't sit in poll() past the deadline of a pending social batch
+            time_left = social_batch.time_left()
+            timeout = POLL_TIMEOUT if time_left is None else min(POLL_TIMEOUT, time_left)
+            if sentiment_pool.in_flight():
+                timeout = min(timeout, RESULT_POLL_TIMEOUT)
+
+            affected: set[str] = set()
+
+            for record in consumer.consume(max_messages=MAX_BATCH, timeout_s=timeout):
+                handler = HANDLERS.get(record.topic)
+                if handler is not None:
+                    affected |= handler(record, writer)
+                positions[(record.topic, record.partition)] = record.offset + 1
+
+            if social_batch.is_due():
+                submit_social_batch()
+
+            affected |= apply_scored_batches(writer)
+
+            # Compute metrics and write signals for the tickers that just changed
+            if affected:
+                started = time.perf_counter()
+                signals = compute_and_alert_batch(list(affected))
+                metrics.SIGNAL_SECONDS.observe(time.perf_counter() - started)
+                for signal in signals:
+                    log.debug("[DEBUG] signal=%r", signal, sample=True)
+                    writer.add_signal(signal)
+
+            writer.maybe_flush()
+            metrics.DB_PENDING.set(value=sum(writer.queue_depth().values()))
+
+            # Commit offsets only up to messages that are scored AND written,
+            # together with a checkpoint of the windows at exactly those offsets.
+            # Batches still being scored just hold their partition back.
+            # Commit the offsets a checkpoint write has just put on disk
+            written = written_checkpoint()
+            if written is not None:
+                consumer.commit(asynchronous=True, offsets=written)
+            if consumer.commit_due() and checkpoint_ready() and writer.maybe_flush(force=True):
+                offsets = committable_offsets(positions)
+                if not write_checkpoint(checkpoint_path, offsets):
+                    consumer.commit(asynchronous=True, offsets=offsets)   # no checkpoints: commit now
+
+            if time.monotonic() - last_windows >= WINDOWS_EVERY:
+                write_window_aggregates(writer)
+                last_windows = time.monotonic()
+
+            if SENTIMENT_CACHE_PATH and time.monotonic() - last_cache_save >= SENTIMENT_CACHE_SAVE_EVERY:
+                sentiment_cache.save(SENTIMENT_CACHE_PATH)
+                last_cache_save = time.monotonic()
+
+            if time.monotonic() - last_stats >= STATS_EVERY:
+                log.info("[INFO] writer=%s | %s | %s", writer.stats(), sentiment_cache, sentiment_pool)
+                if sync:
+                    log.info("[INFO] staging sync=%s", sync.stats())
+                last_stats = time.monotonic()
+    finally:
+        # Each step runs even if an earlier one fails (e.g. a dead sentiment pool)
+        _shutdown_step("score pending social batches", flush_social_batch, writer)
+        _shutdown_step("stop sentiment pool", sentiment_pool.shutdown)
+        _shutdown_step("write window aggregates", write_window_aggregates, writer)
+        flushed = _shutdown_step("flush DB writer", writer.close)
+        offsets = committable_offsets(positions)
+        checkpointed = _shutdown_step("write checkpoint", write_checkpoint, checkpoint_path, offsets, True)
+        if sync:
+            _shutdown_step("stop staging sync", sync.stop)
+        if SENTIMENT_CACHE_PATH:
+            _shutdown_step("save sentiment cache", sentiment_cache.save, SENTIMENT_CACHE_PATH)
+        if flushed and checkpointed:   # never commit past the DB rows or the checkpoint on disk
+            _shutdown_step("commit offsets", consumer.commit, False, offsets)
+        _shutdown_step("close consumer", consumer.close, False)
+        _shutdown_step("close DB", con.close)
+
+
+def _shutdown_step(what: str, fn, *args) -> bool:
+    """Run one shutdown step; a failure is logged so the remaining steps still run."""
+    try:
+        fn(*args)
+    except Exception as e:
+        log.error("[ERROR] Shutdown step '%s' failed: %r", what, e)
+        return False
+    return True
 
 
 if __name__ == "__main__":
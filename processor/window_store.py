@@ -0,0 +1,383 @@
+import time
+
+import numpy as np
+
+
+class _Buffer:
+    """
+    One ticker's points: parallel float64 arrays (timestamps, values).
+    Live data is buf[start:end]; 16 bytes per point.
+    """
+
+    __slots__ = ("ts", "values", "start", "end", "shift", "sum", "sumsq", "in_order", "updates", "oldest", "newest")
+
+    def __init__(self, capacity: int):
+        self.ts = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.start = 0
+        self.end = 0
+        # Running sums over (value - shift), as in SlidingWindow
+        self.shift: float | None = None
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.in_order = True   # timestamps non-decreasing -> binary-search eviction
+        self.updates = 0
+        # ts[start] and the last timestamp added, as Python floats so add()
+        # can skip eviction without reading NumPy scalars
+        self.oldest = float("inf")
+        self.newest = float("-inf")
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def live_values(self) -> np.ndarray:
+        return self.values[self.start:self.end]
+
+    def live_ts(self) -> np.ndarray:
+        return self.ts[self.start:self.end]
+
+    def make_room(self) -> None:
+        """
+        Called when the arrays are full at the right edge.
+        Slides live data to the front if at most half is used, otherwise
+        doubles capacity. Either way the copy is amortized O(1) per add.
+        """
+        n = len(self)
+        capacity = len(self.ts)
+        if n <= capacity // 2:
+            self.ts[:n] = self.ts[self.start:self.end]
+            self.values[:n] = self.values[self.start:self.end]
+        else:
+            new_ts = np.empty(capacity * 2, dtype=np.float64)
+            new_values = np.empty(capacity * 2, dtype=np.float64)
+            new_ts[:n] = self.ts[self.start:self.end]
+            new_values[:n] = self.values[self.start:self.end]
+            self.ts, self.values = new_ts, new_values
+        self.start, self.end = 0, n
+
+
+class WindowStore:
+    """
+    Time-based sliding windows for many tickers, backed by NumPy arrays.
+
+    Same add/average/count/latest semantics as SlidingWindow, but each point
+    costs 16 bytes instead of a Python tuple, eviction is a single vectorized
+    slice and aggregates are array reductions (average stays O(1) thanks to
+    running sums).
+
+    Usage:
+        prices = WindowStore(window_seconds=300)
+        prices.register("bitcoin")
+        prices["bitcoin"].add(62500.0, timestamp=ts)   # or prices.add("bitcoin", ...)
+        prices["bitcoin"].average()
+    """
+
+    # Exact recompute of the running sums after this many updates (bounds drift)
+    RECOMPUTE_EVERY = 100_000
+    # In-order evictions of up to this many points are done point by point
+    SCALAR_EVICT = 4
+
+    def __init__(self, window_seconds: int = 300, initial_capacity: int = 256):
+        """
+        Args:
+            window_seconds: How far back to look. Default = 5 minutes (300s).
+            initial_capacity: Points preallocated per ticker; grows by doubling.
+        """
+        self.window_seconds = window_seconds
+        self.initial_capacity = initial_capacity
+        self._buffers: dict[str, _Buffer] = {}
+
+    # --- Ticker registry ---
+
+    def register(self, ticker: str) -> None:
+        """Start tracking `ticker` (no-op if already tracked)."""
+        if ticker not in self._buffers:
+            self._buffers[ticker] = _Buffer(self.initial_capacity)
+
+    def tickers(self) -> list[str]:
+        return list(self._buffers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._buffers
+
+    def __iter__(self):
+        return iter(self._buffers)
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def __getitem__(self, ticker: str) -> "TickerWindow":
+        if ticker not in self._buffers:
+            raise KeyError(ticker)
+        return TickerWindow(self, ticker)
+
+    # --- Writes ---
+
+    def add(self, ticker: str, value: float, timestamp: float | None = None) -> None:
+        """
+        Append a data point for `ticker` and evict its expired entries.
+
+        Args:
+            ticker: A registered ticker.
+            value: The numeric value to store (price or vibe score).
+            timestamp: Unix timestamp. Defaults to now if not provided.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        buf = self._buffers[ticker]
+        if buf.end == len(buf.ts):
+            buf.make_room()
+
+        if buf.end == buf.start:
+            buf.oldest = timestamp
+        elif timestamp < buf.newest:
+            buf.in_order = False
+        buf.newest = timestamp
+
+        buf.ts[buf.end] = timestamp
+        buf.values[buf.end] = value
+        buf.end += 1
+
+        if buf.shift is None:
+            buf.shift = value
+        d = value - buf.shift
+        buf.sum += d
+        buf.sumsq += d * d
+        buf.updates += 1
+
+        self._evict_expired(buf, timestamp)
+
+        if buf.updates >= self.RECOMPUTE_EVERY:
+            self._recompute(buf)
+
+    def _evict_expired(self, buf: _Buffer, now: float) -> None:
+        """Drop entries older than window_seconds from the left, in one slice."""
+        cutoff = now - self.window_seconds
+        if buf.oldest >= cutoff:
+            return
+
+        start = buf.start
+        if buf.in_order and buf.ts.item(min(start + self.SCALAR_EVICT, buf.end - 1)) >= cutoff:
+            # Steady state: a point or two expire per add, and stepping over
+            # them as Python floats is cheaper than the NumPy calls below
+            ts, values, shift = buf.ts, buf.values, buf.shift
+            i = start
+            while ts.item(i) < cutoff:   # stops at the latest point at the latest
+                d = values.item(i) - shift
+                buf.sum -= d
+                buf.sumsq -= d * d
+                i += 1
+            keep_from = i - start
+        else:
+            live_ts = buf.live_ts()
+            if buf.in_order:
+                keep_from = int(np.searchsorted(live_ts, cutoff, side="left"))
+            else:
+                # Same rule as the deque: stop at the first point that is not expired
+                keep_from = int(np.argmax(live_ts >= cutoff))
+
+            evicted = buf.values[start:start + keep_from] - buf.shift
+            buf.sum -= float(evicted.sum())
+            buf.sumsq -= float(np.dot(evicted, evicted))
+        buf.updates += keep_from
+        buf.start += keep_from
+
+        if buf.start == buf.end:
+            # Empty: reset so sums restart exactly at zero
+            buf.start = buf.end = 0
+            buf.shift = None
+            buf.sum = buf.sumsq = 0.0
+            buf.in_order = True
+        else:
+            buf.oldest = buf.ts.item(buf.start)
+            if not buf.in_order:
+                buf.in_order = bool(np.all(np.diff(buf.live_ts()) >= 0))
+
+    def _recompute(self, buf: _Buffer) -> None:
+        d = buf.live_values() - (buf.shift or 0.0)
+        buf.sum = float(d.sum())
+        buf.sumsq = float(np.dot(d, d))
+        buf.updates = 0
+
+    # --- Reads ---
+
+    def count(self, ticker: str) -> int:
+        """Message velocity: number of data points in current window."""
+        return len(self._buffers[ticker])
+
+    def average(self, ticker: str) -> float | None:
+        """Rolling mean of current window, O(1). None if empty."""
+        buf = self._buffers[ticker]
+        n = len(buf)
+        if n == 0:
+            return None
+        return buf.shift + buf.sum / n
+
+    def variance(self, ticker: str) -> float | None:
+        """Population variance of current window, O(1). None if empty."""
+        buf = self._buffers[ticker]
+        n = len(buf)
+        if n == 0:
+            return None
+        mean_d = buf.sum / n
+        return max(0.0, buf.sumsq / n - mean_d * mean_d)
+
+    def std(self, ticker: str) -> float | None:
+        var = self.variance(ticker)
+        return None if var is None else float(np.sqrt(var))
+
+    def min(self, ticker: str) -> float | None:
+        buf = self._buffers[ticker]
+        return float(buf.live_values().min()) if len(buf) else None
+
+    def max(self, ticker: str) -> float | None:
+        buf = self._buffers[ticker]
+        return float(buf.live_values().max()) if len(buf) else None
+
+    def latest(self, ticker: str) -> float | None:
+        """Most recent value in the window. Returns None if empty."""
+        buf = self._buffers[ticker]
+        return float(buf.values[buf.end - 1]) if len(buf) else None
+
+    def values(self, ticker: str) -> np.ndarray:
+        """Read-only view of the live values (oldest first)."""
+        view = self._buffers[ticker].live_values()
+        view.flags.writeable = False
+        return view
+
+    def aggregates(self, tickers: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (latest, average, count) arrays aligned with `tickers`, gathered in one
+        pass for compute_signals(). latest/average are NaN for empty windows.
+        """
+        latest, average, count = [], [], []
+        nan = float("nan")
+        for ticker in tickers:
+            buf = self._buffers[ticker]
+            n = buf.end - buf.start
+            count.append(n)
+            if n:
+                latest.append(buf.values[buf.end - 1])
+                average.append(buf.shift + buf.sum / n)
+            else:
+                latest.append(nan)
+                average.append(nan)
+        return (
+            np.array(latest, dtype=np.float64),
+            np.array(average, dtype=np.float64),
+            np.array(count, dtype=np.int64),
+        )
+
+    # --- Checkpointing ---
+
+    def state(self, ticker: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (timestamps, values, accumulators) of `ticker`'s live window, copied.
+        Accumulators are [shift (NaN if unset), sum, sumsq, in_order, updates],
+        so load_state() restores the running sums exactly instead of re-adding.
+        """
+        buf = self._buffers[ticker]
+        acc = np.array([
+            np.nan if buf.shift is None else buf.shift, buf.sum, buf.sumsq, float(buf.in_order), float(buf.updates),
+        ])
+        return buf.live_ts().copy(), buf.live_values().copy(), acc
+
+    def load_state(self, ticker: str, ts: np.ndarray, values: np.ndarray, acc: np.ndarray) -> None:
+        """Replace `ticker`'s window with a state() snapshot (registers the ticker if needed)."""
+        n = len(ts)
+        buf = _Buffer(max(self.initial_capacity, 2 * n))
+        buf.ts[:n] = ts
+        buf.values[:n] = values
+        buf.end = n
+        shift, buf.sum, buf.sumsq, in_order, updates = (float(x) for x in acc)
+        buf.shift = None if np.isnan(shift) else shift
+        buf.in_order = bool(in_order)
+        buf.updates = int(updates)
+        if n:
+            buf.oldest, buf.newest = float(ts[0]), float(ts[-1])
+        self._buffers[ticker] = buf
+
+    def nbytes(self) -> int:
+        """Bytes allocated for point storage across all tickers."""
+        return sum(buf.ts.nbytes + buf.values.nbytes for buf in self._buffers.values())
+
+    def __repr__(self) -> str:
+        return f"WindowStore(window={self.window_seconds}s, tickers=[" + ", ".join(
+            f"{ticker}: n={self.count(ticker)}" for ticker in self._buffers
+        ) + "])"
+
+
+class TickerWindow:
+    """
+    Lightweight view of one ticker inside a WindowStore, with the
+    SlidingWindow interface so callers can keep using windows[ticker].add(...).
+    """
+
+    __slots__ = ("store", "ticker")
+
+    def __init__(self, store: WindowStore, ticker: str):
+        self.store = store
+        self.ticker = ticker
+
+    def add(self, value: float, timestamp: float | None = None) -> None:
+        self.store.add(self.ticker, value, timestamp)
+
+    def average(self) -> float | None:
+        return self.store.average(self.ticker)
+
+    def variance(self) -> float | None:
+        return self.store.variance(self.ticker)
+
+    def std(self) -> float | None:
+        return self.store.std(self.ticker)
+
+    def min(self) -> float | None:
+        return self.store.min(self.ticker)
+
+    def max(self) -> float | None:
+        return self.store.max(self.ticker)
+
+    def count(self) -> int:
+        return self.store.count(self.ticker)
+
+    def latest(self) -> float | None:
+        return self.store.latest(self.ticker)
+
+    def __repr__(self) -> str:
+        window = self.store.window_seconds
+        return (
+            f"TickerWindow({self.ticker}, window={window}s, count={self.count()}, avg={self.average():.4f})"
+            if self.count() else
+            f"TickerWindow({self.ticker}, window={window}s, empty)"
+        )
+
+
+# --- Run standalone to compare memory against SlidingWindow ---
+if __name__ == "__main__":
+    import sys
+    from math_utils import SlidingWindow
+
+    n_tickers, points = 200, 5_000
+    store = WindowStore(window_seconds=300)
+    windows = {}
+    now = time.time()
+
+    for i in range(n_tickers):
+        ticker = f"coin{i}"
+        store.register(ticker)
+        windows[ticker] = SlidingWindow(window_seconds=300)
+        for j in range(points):
+            ts = now + j * 0.05
+            store.add(ticker, 100.0 + j, timestamp=ts)
+            windows[ticker].add(100.0 + j, timestamp=ts)
+
+    deque_bytes = sum(
+        sys.getsizeof(w._data) + sum(sys.getsizeof(p) + 2 * 24 for p in w._data)
+        for w in windows.values()
+    )
+    print(f"Points       : {n_tickers * points:,}")
+    print(f"WindowStore  : {store.nbytes() / 1e6:.1f} MB")
+    print(f"SlidingWindow: ~{deque_bytes / 1e6:.1f} MB")
+    print(f"Avg match    : {abs(store.average('coin0') - windows['coin0'].average()) < 1e-6}")
+    print(store["coin0"])
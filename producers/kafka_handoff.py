@@ -0,0 +1,140 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from import_me_to_use_kafka_stuff import send_bytes_to_kafka_topic_async, flush_producer
+
+QUEUE_SIZE = 10_000   # messages buffered between the listener and Kafka
+BATCH_SIZE = 500      # max messages handed to the producer thread at once
+STATS_EVERY = 60.0    # seconds between queue stats log lines
+
+
+class KafkaHandoff:
+    """
+    Decouples an asyncio listener from the Kafka producer.
+
+    submit() only puts the message on a bounded asyncio.Queue and never
+    blocks; a background task drains the queue in batches and produces them
+    on a dedicated thread, so a slow or unreachable broker (full librdkafka
+    buffer, flush) never stalls the event loop. When the queue is full the
+    new message is dropped and counted.
+
+    Usage:
+        handoff = KafkaHandoff()
+        await handoff.start()
+        handoff.submit("live-social", payload, key="bitcoin")
+        ...
+        await handoff.stop()   # drains the queue and flushes the producer
+    """
+
+    def __init__(self, maxsize: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE, stats_every: float = STATS_EVERY):
+        self.batch_size = batch_size
+        self.stats_every = stats_every
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka-handoff")
+        self._task: asyncio.Task | None = None
+        self.submitted = 0
+        self.sent = 0
+        self.dropped = 0
+        self.batches = 0
+        self.max_depth = 0
+
+    def submit(self, topic: str, payload: bytes | str, key: str | None = None) -> bool:
+        """Queue one message (codec bytes or a UTF-8 str) for Kafka. Returns False if it was dropped (queue full)."""
+        try:
+            self._queue.put_nowait((topic, payload, key))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"[WARN] Kafka handoff queue full ({self._queue.maxsize}), dropped {self.dropped} messages so far")
+            return False
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain(), name="kafka-handoff")
+
+    async def stop(self, timeout_s: float = 10.0) -> None:
+        """Send what is still queued, then flush the producer."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout_s)
+            except asyncio.TimeoutError:
+                print(f"[WARN] Kafka handoff not drained after {timeout_s}s, {self._queue.qsize()} messages left")
+            self._task.cancel()
+            try:
+                # A batch already on the producer thread still completes there
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        rest = []
+        while True:
+            try:
+                rest.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        if rest:
+            try:
+                await loop.run_in_executor(self._executor, self._send_batch, rest)
+            except Exception as e:
+                print(f"[ERROR] Kafka handoff failed to send {len(rest)} messages: {e!r}")
+            finally:
+                for _ in rest:
+                    self._queue.task_done()
+
+        await loop.run_in_executor(self._executor, flush_producer, timeout_s)
+        self._executor.shutdown(wait=True)
+        print(f"[INFO] Kafka handoff stopped: {self.stats()}")
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_stats = time.monotonic()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                await loop.run_in_executor(self._executor, self._send_batch, batch)
+            except Exception as e:
+                print(f"[ERROR] Kafka handoff failed to send {len(batch)} messages: {e!r}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if time.monotonic() - last_stats >= self.stats_every:
+                print(f"[INFO] Kafka handoff: {self.stats()}")
+                last_stats = time.monotonic()
+
+    def _send_batch(self, batch: list[tuple[str, bytes | str, str | None]]) -> None:
+        # Runs on the producer thread: produce() may wait here for buffer space
+        for topic, payload, key in batch:
+            if isinstance(payload, str):
+                payload = payload.encode("utf-8")
+            send_bytes_to_kafka_topic_async(topic, payload, key=key)
+        self.sent += len(batch)
+        self.batches += 1
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "avg_batch": round(self.sent / self.batches, 1) if self.batches else 0.0,
+        }
@@ -1,13 +1,24 @@
-import requests
+import asyncio
 import os
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
-COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price"
+# Base URL is overridable so a local stub server can stand in for CoinGecko
+COINGECKO_BASE_URL = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
+COINGECKO_URL = f"{COINGECKO_BASE_URL}/simple/price"
 TARGET_TICKERS = ["bitcoin", "dogecoin"]
 
+IDS_PER_REQUEST = 100   # tickers per /simple/price call; longer lists are chunked
+MAX_CONCURRENCY = 4     # chunk requests in flight at once
+REQUEST_TIMEOUT = 10    # seconds
+
 
 def fetch_prices() -> dict | None:
     """Fetch current USD prices for all target tickers from CoinGecko."""
@@ -28,6 +39,190 @@ def fetch_prices() -> dict | None:
         return None
 
 
+class RateLimited(Exception):
+    """
+    The API answered 429; `retry_after` is its hint in seconds, if any.
+    `partial` holds the prices of the chunks that did get through.
+    """
+
+    def __init__(self, retry_after: float | None, partial: dict | None = None):
+        super().__init__(f"rate limited (retry_after={retry_after})")
+        self.retry_after = retry_after
+        self.partial = partial or {}
+
+
+class RateLimitInfo:
+    """Rate-limit state parsed from the latest response headers."""
+
+    __slots__ = ("remaining", "reset_in", "retry_after")
+
+    def __init__(self, remaining: int | None = None, reset_in: float | None = None, retry_after: float | None = None):
+        self.remaining = remaining      # calls left in the current window
+        self.reset_in = reset_in        # seconds until the window resets
+        self.retry_after = retry_after  # seconds to wait (429 / 503)
+
+    @classmethod
+    def from_headers(cls, headers) -> "RateLimitInfo":
+        return cls(
+            remaining=_int_header(headers, "x-ratelimit-remaining"),
+            reset_in=_seconds_header(headers, "x-ratelimit-reset"),
+            retry_after=_seconds_header(headers, "retry-after"),
+        )
+
+    def __repr__(self) -> str:
+        return f"RateLimitInfo(remaining={self.remaining}, reset_in={self.reset_in}, retry_after={self.retry_after})"
+
+
+def _int_header(headers, name: str) -> int | None:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def _seconds_header(headers, name: str) -> float | None:
+    """
+    Seconds from now for a delta ("30"), a Unix timestamp ("1718000000") or an
+    HTTP date ("Wed, 21 Oct 2015 07:28:00 GMT"), whichever the API sends.
+    """
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    if seconds > 1e9:  # absolute epoch
+        return max(0.0, seconds - time.time())
+    return max(0.0, seconds)
+
+
+class AsyncPriceFetcher:
+    """
+    Async CoinGecko client: one keep-alive aiohttp session for the producer's
+    lifetime, tickers split into chunks fetched concurrently.
+
+    Point `base_url` at any server speaking /simple/price (see
+    stub_price_server.py) to run without CoinGecko.
+
+    Usage:
+        async with AsyncPriceFetcher() as fetcher:
+            prices = await fetcher.fetch(TARGET_TICKERS)   # {"bitcoin": {"usd": ...}}
+            fetcher.rate_limit                              # parsed headers of the last call
+    """
+
+    def __init__(
+        self,
+        base_url: str = COINGECKO_BASE_URL,
+        api_key: str | None = COINGECKO_API_KEY,
+        ids_per_request: int = IDS_PER_REQUEST,
+        max_concurrency: int = MAX_CONCURRENCY,
+        timeout_s: float = REQUEST_TIMEOUT,
+    ):
+        self.url = f"{base_url.rstrip('/')}/simple/price"
+        self.headers = {"x-cg-demo-api-key": api_key} if api_key else {}
+        self.ids_per_request = ids_per_request
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout_s)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: aiohttp.ClientSession | None = None
+        self.rate_limit = RateLimitInfo()
+        self.requests = 0
+
+    async def __aenter__(self) -> "AsyncPriceFetcher":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=120),
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, tickers: list[str]) -> dict:
+        """
+        Current USD prices for `tickers`, merged across chunks.
+        Raises RateLimited (with the other chunks' prices) if any chunk got a
+        429, aiohttp.ClientError / asyncio.TimeoutError on other failures.
+        """
+        await self.open()
+        chunks = [tickers[i:i + self.ids_per_request] for i in range(0, len(tickers), self.ids_per_request)]
+        results = await asyncio.gather(*(self._fetch_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+        prices = {}
+        errors = []
+        for result in results:
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                prices.update(result)
+
+        for error in errors:
+            if isinstance(error, RateLimited):
+                raise RateLimited(error.retry_after, partial=prices)
+        if errors:
+            raise errors[0]
+        return prices
+
+    async def _fetch_chunk(self, tickers: list[str]) -> dict:
+        params = {"ids": ",".join(tickers), "vs_currencies": "usd"}
+        async with self._semaphore:
+            async with self._session.get(self.url, params=params) as response:
+                self.requests += 1
+                self.rate_limit = RateLimitInfo.from_headers(response.headers)
+                if response.status == 429:
+                    raise RateLimited(self.rate_limit.retry_after)
+                response.raise_for_status()
+                return await response.json()
+
+
+class PollScheduler:
+    """
+    Decides how long to wait before the next poll.
+
+    - Normally `interval_s`, stretched when the rate-limit headers say the
+      remaining calls would not last until the window resets.
+    - After a 429: the server's Retry-After if given, else exponential backoff
+      from `interval_s` up to `max_backoff_s`. Errors back off the same way.
+    """
+
+    def __init__(self, interval_s: float = 60.0, min_interval_s: float = 1.0, max_backoff_s: float = 600.0):
+        self.interval_s = interval_s
+        self.min_interval_s = min_interval_s
+        self.max_backoff_s = max_backoff_s
+        self.failures = 0
+
+    def after_success(self, rate_limit: RateLimitInfo, calls_per_poll: int = 1) -> float:
+        self.failures = 0
+        delay = self.interval_s
+        if rate_limit.remaining is not None and rate_limit.reset_in is not None:
+            polls_left = rate_limit.remaining // max(calls_per_poll, 1)
+            if polls_left <= 0:
+                delay = max(delay, rate_limit.reset_in)
+            else:
+                delay = max(delay, rate_limit.reset_in / polls_left)
+        return max(self.min_interval_s, delay)
+
+    def after_failure(self, retry_after: float | None = None) -> float:
+        self.failures += 1
+        if retry_after is not None:
+            return min(self.max_backoff_s, max(self.min_interval_s, retry_after))
+        return min(self.max_backoff_s, self.interval_s * 2 ** (self.failures - 1))
+
+
 # --- Run this file directly to test fetching alone ---
 if __name__ == "__main__":
     data = fetch_prices()
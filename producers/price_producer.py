@@ -1,43 +1,120 @@
-import json
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+import aiohttp
 from dotenv import load_dotenv
-from import_me_to_use_kafka_stuff import send_string_to_kafka_topic
-from price_fetcher import fetch_prices, TARGET_TICKERS
+from import_me_to_use_kafka_stuff import send_bytes_to_kafka_topic_async, flush_producer
+from message_codec import PriceTick, encode_price
+from price_fetcher import AsyncPriceFetcher, PollScheduler, RateLimited, TARGET_TICKERS
 
 load_dotenv()
 
-POLL_INTERVAL = 60  # seconds
+POLL_INTERVAL = float(os.getenv("PRICE_POLL_INTERVAL", "60"))   # seconds, stretched by rate limits
+MIN_POLL_INTERVAL = 1.0
+MAX_BACKOFF = 600.0
+# Unchanged prices are not re-sent, except this often so the processor's
+# 5-minute price window never runs dry on a quiet ticker
+HEARTBEAT_INTERVAL = 240.0
+KAFKA_TOPICS = ("bitcoin", "dogecoin")
 
 
-def produce_prices():
-    """Main loop: fetch prices and push each ticker as a Kafka message."""
-    print("[INFO] Price producer started...")
+def changed_prices(data: dict, last_sent: dict, now: float, heartbeat_s: float = HEARTBEAT_INTERVAL) -> dict:
+    """
+    The subset of `data` ({ticker: {"usd": price}}) worth producing: new or
+    changed prices, plus unchanged ones whose last send is older than `heartbeat_s`.
+    `last_sent` maps ticker -> (price, sent_at) and is updated in place.
+    """
+    out = {}
+    for ticker, values in data.items():
+        price = values.get("usd")
+        if price is None:
+            continue
+        previous = last_sent.get(ticker)
+        if previous is not None and previous[0] == price and now - previous[1] < heartbeat_s:
+            continue
+        last_sent[ticker] = (price, now)
+        out[ticker] = price
+    return out
 
-    while True:
-        data = fetch_prices()
 
-        if data:
-            for ticker, values in data.items():
-                # Only produce if topic exists in Kafka
-                if ticker not in ("bitcoin", "dogecoin"):
-                    print(f"[SKIP] No Kafka topic for {ticker}, skipping.")
-                    continue
+def produce_changed(data: dict, last_sent: dict, stats: dict) -> None:
+    """Send the new/changed prices in `data` to their Kafka topics."""
+    now = time.time()
+    changed = changed_prices(data, last_sent, now)
+    stats["suppressed"] += len(data) - len(changed)
+
+    for ticker, price in changed.items():
+        # Only produce if topic exists in Kafka
+        if ticker not in KAFKA_TOPICS:
+            continue
+
+        tick = PriceTick(ticker, price, now)
+        send_bytes_to_kafka_topic_async(ticker, encode_price(tick), key=ticker)
+        stats["produced"] += 1
+        print(f"[PRODUCED] {tick}")
+
+
+async def produce_prices(fetcher: AsyncPriceFetcher | None = None, max_polls: int | None = None) -> dict:
+    """
+    Main loop: fetch prices and push each changed ticker as a Kafka message.
 
-                message = json.dumps({
-                    "ticker": ticker,
-                    "price_usd": values["usd"],
-                    "timestamp": time.time(),
-                })
+    One keep-alive HTTP session is reused across polls, and the wait between
+    polls follows the API's rate-limit headers (with backoff on 429 / errors).
+    Sends run on a producer thread (produce() waits there while the local
+    Kafka queue is full), so the event loop never stalls on the broker; the
+    producer is flushed once on shutdown.
 
-                send_string_to_kafka_topic(ticker, message)
-                print(f"[PRODUCED] {message}")
+    Args:
+        fetcher: Fetch layer to use; defaults to CoinGecko (or COINGECKO_BASE_URL).
+        max_polls: Stop after this many polls (None = run forever).
+    Returns:
+        Counters: polls, produced, suppressed, rate_limited, errors.
+    """
+    print("[INFO] Price producer started...")
+
+    fetcher = fetcher or AsyncPriceFetcher()
+    scheduler = PollScheduler(POLL_INTERVAL, MIN_POLL_INTERVAL, MAX_BACKOFF)
+    chunks_per_poll = -(-len(TARGET_TICKERS) // fetcher.ids_per_request)
+    last_sent: dict[str, tuple[float, float]] = {}
+    stats = {"polls": 0, "produced": 0, "suppressed": 0, "rate_limited": 0, "errors": 0}
+    loop = asyncio.get_running_loop()
+    producer_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="price-producer")
+
+    try:
+        async with fetcher:
+            while max_polls is None or stats["polls"] < max_polls:
+                stats["polls"] += 1
+                try:
+                    data = await fetcher.fetch(TARGET_TICKERS)
+                except RateLimited as e:
+                    stats["rate_limited"] += 1
+                    await loop.run_in_executor(producer_thread, produce_changed, e.partial, last_sent, stats)
+                    delay = scheduler.after_failure(e.retry_after)
+                    print(f"[WARN] Rate limited, backing off {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    stats["errors"] += 1
+                    delay = scheduler.after_failure()
+                    print(f"[ERROR] Failed to fetch prices: {e!r}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
 
-        time.sleep(POLL_INTERVAL)
+                await loop.run_in_executor(producer_thread, produce_changed, data, last_sent, stats)
+                await asyncio.sleep(scheduler.after_success(fetcher.rate_limit, chunks_per_poll))
+    finally:
+        await loop.run_in_executor(producer_thread, flush_producer)
+        producer_thread.shutdown(wait=True)
+        print(f"[INFO] Price producer stopped: {stats}")
+    return stats
 
 
 if __name__ == "__main__":
-    produce_prices()
+    try:
+        asyncio.run(produce_prices())
+    except KeyboardInterrupt:
+        pass
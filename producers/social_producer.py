@@ -1,11 +1,12 @@
 import os
-import json
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from dotenv import load_dotenv
 from telethon import TelegramClient, events
-from import_me_to_use_kafka_stuff import send_string_to_kafka_topic
+from kafka_handoff import KafkaHandoff
+from message_codec import SocialPost, encode_social
+from ticker_matcher import ALIAS_TABLE_PATH, TickerMatcher
 
 load_dotenv()
 
@@ -14,18 +15,11 @@ API_ID = int(os.getenv("TELEGRAM_API_ID"))
 API_HASH = os.getenv("TELEGRAM_API_HASH")
 KAFKA_TOPIC = "live-social"
 
-# --- Alias Map: maps any variant → canonical ticker name ---
-TICKER_ALIASES = {
-    "bitcoin": "bitcoin",
-    "bitconi": "bitcoin",   # typo
-    "bitcon": "bitcoin",    # typo
-    "bitocin": "bitcoin",   # typo
-    "btc": "bitcoin",       # short form
-    "dogecoin": "dogecoin",
-    "dodcoin": "dogecoin",  # typo
-    "dogcoin": "dogecoin",  # typo
-    "doge": "dogecoin",     # short form
-}
+# --- Ticker matching ---
+# Aliases, short forms and typos live in ticker_aliases.json; only tickers
+# with a price topic are matched
+TRACKED_TICKERS = ["bitcoin", "dogecoin"]
+ticker_matcher = TickerMatcher.load(ALIAS_TABLE_PATH, tickers=set(TRACKED_TICKERS))
 
 TARGET_GROUPS = [
     # "binanceexchange",      # Binance Global English
@@ -37,21 +31,17 @@ TARGET_GROUPS = [
 # --- Telethon Client ---
 client = TelegramClient("ghostmarket_session", API_ID, API_HASH)
 
+# Handler -> bounded queue -> background producer task; the listener never waits on Kafka
+handoff = KafkaHandoff()
+
 
 def detect_tickers(text: str) -> list[str]:
     """
     Returns list of canonical ticker names found in text.
-    Matches exact aliases and typos defined in TICKER_ALIASES.
-    Example: "btc to the moon, doge!" -> ["bitcoin", "dogecoin"]
+    Matches aliases, typos, cashtags and pairs from the alias table.
+    Example: "$btc to the moon, #doge!" -> ["bitcoin", "dogecoin"]
     """
-    words = text.lower().split()
-    found = set()
-    for word in words:
-        # Strip punctuation from word edges e.g. "btc!" -> "btc"
-        clean_word = word.strip("!?,.()")
-        if clean_word in TICKER_ALIASES:
-            found.add(TICKER_ALIASES[clean_word])
-    return list(found)
+    return ticker_matcher.find(text)
 
 
 @client.on(events.NewMessage(chats=TARGET_GROUPS))
@@ -64,23 +54,28 @@ async def handler(event):
     if not matched_tickers:
         return
 
-    payload = json.dumps({
-        "source": "telegram",
-        "timestamp": event.date.timestamp(),
-        "text": text,
-        "tickers": matched_tickers,       # e.g. ["bitcoin", "dogecoin"]
-        "author": str(event.sender_id),
-    })
+    payload = encode_social(SocialPost(
+        text=text,
+        tickers=matched_tickers,          # e.g. ["bitcoin", "dogecoin"]
+        timestamp=event.date.timestamp(),
+        author=str(event.sender_id),
+        source="telegram",
+    ))
 
-    send_string_to_kafka_topic(KAFKA_TOPIC, payload)
-    print(f"[PRODUCED] tickers={matched_tickers} | {text[:60]}...")
+    # Non-blocking: just queued here, produced by the handoff's background task
+    if handoff.submit(KAFKA_TOPIC, payload, key=min(matched_tickers)):
+        print(f"[PRODUCED] tickers={matched_tickers} | {text[:60]}...")
 
 
 async def main():
     print("[INFO] Social producer starting...")
     await client.start()
+    await handoff.start()
     print(f"[INFO] Listening to {len(TARGET_GROUPS)} groups...")
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await handoff.stop()
 
 
 if __name__ == "__main__":
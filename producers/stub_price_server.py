@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+from aiohttp import web
+
+# Starting prices for the random walk; unknown ids start at 1.0
+START_PRICES = {"bitcoin": 62500.0, "dogecoin": 0.15}
+
+
+def make_app(
+    rate_limit: int = 30,
+    window_s: float = 60.0,
+    change_prob: float = 0.5,
+    seed: int | None = None,
+) -> web.Application:
+    """
+    Minimal stand-in for CoinGecko's /simple/price, for tests and benchmarks.
+
+    Prices random-walk (each id changes with probability `change_prob` per
+    call, so unchanged-price suppression has something to suppress), and the
+    server enforces `rate_limit` calls per `window_s` with the usual
+    x-ratelimit-* / Retry-After headers.
+    """
+    rng = random.Random(seed)
+    prices = dict(START_PRICES)
+    state = {"window_start": time.time(), "calls": 0}
+
+    async def simple_price(request: web.Request) -> web.Response:
+        now = time.time()
+        if now - state["window_start"] >= window_s:
+            state["window_start"], state["calls"] = now, 0
+        reset_in = max(0.0, window_s - (now - state["window_start"]))
+
+        if state["calls"] >= rate_limit:
+            return web.json_response(
+                {"status": {"error_code": 429, "error_message": "rate limited"}},
+                status=429,
+                headers={"Retry-After": str(int(reset_in) + 1)},
+            )
+        state["calls"] += 1
+
+        ids = [i for i in request.query.get("ids", "").split(",") if i]
+        body = {}
+        for ticker in ids:
+            price = prices.setdefault(ticker, 1.0)
+            if rng.random() < change_prob:
+                price = prices[ticker] = round(price * (1 + rng.gauss(0, 0.001)), 8)
+            body[ticker] = {"usd": price}
+
+        return web.json_response(body, headers={
+            "x-ratelimit-limit": str(rate_limit),
+            "x-ratelimit-remaining": str(rate_limit - state["calls"]),
+            "x-ratelimit-reset": f"{reset_in:.1f}",
+        })
+
+    app = web.Application()
+    app.router.add_get("/api/v3/simple/price", simple_price)
+    app.router.add_get("/simple/price", simple_price)
+    return app
+
+
+# --- Run standalone, then point the producer at it ---
+#   COINGECKO_BASE_URL=http://127.0.0.1:8765/api/v3 python producers/price_producer.py
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub CoinGecko /simple/price server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=int, default=30, help="calls per window")
+    parser.add_argument("--window", type=float, default=60.0, help="rate-limit window, seconds")
+    args = parser.parse_args()
+
+    web.run_app(make_app(args.rate_limit, args.window), host="127.0.0.1", port=args.port)
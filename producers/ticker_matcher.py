@@ -0,0 +1,206 @@
+import json
+import os
+import re
+from itertools import filterfalse
+
+ALIAS_TABLE_PATH = os.path.join(os.path.dirname(__file__), "ticker_aliases.json")
+TYPO_MIN_LENGTH = 7   # only names this long get generated typo variants
+
+
+def typo_variants(name: str) -> set[str]:
+    """
+    Single-edit typos of `name`: one letter dropped ("bitcon") or two
+    neighbours swapped ("bitocin"). Short names are skipped, their typos
+    collide with real words and other tickers too easily.
+    """
+    if len(name) < TYPO_MIN_LENGTH or not name.isalpha():
+        return set()
+    variants = {name[:i] + name[i + 1:] for i in range(len(name))}
+    variants |= {name[:i] + name[i + 1] + name[i] + name[i + 2:] for i in range(len(name) - 1)}
+    variants.discard(name)
+    return variants
+
+
+def load_alias_table(path: str = ALIAS_TABLE_PATH) -> dict:
+    """
+    Alias table: {canonical: {"aliases": [...], "cashtag_only": [...], "typos": [...]}}.
+    - aliases: matched as whole words; names of 7+ letters also get typo variants
+    - cashtag_only: matched only as $sym / #sym (symbols that are English words)
+    - typos: extra hand-picked misspellings
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# One token per run of letters/digits, keeping a leading $ / # tag.
+# Everything else separates tokens: "btc/usdt", "(doge)", "btc🚀" all split cleanly.
+_TOKEN = re.compile(r"[$#]?[a-z0-9]+")
+
+
+class TickerMatcher:
+    """
+    Finds canonical tickers in a message in one pass: the lowercased message
+    is split into tokens (str.split, with a compiled regex only for words
+    that carry punctuation), and the tokens are intersected with the alias
+    table as a set operation, so the cost per message does not grow with the
+    number of aliases.
+
+    Handles bare words ("btc to the moon"), cashtags / hashtags ("$btc",
+    "#doge"), pairs ("btc/usdt") and multi-word aliases ("bitcoin cash",
+    matched before their single words).
+
+    Usage:
+        matcher = TickerMatcher.from_table(load_alias_table(), tickers={"bitcoin", "dogecoin"})
+        matcher.find("$BTC and #doge pumping")   # ["bitcoin", "dogecoin"] (any order)
+    """
+
+    def __init__(self, aliases: dict[str, str], cashtag_only: dict[str, str] | None = None):
+        """
+        Args:
+            aliases: lowercase alias -> canonical ticker, matched bare or tagged.
+            cashtag_only: lowercase alias -> canonical ticker, matched only after $ or #.
+        """
+        self.aliases = {alias: ticker for alias, ticker in aliases.items() if " " not in alias}
+        self.tagged = {**(cashtag_only or {}), **self.aliases}
+
+        # Token -> ticker, with tagged forms spelled out ("btc", "$btc", "#btc")
+        self._lookup = dict(self.aliases)
+        for alias, ticker in self.tagged.items():
+            self._lookup["$" + alias] = ticker
+            self._lookup["#" + alias] = ticker
+
+        # Multi-word aliases: a small regex, only run when a phrase's first word is a token
+        phrases = {alias: ticker for alias, ticker in aliases.items() if " " in alias}
+        self._phrases = {" ".join(alias.split()): ticker for alias, ticker in phrases.items()}
+        self._phrase_starts = {_TOKEN.findall(alias)[0] for alias in phrases}
+        self._phrase_re = re.compile(
+            r"(?<![a-z0-9])(" + "|".join(
+                r"[^a-z0-9$#]+".join(re.escape(word) for word in alias.split())
+                for alias in sorted(phrases, key=len, reverse=True)
+            ) + r")(?![a-z0-9])"
+        ) if phrases else None
+
+    @classmethod
+    def from_table(cls, table: dict, tickers=None, typos: bool = True) -> "TickerMatcher":
+        """
+        Build a matcher from an alias table (see load_alias_table).
+
+        Args:
+            table: The alias table.
+            tickers: Only match these canonical tickers (None = all of them).
+            typos: Add generated typo variants of long aliases.
+        """
+        aliases: dict[str, str] = {}
+        cashtag_only: dict[str, str] = {}
+        generated: dict[str, str | None] = {}   # typo -> ticker, None if ambiguous
+
+        for ticker, entry in table.items():
+            if tickers is not None and ticker not in tickers:
+                continue
+            for alias in entry.get("aliases", []) + entry.get("typos", []):
+                aliases[alias.lower()] = ticker
+            for alias in entry.get("cashtag_only", []):
+                cashtag_only[alias.lower()] = ticker
+            if typos:
+                for alias in entry.get("aliases", []):
+                    for variant in typo_variants(alias.lower()):
+                        owner = generated.get(variant, ticker)
+                        generated[variant] = ticker if owner == ticker else None
+
+        for variant, ticker in generated.items():
+            # Explicit aliases win; typos two tickers share are dropped
+            if ticker is not None and variant not in aliases and variant not in cashtag_only:
+                aliases[variant] = ticker
+
+        return cls(aliases, cashtag_only)
+
+    @classmethod
+    def load(cls, path: str = ALIAS_TABLE_PATH, tickers=None) -> "TickerMatcher":
+        return cls.from_table(load_alias_table(path), tickers=tickers)
+
+    def _tokens(self, text: str) -> set[str]:
+        """
+        Tokens of lowercased `text`. Whitespace-separated words that are
+        aliases or alphanumeric are tokens already; only the rest ("btc/usdt",
+        "doge!", "btc🚀") go through _TOKEN, in one call. Non-ASCII letters
+        count as part of a word, so "btcé" is not "btc".
+        """
+        tokens = set(text.split())
+        rest = filterfalse(str.isalnum, tokens.difference(self._lookup))
+        tokens.update(_TOKEN.findall(" ".join(rest)))
+        return tokens
+
+    def find(self, text: str) -> list[str]:
+        """Canonical tickers mentioned in `text` (each once, in no particular order)."""
+        text = text.lower()
+        tokens = self._tokens(text)
+        found = {}
+
+        if self._phrase_re is not None and not self._phrase_starts.isdisjoint(tokens):
+            for match in self._phrase_re.finditer(text):
+                found[self._phrases[" ".join(_TOKEN.findall(match.group(1)))]] = None
+            if found:
+                # Blank out matched phrases so "bitcoin cash" doesn't also count as "bitcoin"
+                tokens = self._tokens(self._phrase_re.sub(" ", text))
+
+        lookup = self._lookup
+        for token in lookup.keys() & tokens:
+            found[lookup[token]] = None
+        return list(found)
+
+    def __len__(self) -> int:
+        return len(self.tagged) + len(self._phrases)
+
+    def __repr__(self) -> str:
+        tickers = set(self.tagged.values()) | set(self._phrases.values())
+        return f"TickerMatcher(aliases={len(self.tagged) + len(self._phrases)}, tickers={len(tickers)})"
+
+
+# --- Run standalone for a quick check and microbenchmark ---
+if __name__ == "__main__":
+    import math
+    import random
+    import string
+    import time
+
+    matcher = TickerMatcher.load()
+    print(matcher)
+    for text in ["$BTC to the moon, #doge too!", "btc/usdt breaking out", "bitocin dump?",
+                 "link in bio", "$link pumping", "bitcoin cash > bitcoin"]:
+        print(f"{text!r:35} -> {matcher.find(text)}")
+
+    # Synthetic table with thousands of tickers, against the old split + dict
+    # lookup (which is cheaper per word but misses $btc, #doge and btc/usdt)
+    rng = random.Random(42)
+    table = {}
+    for i in range(5000):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+        table[f"{name}-{i}"] = {"aliases": [name, name[:3] + str(i)]}
+    table.update(load_alias_table())
+
+    t0 = time.perf_counter()
+    big = TickerMatcher.from_table(table)
+    build_s = time.perf_counter() - t0
+
+    def split_lookup(text: str) -> list[str]:
+        found = set()
+        for word in text.lower().split():
+            ticker = big.aliases.get(word.strip("!?,.()"))
+            if ticker:
+                found.add(ticker)
+        return list(found)
+
+    words = ["the", "market", "is", "going", "to", "moon", "today", "$btc", "#doge", "btc/usdt", "bitocin", "ser", "wen"]
+    messages = [" ".join(rng.choices(words, k=rng.randint(5, 40))) for _ in range(20_000)]
+
+    for label, fn in [("split + dict", split_lookup), ("TickerMatcher", big.find)]:
+        elapsed = math.inf
+        for _ in range(5):   # best of 5, the machine is rarely quiet
+            t0 = time.perf_counter()
+            mentions = sum(len(fn(message)) for message in messages)
+            elapsed = min(elapsed, time.perf_counter() - t0)
+        print(
+            f"{label:14}: {len(messages) / elapsed:>10,.0f} msgs/s "
+            f"({elapsed * 1e6 / len(messages):.1f} µs/msg), {mentions:,} mentions found"
+        )
+    print(f"build         : {build_s * 1000:.0f} ms for {len(big):,} aliases")
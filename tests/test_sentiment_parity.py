@@ -0,0 +1,69 @@
+"""
+Parity of the torch-int8 and onnx FinBERT backends against fp32 torch.
+
+Skipped when transformers / torch (or onnxruntime, for the onnx backend) are
+not installed, or the FinBERT weights can't be downloaded.
+
+    python -m pytest tests/test_sentiment_parity.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "processor"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+pytest.importorskip("transformers")
+pytest.importorskip("torch")
+
+from sentiment import export_onnx, get_backend
+from synthetic import SyntheticStream
+
+TOLERANCE = 0.05   # max score difference vs torch, same default as `sentiment.py --tolerance`
+N_TEXTS = 128
+# Telegram-like texts from the benchmark generator, as in `python processor/sentiment.py`
+TEXTS = [m["text"] for m in SyntheticStream(seed=7, duplicate_ratio=0).messages(N_TEXTS)]
+
+
+def _scores(backend) -> np.ndarray:
+    try:
+        backend.load()
+    except OSError as e:   # no network / model cache
+        pytest.skip(f"FinBERT weights not available: {e}")
+    return np.array(backend.score(TEXTS))
+
+
+@pytest.fixture(scope="module")
+def reference() -> np.ndarray:
+    return _scores(get_backend("torch"))
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory) -> str:
+    pytest.importorskip("onnxruntime")
+    model_dir = os.getenv("SENTIMENT_ONNX_DIR", "")
+    if model_dir and os.path.exists(os.path.join(model_dir, "model.onnx")):
+        return model_dir
+    model_dir = str(tmp_path_factory.mktemp("finbert-onnx"))
+    try:
+        export_onnx(model_dir)
+    except OSError as e:
+        pytest.skip(f"FinBERT weights not available: {e}")
+    return model_dir
+
+
+def _assert_parity(scores: np.ndarray, reference: np.ndarray) -> None:
+    assert scores.shape == reference.shape
+    assert np.abs(scores - reference).max() <= TOLERANCE
+    assert np.all(np.abs(scores) <= 1.0)
+
+
+def test_torch_int8_matches_torch(reference):
+    _assert_parity(_scores(get_backend("torch-int8")), reference)
+
+
+def test_onnx_matches_torch(reference, onnx_dir):
+    _assert_parity(_scores(get_backend("onnx", model_dir=onnx_dir)), reference)